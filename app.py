@@ -6,8 +6,10 @@ from datetime import date, timedelta
 from src.db import init_db
 from src.exporter import export_schedule_xlsx
 from src.staff_repo import (
-    add_staff, add_staff_bulk, list_staff, set_staff_active, delete_staff
+    add_staff, add_staff_bulk, list_staff, set_staff_active, delete_staff, set_staff_skills, staff_skill_masks,
+    set_staff_max_hours, staff_max_hours, get_overtime_budget, set_overtime_budget,
 )
+from src.skills_repo import add_skill, delete_skill, list_skills, mask_codes, skills_mask
 from src.unavailability_repo import (
     add_unavailability_range, list_unavailability, delete_unavailability, set_unavailability_status
 )
@@ -18,12 +20,27 @@ from src.holidays_repo import (
     add_holidays, list_holidays, delete_holiday
 )
 from src.calendar_utils import (
-    iter_month_days, count_weekdays_excluding_holidays
+    iter_month_days, count_weekdays_excluding_holidays, horizon_range
+)
+from src.blockers import build_blocked_days_for_range, build_blocked_days_with_type
+from src.scheduler import (
+    build_required_shifts,
+    generate_schedule_hard_min_hours,
+    rule_lookback_days,
+    set_shift_types,
+    shift_registry,
+    validate_assignments,
+)
+from src.shift_types_repo import delete_shift_type, list_shift_types, upsert_shift_type
+from src.solver import ProblemSpec, conflict_days, replan_window, solve_cached, solve_horizon, solve_warm
+from src.feasibility import find_impossible_days
+from src.assignments_repo import list_days_before, list_month, replace_days, replace_month, replace_range
+from src.ledger_repo import ledger_totals
+from src.demand_repo import list_demand, set_demand
+from src.rules_repo import (
+    ensure_rules_table, add_rule, add_coverage_rule, add_window_rule, list_rules, set_rest_rule, set_rule_active,
+    update_coverage_rule, update_rest_rule, update_rule, update_window_rule, delete_rule,
 )
-from src.blockers import build_blocked_days_with_type
-from src.scheduler import build_required_shifts, SHIFT_HOURS, generate_schedule_hard_min_hours, validate_assignments
-from src.assignments_repo import clear_month, insert_assignments, list_month
-from src.rules_repo import ensure_rules_table, add_rule, list_rules, set_rule_active, update_rule, delete_rule
 from src.rules_presets import PRESETS, apply_preset
 from src.auth import login_panel, current_user, require_role
 
@@ -74,7 +91,23 @@ def _deny_admin_only():
     st.error("⛔ Bu sayfa sadece **Yönetici** içindir.")
     return
 # --- /AUTH HELPERS ---
+
+# --- ÇİZELGE HELPERS (kayıtlı vardiya tipleri) ---
+def _cell_shift(stype: str) -> str:
+    """Hücredeki ilk vardiya tipi ('DAY+NIGHT' -> 'DAY')."""
+    return str(stype or "").split("+")[0].strip()
+
+def _cell_hours_text(stype: str) -> str:
+    reg = shift_registry()
+    first = _cell_shift(stype)
+    return str(reg.hours_of(first)) if reg.code(first) >= 0 else ""
+
+def _worked_hours(stype: str) -> int:
+    hours_of = shift_registry().hours_of
+    return sum(hours_of(part.strip()) for part in str(stype or "").split("+"))
+# --- /ÇİZELGE HELPERS ---
 init_db()
+set_shift_types(list_shift_types())
 
 # ===== ROLE SYNC =====
 # Admin her zaman öncelikli
@@ -185,6 +218,58 @@ with tab_staff:
                                 if st.button("Sil", key=f"del_{staff_id}"):
                                     delete_staff(staff_id)
                                     st.rerun()
+
+                # --- Yetkinlikler (kıdemli, yoğun bakım sertifikası vb.) ---
+                st.markdown("---")
+                st.markdown("### 🎓 Yetkinlikler")
+                st.caption("Kurallar sekmesindeki kapsama kuralları (ör. her NIGHT'ta en az 2 KIDEMLI) bu yetkinlikleri kullanır.")
+                sk1, sk2 = st.columns(2)
+                with sk1:
+                    new_skill = st.text_input("Yeni yetkinlik", key="skill_new_code", placeholder="Örn: KIDEMLI")
+                    if st.button("Yetkinlik Ekle", key="skill_add_btn") and new_skill.strip():
+                        add_skill(new_skill)
+                        st.rerun()
+                    skill_codes = [r["code"] for r in list_skills()]
+                    del_skill = st.selectbox("Silinecek yetkinlik", [""] + skill_codes, key="skill_delete_code")
+                    if del_skill and st.button("Yetkinliği sil", key="skill_delete_btn"):
+                        delete_skill(del_skill)
+                        st.rerun()
+                with sk2:
+                    if not skill_codes:
+                        st.info("Henüz yetkinlik tanımlı değil.")
+                    else:
+                        skill_staff_rows = list_staff(only_active=True)
+                        masks_now = staff_skill_masks()
+                        for r in skill_staff_rows:
+                            sid_sk = int(r["id"])
+                            current_codes = mask_codes(masks_now.get(sid_sk, 0))
+                            picked = st.multiselect(
+                                r["full_name"], skill_codes, default=current_codes, key=f"staff_skills_{sid_sk}"
+                            )
+                            if set(picked) != set(current_codes):
+                                set_staff_skills(sid_sk, skills_mask(picked))
+
+                # --- Üst saat sınırı + ortak fazla mesai havuzu ---
+                st.markdown("---")
+                st.markdown("### ⏱️ Üst Saat Sınırı / Fazla Mesai")
+                st.caption(
+                    "Aylık üst sınır (0 = sınırsız). Sınırı aşan saatler ortak fazla mesai havuzundan düşer; "
+                    "havuz bitince plan kişiyi sınırın üstüne yüklemez."
+                )
+                ot_now = get_overtime_budget()
+                ot_new = st.number_input("Aylık fazla mesai havuzu (saat)", min_value=0, step=8, value=int(ot_now), key="overtime_budget_input")
+                if int(ot_new) != ot_now:
+                    set_overtime_budget(int(ot_new))
+                caps_now = staff_max_hours()
+                cap_cols = st.columns(3)
+                for i, r in enumerate(list_staff(only_active=True)):
+                    sid_cap = int(r["id"])
+                    with cap_cols[i % 3]:
+                        cap_val = st.number_input(
+                            r["full_name"], min_value=0, step=8, value=int(caps_now.get(sid_cap, 0)), key=f"staff_max_hours_{sid_cap}"
+                        )
+                    if int(cap_val) != int(caps_now.get(sid_cap, 0)):
+                        set_staff_max_hours(sid_cap, int(cap_val) if cap_val else None)
     # -------------------- RAPOR / İZİN --------------------
 with tab_unav:
     if _is_staff():
@@ -917,8 +1002,8 @@ with tab_rules:
 
         st.markdown("---")
         st.markdown("### ➕ Manuel Kural Ekle")
-        rule_prev_opts = ["DAY", "NIGHT", "D24", "ANY", "RAPOR", "YILLIK_IZIN"]
-        rule_next_opts = ["DAY", "NIGHT", "D24", "ANY"]
+        rule_prev_opts = list(shift_registry().names) + ["ANY", "RAPOR", "YILLIK_IZIN"]
+        rule_next_opts = list(shift_registry().names) + ["ANY"]
         rule_day_opts = ["ANY", "WEEKDAY", "WEEKEND"]
 
         with st.form("rule_add_form", clear_on_submit=True):
@@ -936,6 +1021,61 @@ with tab_rules:
                 st.success("Kural kaydedildi ve aktif hale getirildi.")
                 st.rerun()
 
+        st.markdown("### ➕ Pencere / Ardışık Gün Kuralı")
+        st.caption("Örn: herhangi 7 günde en fazla 3 NIGHT · en fazla 5 gün üst üste çalışma (ANY).")
+        window_kind_labels = {"WINDOW": "K günde en fazla N", "CONSECUTIVE": "En fazla N gün üst üste"}
+        with st.form("window_rule_form", clear_on_submit=True):
+            w1, w2, w3, w4 = st.columns(4)
+            with w1:
+                new_wkind = st.selectbox(
+                    "Kural", list(window_kind_labels), format_func=window_kind_labels.get, key="rule_new_wkind"
+                )
+            with w2:
+                new_wtype = st.selectbox("Vardiya", rule_next_opts, key="rule_new_wtype")
+            with w3:
+                new_wmax = st.number_input("En fazla (N)", min_value=1, max_value=31, value=3, step=1, key="rule_new_wmax")
+            with w4:
+                new_wdays = st.number_input(
+                    "Pencere (K gün)", min_value=2, max_value=31, value=7, step=1, key="rule_new_wdays",
+                    help="Ardışık gün kuralında kullanılmaz.",
+                )
+            new_wnote = st.text_input("Açıklama", key="rule_new_wnote", placeholder="Örn: 7 günde en fazla 3 gece")
+            w_submitted = st.form_submit_button("Kuralı Kaydet", type="primary")
+            if w_submitted:
+                add_window_rule(new_wkind, new_wtype, int(new_wmax), int(new_wdays), new_wnote)
+                st.success("Kural kaydedildi ve aktif hale getirildi.")
+                st.rerun()
+
+        st.markdown("### 😴 En Az Dinlenme Süresi")
+        st.caption("Bir vardiyanın bitişi ile aynı kişinin sonraki vardiyasının başlangıcı arası (vardiya tiplerinin saatlerinden).")
+        with st.form("rest_rule_form", clear_on_submit=True):
+            new_rest = st.number_input("En az dinlenme (saat)", min_value=1, max_value=48, value=11, step=1, key="rule_new_rest")
+            r_submitted = st.form_submit_button("Kuralı Kaydet", type="primary")
+            if r_submitted:
+                set_rest_rule(int(new_rest), f"Vardiyalar arası en az {int(new_rest)} saat dinlenme")
+                st.success("Kural kaydedildi ve aktif hale getirildi.")
+                st.rerun()
+
+        st.markdown("### 🎓 Yetkinlik Kapsamı")
+        st.caption("Örn: her NIGHT'ta en az 2 KIDEMLI. Yetkinlikler Personel sekmesinde tanımlanır.")
+        cover_skill_opts = [r["code"] for r in list_skills()]
+        if not cover_skill_opts:
+            st.info("Önce Personel sekmesinde yetkinlik tanımla.")
+        else:
+            with st.form("coverage_rule_form", clear_on_submit=True):
+                k1, k2, k3 = st.columns(3)
+                with k1:
+                    new_ctype = st.selectbox("Vardiya", rule_next_opts, key="rule_new_ctype")
+                with k2:
+                    new_cskill = st.selectbox("Yetkinlik", cover_skill_opts, key="rule_new_cskill")
+                with k3:
+                    new_cmin = st.number_input("En az kişi", min_value=1, max_value=50, value=1, step=1, key="rule_new_cmin")
+                c_submitted = st.form_submit_button("Kuralı Kaydet", type="primary")
+                if c_submitted:
+                    add_coverage_rule(new_ctype, skills_mask([new_cskill]), int(new_cmin), new_cskill)
+                    st.success("Kural kaydedildi ve aktif hale getirildi.")
+                    st.rerun()
+
         st.markdown("---")
         st.markdown("### 📋 Mevcut Kural Seti")
         all_rules = list_rules(active_only=None)
@@ -964,6 +1104,100 @@ with tab_rules:
                 rid = int(r["id"])
                 is_active = bool(r.get("is_active", 1))
                 status_label = "Aktif" if is_active else "Pasif"
+                rule_kind = r.get("rule_kind") or "TRANSITION"
+                if rule_kind == "COVERAGE":
+                    with st.expander(f'#{rid} | {r["next_type"]}: en az {r["min_count"]} {r.get("note") or ""} | {status_label}'):
+                        edit_cmin = st.number_input(
+                            "En az kişi", min_value=1, max_value=50, value=max(1, int(r["min_count"])),
+                            step=1, key=f"rule_cmin_{rid}",
+                        )
+                        edit_note = st.text_input("Etiket", value=r.get("note", "") or "", key=f"rule_note_{rid}")
+                        edit_active = st.checkbox("Aktif", value=is_active, key=f"rule_active_{rid}")
+
+                        a1, a2, a3 = st.columns([1, 1, 1])
+                        with a1:
+                            if st.button("Kaydet", key=f"rule_save_{rid}", type="primary"):
+                                update_coverage_rule(rid, int(edit_cmin), edit_note, edit_active)
+                                st.success(f"Kural #{rid} güncellendi.")
+                                st.rerun()
+                        with a2:
+                            toggle_label = "Pasife Al" if is_active else "Aktif Yap"
+                            if st.button(toggle_label, key=f"rule_toggle_{rid}"):
+                                set_rule_active(rid, not is_active)
+                                st.rerun()
+                        with a3:
+                            if st.button("Sil", key=f"rule_delete_{rid}"):
+                                delete_rule(rid)
+                                st.rerun()
+                    continue
+                if rule_kind == "REST":
+                    with st.expander(f'#{rid} | en az {r["rest_hours"]} saat dinlenme | {status_label}'):
+                        edit_rest = st.number_input(
+                            "En az dinlenme (saat)", min_value=1, max_value=48, value=max(1, int(r["rest_hours"])),
+                            step=1, key=f"rule_rest_{rid}",
+                        )
+                        edit_note = st.text_input("Açıklama", value=r.get("note", "") or "", key=f"rule_note_{rid}")
+                        edit_active = st.checkbox("Aktif", value=is_active, key=f"rule_active_{rid}")
+
+                        a1, a2, a3 = st.columns([1, 1, 1])
+                        with a1:
+                            if st.button("Kaydet", key=f"rule_save_{rid}", type="primary"):
+                                update_rest_rule(rid, int(edit_rest), edit_note, edit_active)
+                                st.success(f"Kural #{rid} güncellendi.")
+                                st.rerun()
+                        with a2:
+                            toggle_label = "Pasife Al" if is_active else "Aktif Yap"
+                            if st.button(toggle_label, key=f"rule_toggle_{rid}"):
+                                set_rule_active(rid, not is_active)
+                                st.rerun()
+                        with a3:
+                            if st.button("Sil", key=f"rule_delete_{rid}"):
+                                delete_rule(rid)
+                                st.rerun()
+                    continue
+                if rule_kind != "TRANSITION":
+                    if rule_kind == "CONSECUTIVE":
+                        what = f'en fazla {r["max_count"]} gün üst üste {r["next_type"]}'
+                    else:
+                        what = f'{r["window_days"]} günde en fazla {r["max_count"]} {r["next_type"]}'
+                    with st.expander(f"#{rid} | {what} | {status_label}"):
+                        c1, c2, c3 = st.columns(3)
+                        with c1:
+                            edit_wtype = st.selectbox(
+                                "Vardiya",
+                                rule_next_opts,
+                                index=rule_next_opts.index(r["next_type"]) if r["next_type"] in rule_next_opts else 0,
+                                key=f"rule_wtype_{rid}",
+                            )
+                        with c2:
+                            edit_wmax = st.number_input(
+                                "En fazla (N)", min_value=1, max_value=31, value=max(1, int(r["max_count"])),
+                                step=1, key=f"rule_wmax_{rid}",
+                            )
+                        with c3:
+                            edit_wdays = st.number_input(
+                                "Pencere (K gün)", min_value=2, max_value=31, value=max(2, int(r["window_days"])),
+                                step=1, key=f"rule_wdays_{rid}", disabled=rule_kind == "CONSECUTIVE",
+                            )
+                        edit_note = st.text_input("Açıklama", value=r.get("note", "") or "", key=f"rule_note_{rid}")
+                        edit_active = st.checkbox("Aktif", value=is_active, key=f"rule_active_{rid}")
+
+                        a1, a2, a3 = st.columns([1, 1, 1])
+                        with a1:
+                            if st.button("Kaydet", key=f"rule_save_{rid}", type="primary"):
+                                update_window_rule(rid, edit_wtype, int(edit_wmax), int(edit_wdays), edit_note, edit_active)
+                                st.success(f"Kural #{rid} güncellendi.")
+                                st.rerun()
+                        with a2:
+                            toggle_label = "Pasife Al" if is_active else "Aktif Yap"
+                            if st.button(toggle_label, key=f"rule_toggle_{rid}"):
+                                set_rule_active(rid, not is_active)
+                                st.rerun()
+                        with a3:
+                            if st.button("Sil", key=f"rule_delete_{rid}"):
+                                delete_rule(rid)
+                                st.rerun()
+                    continue
                 title = (
                     f'#{rid} | {r["prev_type"]} -> {r["next_type"]} | '
                     f'{r.get("apply_day","ANY")} | {status_label}'
@@ -1012,6 +1246,51 @@ with tab_rules:
                             delete_rule(rid)
                             st.rerun()
 
+        # --- Vardiya ihtiyacı (kişi sayısı) ---
+        st.markdown("---")
+        st.markdown("### 👥 Vardiya İhtiyacı (kişi sayısı)")
+        st.caption("Hafta içine denk gelen resmi tatiller HOLIDAY desenini kullanır; hafta sonu tatilleri WEEKEND.")
+        demand_rows = list_demand()
+        d_cols = st.columns(max(1, len(demand_rows)))
+        for col, r in zip(d_cols, demand_rows):
+            with col:
+                new_count = st.number_input(
+                    f"{r['day_kind']} / {r['shift_type']}",
+                    min_value=0, max_value=500, value=int(r["count"]), step=1,
+                    key=f"demand_{r['day_kind']}_{r['shift_type']}",
+                )
+                if int(new_count) != int(r["count"]):
+                    set_demand(r["day_kind"], r["shift_type"], int(new_count))
+
+        # --- Vardiya tipleri (kayıt) ---
+        st.markdown("---")
+        st.markdown("### 🕒 Vardiya Tipleri")
+        st.caption("Saat, başlangıç/bitiş ve renk planlama, çizelge ve Excel çıktısında kullanılır. Bitiş başlangıçtan küçükse ertesi gün biter.")
+        st.dataframe(pd.DataFrame(list_shift_types()), width="stretch")
+        with st.form("shift_type_form", clear_on_submit=True):
+            t1, t2, t3, t4, t5 = st.columns(5)
+            with t1:
+                st_code = st.text_input("Kod", key="st_code", placeholder="Örn: EVENING")
+            with t2:
+                st_hours = st.number_input("Saat", min_value=1, max_value=48, value=8, step=1, key="st_hours")
+            with t3:
+                st_start = st.text_input("Başlangıç (HH:MM)", value="08:00", key="st_start")
+            with t4:
+                st_end = st.text_input("Bitiş (HH:MM)", value="16:00", key="st_end")
+            with t5:
+                st_color = st.color_picker("Renk", value="#000000", key="st_color")
+            st_submit = st.form_submit_button("Kaydet / Güncelle")
+        if st_submit and st_code.strip():
+            upsert_shift_type(st_code, int(st_hours), st_start.strip(), st_end.strip(), st_color)
+            set_shift_types(list_shift_types())
+            st.success(f"Vardiya tipi kaydedildi: {st_code.strip().upper()}")
+            st.rerun()
+        del_code = st.selectbox("Silinecek tip", [""] + list(shift_registry().names), key="st_delete_code")
+        if del_code and st.button("Tipi sil", key="st_delete_btn"):
+            delete_shift_type(del_code)
+            set_shift_types(list_shift_types())
+            st.rerun()
+
 with tab_plan:
     try:
         # (DEBUG) role/staff_id
@@ -1092,6 +1371,7 @@ with tab_plan:
                             cell_staff.setdefault(key, stype)
 
                     matrix_rows_staff = []
+                    cell_color_staff = {}
                     visible_staff_ids = sorted({int(x) for x in df["staff_id"].dropna().astype(int).tolist()}) if "staff_id" in df.columns else [int(sid)]
                     for staff_val in visible_staff_ids:
                         row = {"Personel": staff_name_by_id_staff.get(int(staff_val), f"ID:{staff_val}"), "ID": int(staff_val)}
@@ -1104,14 +1384,9 @@ with tab_plan:
                                 row[dcol] = "İ"
                                 continue
                             stype = cell_staff.get((int(staff_val), d_iso), "")
-                            if stype.startswith("DAY"):
-                                row[dcol] = "8"
-                            elif stype.startswith("NIGHT"):
-                                row[dcol] = "16"
-                            elif stype.startswith("D24"):
-                                row[dcol] = "24"
-                            else:
-                                row[dcol] = ""
+                            row[dcol] = _cell_hours_text(stype)
+                            if row[dcol]:
+                                cell_color_staff[(int(staff_val), dcol)] = shift_registry().color_of(_cell_shift(stype))
                         matrix_rows_staff.append(row)
 
                     df_matrix_staff = pd.DataFrame(matrix_rows_staff)
@@ -1122,7 +1397,6 @@ with tab_plan:
                             set(list_holidays()),
                         )
                         min_required_hours_staff = weekday_count_staff * 8
-                        HOURS_MAP = {"DAY": 8, "NIGHT": 16, "D24": 24}
                         worked_staff = {int(staff_val): 0 for staff_val in visible_staff_ids}
                         for rr in rows:
                             row_dict = dict(rr) if not isinstance(rr, dict) else rr
@@ -1132,15 +1406,7 @@ with tab_plan:
                             if staff_val is None:
                                 continue
                             staff_val = int(staff_val)
-                            stype = str(row_dict.get("shift_type") or "")
-                            for part in stype.split("+"):
-                                part = part.strip()
-                                if part.startswith("DAY"):
-                                    worked_staff[staff_val] = worked_staff.get(staff_val, 0) + HOURS_MAP["DAY"]
-                                elif part.startswith("NIGHT"):
-                                    worked_staff[staff_val] = worked_staff.get(staff_val, 0) + HOURS_MAP["NIGHT"]
-                                elif part.startswith("D24"):
-                                    worked_staff[staff_val] = worked_staff.get(staff_val, 0) + HOURS_MAP["D24"]
+                            worked_staff[staff_val] = worked_staff.get(staff_val, 0) + _worked_hours(row_dict.get("shift_type"))
 
                         from datetime import date as _date
                         holiday_set_staff = set(list_holidays())
@@ -1172,13 +1438,15 @@ with tab_plan:
                         df_matrix_staff["GerekliMesaiSaati"] = df_matrix_staff["ID"].map(lambda x: int(required_hours_staff.get(int(x), min_required_hours_staff)))
                         df_matrix_staff["ToplamMesaiSaati"] = df_matrix_staff["ID"].map(lambda x: int(worked_staff.get(int(x), 0)))
                         df_matrix_staff["MesaiFarki"] = df_matrix_staff["ToplamMesaiSaati"] - df_matrix_staff["GerekliMesaiSaati"]
+                        caps_staff = staff_max_hours(only_active=False)
+                        df_matrix_staff["AzamiMesaiSaati"] = df_matrix_staff["ID"].map(lambda x: caps_staff.get(int(x), ""))
+                        df_matrix_staff["FazlaMesai"] = df_matrix_staff["ID"].map(
+                            lambda x: max(0, int(worked_staff.get(int(x), 0)) - caps_staff[int(x)]) if int(x) in caps_staff else 0
+                        )
                         df_matrix_staff["Not"] = df_matrix_staff["ID"].map(lambda x: note_staff.get(int(x), ""))
                         df_matrix_staff = df_matrix_staff.sort_values(["ID"]).reset_index(drop=True)
 
                         st.markdown("#### 📊 Aylık Çizelge")
-                        COLOR_DAY = "#2F75B5"
-                        COLOR_NIGHT = "#C9A100"
-                        COLOR_D24 = "#2E8B57"
                         COLOR_BLOCK = "#C00000"
                         COLOR_POSITIVE = "#1F7A3D"
                         COLOR_NEGATIVE = "#C00000"
@@ -1188,12 +1456,9 @@ with tab_plan:
                             for c in day_cols_staff:
                                 for i in data.index:
                                     v = str(data.loc[i, c] or "")
-                                    if v == "8":
-                                        styles.loc[i, c] = f"color: {COLOR_DAY};"
-                                    elif v == "16":
-                                        styles.loc[i, c] = f"color: {COLOR_NIGHT};"
-                                    elif v == "24":
-                                        styles.loc[i, c] = f"color: {COLOR_D24};"
+                                    color = cell_color_staff.get((int(data.loc[i, "ID"]), c))
+                                    if color:
+                                        styles.loc[i, c] = f"color: {color};"
                                     elif v in ("R", "İ"):
                                         styles.loc[i, c] = f"color: {COLOR_BLOCK};"
                             if "MesaiFarki" in data.columns:
@@ -1209,7 +1474,7 @@ with tab_plan:
                             return styles
 
                         df_matrix_staff = df_matrix_staff[
-                            ["Personel", "ID"] + day_cols_staff + ["GerekliMesaiSaati", "ToplamMesaiSaati", "MesaiFarki", "Not"]
+                            ["Personel", "ID"] + day_cols_staff + ["GerekliMesaiSaati", "ToplamMesaiSaati", "MesaiFarki", "AzamiMesaiSaati", "FazlaMesai", "Not"]
                         ]
                         st.dataframe(df_matrix_staff.style.apply(style_staff_matrix, axis=None), width="stretch", height=420)
                     else:
@@ -1218,10 +1483,9 @@ with tab_plan:
 
                     # Kendi toplam saat
                     try:
-                        from src.scheduler import SHIFT_HOURS
                         my = df[df["staff_id"].astype(int) == int(sid)].copy() if "staff_id" in df.columns else pd.DataFrame()
                         if not my.empty and "shift_type" in my.columns:
-                            my["Saat"] = my["shift_type"].map(lambda x: int(SHIFT_HOURS.get(str(x), 8)))
+                            my["Saat"] = my["shift_type"].map(_worked_hours)
                             total = int(my["Saat"].sum())
                             st.success(f"👤 Senin toplam çalışma saatin: **{total}** saat")
                         else:
@@ -1333,10 +1597,11 @@ with tab_plan:
                     staff_ids = [int(r["id"]) for r in staff_rows]
                     staff_name_by_id = {int(r["id"]): r["full_name"] for r in staff_rows}
     
-                    required = build_required_shifts(int(year), int(month))
-                    st.caption(f"Bu ay toplam slot: **{len(required)}** (hafta içi 24 kişi/gün, hafta sonu 12 kişi/gün)")
-
                     holiday_set = set(list_holidays())
+                    demand = list_demand()
+                    required = build_required_shifts(int(year), int(month), demand, holiday_set)
+                    st.caption(f"Bu ay toplam slot: **{len(required)}** (ihtiyaç deseni: Kurallar sekmesi)")
+
                     weekday_count = count_weekdays_excluding_holidays(int(year), int(month), holiday_set)
                     min_required_hours = weekday_count * 8
                     st.info(f"Hard kural: Her çalışan en az **{min_required_hours} saat** çalışmalı.")
@@ -1473,6 +1738,8 @@ with tab_plan:
     
                         if deficits:
                             st.warning("Min saat altinda kalan ID: " + ", ".join(str(x) for x in deficits))
+                        if summary.get("overtime_hours"):
+                            st.caption(f"Üst sınırları aşan toplam fazla mesai: {summary['overtime_hours']} saat")
     
                         if violations:
                             import pandas as pd
@@ -1482,7 +1749,50 @@ with tab_plan:
                             st.caption("Ihlal listesi: bos")
     
     
-                    if st.button("Plan Üret (Hard min)", type="primary", key="plan_btn"):
+                    scarcity_first = st.checkbox(
+                        "En kısıtlı günleri önce doldur (izin yoğun günler)",
+                        value=False,
+                        key="plan_scarcity_first",
+                        help="Doldurma en az adayı kalan günden başlar ve komşu günlere doğru ilerler; "
+                             "gün içinde en kısıtlı vardiya önce dolar.",
+                    )
+                    hours_first = st.checkbox(
+                        "Adayları saat hedefine göre seç (D24 = 3 DAY; repair'e az iş kalır)",
+                        value=False,
+                        key="plan_hours_first",
+                    )
+                    use_ledger = st.checkbox(
+                        "Geçmiş aylara göre dengele (hafta sonu / gece / bayram / saat defteri)",
+                        value=True,
+                        key="plan_use_ledger",
+                    )
+                    improve_seconds = st.number_input(
+                        "İyileştirme süresi (sn, 0 = kapalı)",
+                        min_value=0.0, max_value=30.0, value=0.0, step=0.5,
+                        key="plan_improve_seconds",
+                    )
+                    time_limit_s = st.number_input(
+                        "Süre sınırı (sn, 0 = sınırsız)",
+                        min_value=0.0, max_value=600.0, value=60.0, step=5.0,
+                        key="plan_time_limit_s",
+                        help="Süre dolarsa o ana kadarki en iyi plan kaydedilir.",
+                    )
+                    warm_start = st.checkbox(
+                        "Kayıtlı planı başlangıç al (warm start)",
+                        value=False,
+                        key="plan_warm_start",
+                        help="Kayıtlı atamalar korunur; sadece eksik slotlar ve min saat dengesi çözülür.",
+                    )
+                    warm_locked_staff = []
+                    if warm_start:
+                        warm_locked_staff = st.multiselect(
+                            "Vardiyaları kilitlenecek personel (taşınmaz)",
+                            staff_ids,
+                            format_func=lambda x: staff_name_by_id.get(x, str(x)),
+                            key="plan_warm_locked",
+                        )
+                    def _plan_inputs():
+                        """Plan Üret ve pencereli yeniden plan için ortak girdiler (güncel rapor/izin/istekler)."""
                         blocked_any, blocked_type, soft_avoid = build_blocked_days_with_type(int(year), int(month))
     
                         # kişi-bazlı min saat: rapor/izin (hafta içi) kadar 8 saat düş
@@ -1505,12 +1815,90 @@ with tab_plan:
     
                             off_weekday[sid] = cnt
                         min_by_staff = {sid: max(0, int(min_required_hours) - off_weekday.get(sid,0)*8) for sid in staff_ids}
-                        assignments, unfilled, unfilled_debug, hours, swaps = generate_schedule_hard_min_hours(
+                        spec = ProblemSpec.from_inputs(
                             int(year), int(month), staff_ids, blocked_any, min_by_staff,
                             transition_rules=transition_rules,
                             blocked_type=blocked_type,
-                            soft_avoid=soft_avoid
+                            soft_avoid=soft_avoid,
+                            holidays=holiday_set_local,
+                            # ay sınırı: önceki ayın son gün(ler)i (31'i NIGHT -> 1'i DAY,
+                            # pencere kuralları için K-1 gün)
+                            boundary=list_days_before(int(year), int(month), rule_lookback_days(transition_rules)),
+                            demand=demand,
+                            skills=staff_skill_masks(),
+                            max_hours=staff_max_hours(),
+                            overtime_budget=get_overtime_budget(),
+                            # önceki ayların toplamları: defterden tek sorgu
+                            ledger=ledger_totals(int(year), int(month)) if use_ledger else None,
+                        )
+                        return spec, blocked_any, blocked_type, min_by_staff
+
+                    if st.button("Plan Üret (Hard min)", type="primary", key="plan_btn"):
+                        spec, blocked_any, blocked_type, min_by_staff = _plan_inputs()
+
+                        # --- Ön kontrol: yapısal olarak dolamayacak günler (çözümden önce) ---
+                        impossible_days = find_impossible_days(
+                            int(year), int(month), staff_ids, blocked_any,
+                            transition_rules=transition_rules, blocked_type=blocked_type,
+                            boundary=list(spec.boundary),
+                            demand=list(spec.demand),
+                            holidays=spec.holidays,
                         )
+                        if impossible_days:
+                            missing_min = sum(d["missing_min"] for d in impossible_days)
+                            st.warning(
+                                f"Ön kontrol: {len(impossible_days)} günde ihtiyaç karşılanamaz "
+                                f"(en az {missing_min} slot boş kalacak — izin/rapor yoğunluğu)."
+                            )
+                            with st.expander("Karşılanamayan günler"):
+                                import pandas as pd
+                                st.dataframe(pd.DataFrame([
+                                    {
+                                        "Tarih": d["date"],
+                                        "İhtiyaç": d["need"],
+                                        "Müsait kişi": d["available_staff"],
+                                        "En fazla dolar": d["max_fillable"],
+                                        "En az boş": d["missing_min"],
+                                    }
+                                    for d in impossible_days
+                                ]), width="stretch")
+
+                        _phase_tr = {"greedy": "Atama", "repair": "Min saat dengeleme", "improve": "İyileştirme", "done": "Bitti"}
+                        progress_bar = st.progress(0.0, text="Plan hazırlanıyor...")
+
+                        def _on_progress(ev):
+                            frac = (ev.slots_filled / ev.slots_total) if ev.slots_total else 0.0
+                            txt = f"{_phase_tr.get(ev.phase, ev.phase)} — dolan slot {ev.slots_filled}/{ev.slots_total}"
+                            if ev.deficit_hours is not None:
+                                txt += f" | min saat açığı: {ev.deficit_hours}"
+                            if ev.best_objective is not None:
+                                txt += f" | skor: {ev.best_objective:.0f}"
+                            progress_bar.progress(min(1.0, frac), text=txt)
+
+                        saved_rows = list_month(int(year), int(month)) if warm_start else []
+                        if saved_rows:
+                            locked_set = set(warm_locked_staff)
+                            result = solve_warm(
+                                spec,
+                                [(r["date"], r["shift_type"], int(r["staff_id"]), int(r["staff_id"]) in locked_set) for r in saved_rows],
+                                slot_order="scarcity" if scarcity_first else "calendar",
+                                score_mode="hours" if hours_first else "count",
+                                improve_seconds=float(improve_seconds),
+                            )
+                            from_cache = False
+                        else:
+                            result, from_cache = solve_cached(
+                                spec,
+                                time_limit_s=float(time_limit_s) if time_limit_s else None,
+                                on_progress=_on_progress,
+                                slot_order="scarcity" if scarcity_first else "calendar",
+                                score_mode="hours" if hours_first else "count",
+                                improve_seconds=float(improve_seconds),
+                            )
+                        if from_cache:
+                            progress_bar.progress(1.0, text="Girdiler değişmemiş: plan önbellekten alındı")
+                        assignments, unfilled, unfilled_debug = result.assignments, result.unfilled, result.unfilled_debug
+                        hours, swaps = result.hours, result.swaps
     
                         # --- VALIDATION hesapla (kalıcı) ---
                         try:
@@ -1521,7 +1909,13 @@ with tab_plan:
                                 blocked_any,
                                 min_required_hours,
                                 transition_rules=transition_rules,
-                                blocked_type=blocked_type
+                                blocked_type=blocked_type,
+                                boundary=list(spec.boundary),
+                                skills=spec.skills,
+                                max_hours=spec.max_hours,
+                                overtime_budget=spec.overtime_budget,
+                                day_table=spec.day_table(),
+                                demand=list(spec.demand),
                             )
                             st.session_state["last_validation"] = {
                                 "summary": v_summary,
@@ -1541,10 +1935,10 @@ with tab_plan:
                             pass
     
     
-                        clear_month(int(year), int(month))
                         if assignments and isinstance(assignments[0], (tuple, list)):
                             assignments = [{"date": a[0], "shift_type": a[1], "staff_id": a[2]} for a in assignments]
-                        insert_assignments(assignments)
+                        # ay + adil dağılım defteri tek transaction
+                        replace_month(int(year), int(month), assignments)
     
                         st.markdown("---")
     
@@ -1564,7 +1958,146 @@ with tab_plan:
                             st.success(f"Plan kaydedildi ✅ (Dengeleme swap sayısı: {swaps})")
     
                         st.rerun()
-    
+
+                    # ================== 🔁 Pencereli Yeniden Planlama ==================
+                    saved_rows = list_month(int(year), int(month))
+                    if saved_rows:
+                        with st.expander("🔁 Pencereli yeniden planla (ay ortası rapor/izin)"):
+                            saved_plan = [(r["date"], r["shift_type"], int(r["staff_id"])) for r in saved_rows]
+                            month_days = [d.iso for d in iter_month_days(int(year), int(month))]
+                            plan_sig = ((int(year), int(month)), hash(tuple(saved_plan)))
+                            # girdiler DB'den okunup ay doğrulanır: her yeniden çizimde değil, istenince çalışır
+                            if st.button("Güncel rapor/izinle çakışmaları bul", key="replan_check_btn"):
+                                spec_now, _blocked_now, _blocked_type_now, _min_now = _plan_inputs()
+                                suggested = conflict_days(spec_now, saved_plan)
+                                st.session_state["replan_conflicts"] = {"plan": plan_sig, "days": suggested}
+                                st.session_state["replan_days"] = suggested
+                            checked = st.session_state.get("replan_conflicts")
+                            if not checked:
+                                st.caption("Çakışmalar henüz kontrol edilmedi.")
+                            elif checked["plan"] != plan_sig:
+                                st.caption("Kayıtlı plan ya da ay değişti; çakışmaları yeniden kontrol edin.")
+                            elif checked["days"]:
+                                st.warning(f"Kayıtlı plan güncel rapor/izin kayıtlarıyla {len(checked['days'])} günde çakışıyor.")
+                            else:
+                                st.caption("Kayıtlı planda çakışan gün yok.")
+                            # ay değiştiyse önceki seçimden sadece bu ayın günleri kalır
+                            st.session_state["replan_days"] = [d for d in st.session_state.get("replan_days", []) if d in month_days]
+                            replan_days = st.multiselect("Yeniden çözülecek günler", month_days, key="replan_days")
+                            replan_radius = st.number_input(
+                                "Pencere (± gün)", min_value=0, max_value=7, value=1, step=1,
+                                key="replan_radius",
+                                help="1: bir önceki/sonraki gün de çözülür (geçiş kuralları için önerilir).",
+                            )
+                            if st.button("Sadece bu günleri yeniden planla", key="replan_btn", disabled=not replan_days):
+                                spec_now, blocked_now, blocked_type_now, _min_now = _plan_inputs()
+                                result, window_days = replan_window(
+                                    spec_now, saved_plan, replan_days,
+                                    radius=int(replan_radius),
+                                    slot_order="scarcity" if scarcity_first else "calendar",
+                                    score_mode="hours" if hours_first else "count",
+                                )
+                                in_window = set(window_days)
+                                replace_days(window_days, [
+                                    {"date": d, "shift_type": t, "staff_id": sid}
+                                    for d, t, sid in result.assignments if d in in_window
+                                ])
+                                v_summary, v_violations, v_deficits = validate_assignments(
+                                    int(year), int(month), result.assignments, staff_ids, blocked_now,
+                                    min_required_hours,
+                                    transition_rules=transition_rules,
+                                    blocked_type=blocked_type_now,
+                                    boundary=list(spec_now.boundary),
+                                    skills=spec_now.skills,
+                                    max_hours=spec_now.max_hours,
+                                    overtime_budget=spec_now.overtime_budget,
+                                    day_table=spec_now.day_table(),
+                                    demand=list(spec_now.demand),
+                                )
+                                st.session_state["last_validation"] = {
+                                    "summary": v_summary,
+                                    "violations": v_violations,
+                                    "deficits": v_deficits,
+                                    "unfilled_count": len(result.unfilled),
+                                }
+                                st.session_state["last_unfilled"] = result.unfilled
+                                st.session_state["last_unfilled_debug"] = result.unfilled_debug
+                                st.session_state["last_unfilled_year"] = int(year)
+                                st.session_state["last_unfilled_month"] = int(month)
+                                changed = len(set(saved_plan) ^ set(result.assignments)) // 2
+                                st.success(f"{len(window_days)} gün yeniden planlandı, yaklaşık {changed} atama değişti ✅")
+                                st.rerun()
+
+                    # ================== 📆 Çok Aylı Plan (Çeyrek) ==================
+                    with st.expander("📆 Çok aylı plan (çeyrek)"):
+                        st.caption(
+                            "Seçili aydan başlayarak birden çok ay tek seferde çözülür: "
+                            "saat ve hafta sonu dengesi tüm dönem için kurulur, ay geçişleri de kontrol edilir."
+                        )
+                        horizon_n = st.number_input("Ay sayısı", min_value=2, max_value=12, value=3, step=1, key="horizon_n")
+                        if st.button("Dönemi planla", key="horizon_btn"):
+                            h_start, h_end = horizon_range(int(year), int(month), int(horizon_n))
+                            # tüm dönem için tek okuma (ay başına ayrı sorgu yok)
+                            h_blocked, h_blocked_type, h_soft = build_blocked_days_for_range(h_start.isoformat(), h_end.isoformat())
+                            h_holidays = set(list_holidays())
+                            from datetime import date as _date
+                            off_weekday = {}
+                            for sid in staff_ids:
+                                for d_iso, t in (h_blocked_type.get(sid, {}) or {}).items():
+                                    d_iso = str(d_iso)[:10]
+                                    if t not in ('rapor', 'yillik_izin') or d_iso in h_holidays:
+                                        continue
+                                    try:
+                                        dt = _date.fromisoformat(d_iso)
+                                    except Exception:
+                                        continue
+                                    if h_start <= dt < h_end and dt.weekday() < 5:
+                                        ym = (dt.year, dt.month)
+                                        off_weekday[(ym, sid)] = off_weekday.get((ym, sid), 0) + 1
+                            min_by_month = {}
+                            d_cur = h_start
+                            while d_cur < h_end:
+                                ym = (d_cur.year, d_cur.month)
+                                month_min = count_weekdays_excluding_holidays(ym[0], ym[1], h_holidays) * 8
+                                min_by_month[ym] = {sid: max(0, month_min - off_weekday.get((ym, sid), 0) * 8) for sid in staff_ids}
+                                d_cur = (d_cur.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+                            with st.spinner("Dönem planlanıyor..."):
+                                h_res = solve_horizon(
+                                    int(year), int(month), int(horizon_n), staff_ids, h_blocked, min_by_month,
+                                    transition_rules=transition_rules,
+                                    blocked_type=h_blocked_type,
+                                    soft_avoid=h_soft,
+                                    holidays=h_holidays,
+                                    boundary=list_days_before(int(year), int(month), rule_lookback_days(transition_rules)),
+                                    slot_order="scarcity" if scarcity_first else "calendar",
+                                    score_mode="hours" if hours_first else "count",
+                                    improve_seconds=float(improve_seconds),
+                                    demand=demand,
+                                    skills=staff_skill_masks(),
+                                    max_hours=staff_max_hours(),
+                                    overtime_budget=get_overtime_budget(),
+                                    ledger=ledger_totals(int(year), int(month)) if use_ledger else None,
+                                )
+                            # tüm aylar tek transaction: biri yazılamazsa hiçbiri değişmez
+                            replace_range(h_start.isoformat(), h_end.isoformat(), [
+                                {"date": d, "shift_type": t, "staff_id": sid} for d, t, sid in h_res.result.assignments
+                            ])
+                            st.success(
+                                f"{len(h_res.months)} ay kaydedildi ✅ (dolmayan slot: {len(h_res.result.unfilled)}, "
+                                f"dengeleme swap: {h_res.result.swaps})"
+                            )
+                            st.dataframe(pd.DataFrame([
+                                {
+                                    "Personel": staff_name_by_id.get(sid, str(sid)),
+                                    **{f"{y}-{m:02d} saat": h_res.hours_by_month[(y, m)].get(sid, 0) for y, m in h_res.months},
+                                    "Toplam saat": h_res.result.hours.get(sid, 0),
+                                    "Hedef": sum(min_by_month[ym].get(sid, 0) for ym in h_res.months),
+                                    "Hafta sonu": h_res.weekends.get(sid, 0),
+                                }
+                                for sid in staff_ids
+                            ]), width="stretch")
+
                     st.markdown("---")
     
                     # ================== 🚫 Dolmayan Slotlar (Neden Raporu) ==================
@@ -1587,12 +2120,23 @@ with tab_plan:
                             # Debug varsa özet tablo
                             if last_debug:
                                 df_unfilled = pd.DataFrame(last_debug)
-                                g = df_unfilled.groupby(["date", "shift_type"], as_index=False).agg({
+                                agg = {
                                     "need": "sum",
                                     "assigned": "sum",
                                     "missing": "sum",
                                     "reason": "first",
-                                }).sort_values(["date", "shift_type"])
+                                }
+                                if "root_cause" in df_unfilled.columns:  # eski önbellek kayıtlarında yok
+                                    agg["fixable"] = "sum"
+                                    agg["root_cause"] = lambda x: ", ".join(f"{k}:{v}" for k, v in x.value_counts().items())
+                                g = df_unfilled.groupby(["date", "shift_type"], as_index=False).agg(agg).sort_values(["date", "shift_type"])
+                                fixable_total = int(g["fixable"].sum()) if "fixable" in g.columns else 0
+                                if fixable_total:
+                                    st.caption(
+                                        f"{fixable_total} slot farklı bir atamayla dolabilirdi "
+                                        "(GUN_ICI_DEGISIMLE_DOLAR / ONCEKI_ATAMALAR_TUKETTI); "
+                                        "kalanında kimse müsait değil."
+                                    )
     
                                 st.dataframe(g, width="stretch", height=320)
                                 st.download_button(
@@ -1727,6 +2271,7 @@ with tab_plan:
                         ).sort_values(["ID"]).reset_index(drop=True)
     
                         matrix_rows = []
+                        cell_color = {}
                         for _, rr in staff_df.iterrows():
                             sid = int(rr["ID"])
                             row = {"Personel": rr["Personel"], "ID": sid}
@@ -1741,14 +2286,9 @@ with tab_plan:
                                     continue
     
                                 stype = cell.get((sid, d_iso), "")
-                                if stype.startswith("DAY"):
-                                    row[dcol] = "8"
-                                elif stype.startswith("NIGHT"):
-                                    row[dcol] = "16"
-                                elif stype.startswith("D24"):
-                                    row[dcol] = "24"
-                                else:
-                                    row[dcol] = ""
+                                row[dcol] = _cell_hours_text(stype)
+                                if row[dcol]:
+                                    cell_color[(sid, dcol)] = shift_registry().color_of(_cell_shift(stype))
                             matrix_rows.append(row)
     
                         df_matrix = pd.DataFrame(matrix_rows)
@@ -1769,8 +2309,6 @@ with tab_plan:
     
                         min_required_hours = weekday_count * 8
     
-                        HOURS_MAP = {"DAY": 8, "NIGHT": 16, "D24": 24}
-    
                         worked = {sid: 0 for sid in staff_ids}
                         for rr in rows:
                             sid = rr.get("staff_id")
@@ -1780,16 +2318,7 @@ with tab_plan:
                                 continue
                             sid = int(sid)
     
-                            stype = (rr.get("shift_type") or "")
-                            parts = str(stype).split("+")
-                            for part in parts:
-                                part = part.strip()
-                                if part.startswith("DAY"):
-                                    worked[sid] += HOURS_MAP["DAY"]
-                                elif part.startswith("NIGHT"):
-                                    worked[sid] += HOURS_MAP["NIGHT"]
-                                elif part.startswith("D24"):
-                                    worked[sid] += HOURS_MAP["D24"]
+                            worked[sid] += _worked_hours(rr.get("shift_type"))
     
                         # kişi-bazlı MinSaat (çizelge): rapor/izin hafta içi gün * 8 düş
                         from datetime import date as _date
@@ -1812,14 +2341,17 @@ with tab_plan:
                         df_matrix["GerekliMesaiSaati"] = df_matrix["ID"].map(lambda x: int(min_by_staff_matrix.get(int(x), min_required_hours)))
                         df_matrix["ToplamMesaiSaati"] = df_matrix["ID"].map(lambda x: worked.get(int(x), 0))
                         df_matrix["MesaiFarki"] = df_matrix["ToplamMesaiSaati"] - df_matrix["GerekliMesaiSaati"]
+                        # üst sınır + sınırı aşan (fazla mesai havuzundan düşen) saat
+                        caps_matrix = staff_max_hours(only_active=False)
+                        df_matrix["AzamiMesaiSaati"] = df_matrix["ID"].map(lambda x: caps_matrix.get(int(x), ""))
+                        df_matrix["FazlaMesai"] = df_matrix["ID"].map(
+                            lambda x: max(0, worked.get(int(x), 0) - caps_matrix[int(x)]) if int(x) in caps_matrix else 0
+                        )
                         df_matrix = df_matrix.sort_values(["ID"]).reset_index(drop=True)
 
-                        ordered_cols = ["Personel", "ID"] + day_cols + ["GerekliMesaiSaati", "ToplamMesaiSaati", "MesaiFarki", "Not"]
+                        ordered_cols = ["Personel", "ID"] + day_cols + ["GerekliMesaiSaati", "ToplamMesaiSaati", "MesaiFarki", "AzamiMesaiSaati", "FazlaMesai", "Not"]
                         df_matrix = df_matrix[ordered_cols]
     
-                        COLOR_DAY   = "#2F75B5"
-                        COLOR_NIGHT = "#C9A100"
-                        COLOR_D24   = "#2E8B57"
                         COLOR_BLOCK = "#C00000"
                         COLOR_POSITIVE = "#1F7A3D"
                         COLOR_NEGATIVE = "#C00000"
@@ -1829,12 +2361,9 @@ with tab_plan:
                             for c in day_cols:
                                 for i in data.index:
                                     v = str(data.loc[i, c] or "")
-                                    if v == "8":
-                                        styles.loc[i, c] = f"color: {COLOR_DAY};"
-                                    elif v == "16":
-                                        styles.loc[i, c] = f"color: {COLOR_NIGHT};"
-                                    elif v == "24":
-                                        styles.loc[i, c] = f"color: {COLOR_D24};"
+                                    color = cell_color.get((int(data.loc[i, "ID"]), c))
+                                    if color:
+                                        styles.loc[i, c] = f"color: {color};"
                                     elif v in ("R", "İ"):
                                         styles.loc[i, c] = f"color: {COLOR_BLOCK};"
                             if "MesaiFarki" in data.columns:
@@ -1861,9 +2390,17 @@ with tab_plan:
                             key="dl_matrix_csv"
                         )
     
-                        xlsx_bytes = export_schedule_xlsx(df_matrix, year=int(year), month=int(month))
+                        # Excel'de de aynı vardiya / rapor-izin renkleri
+                        xlsx_colors = {}
+                        for pos, (sid_x, row_x) in enumerate(zip(df_matrix["ID"].tolist(), df_matrix.to_dict("records"))):
+                            for c in day_cols:
+                                color = cell_color.get((int(sid_x), c))
+                                if not color and row_x.get(c) in ("R", "İ"):
+                                    color = COLOR_BLOCK
+                                if color:
+                                    xlsx_colors[(pos, c)] = color
                         st.download_button("📊 Excel indir (.xlsx)",
-                                data=export_schedule_xlsx(df_matrix, int(year), int(month), sheet_name='Cizelge'),
+                                data=export_schedule_xlsx(df_matrix, int(year), int(month), sheet_name='Cizelge', cell_colors=xlsx_colors),
                                 file_name=f"cizelge_{int(year)}_{int(month):02d}.xlsx",
                                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                                 key="dl_matrix_xlsx"
@@ -1,5 +1,7 @@
 import sqlite3
-from typing import List, Dict
+from typing import List, Dict, Tuple
+
+from src.ledger_repo import ensure_ledger_table, refresh_ledger
 
 def _connect():
     try:
@@ -19,6 +21,8 @@ def ensure_assignments_table():
             staff_id INTEGER NOT NULL
         )
     """)
+    # ay / ay sınırı aralık sorguları (date >= ? AND date < ?) için
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_assignments_date ON assignments(date)")
     conn.commit()
     return conn
 
@@ -30,23 +34,38 @@ def clear_month(year: int, month: int):
     else:
         end = date(year, month + 1, 1).isoformat()
 
-    conn = ensure_assignments_table()
+    conn = ensure_ledger_table()
     cur = conn.cursor()
     cur.execute("DELETE FROM assignments WHERE date >= ? AND date < ?", (start, end))
+    refresh_ledger(cur, start, start)
     conn.commit()
 
 def insert_assignments(assignments: List[Dict]):
     """
     assignments: [{"date":"YYYY-MM-DD","shift_type":"DAY","staff_id":1}, ...]
     """
-    conn = ensure_assignments_table()
+    conn = ensure_ledger_table()
     cur = conn.cursor()
     cur.executemany(
         "INSERT INTO assignments(date, shift_type, staff_id) VALUES(?,?,?)",
         [(a["date"], a["shift_type"], int(a["staff_id"])) for a in assignments],
     )
+    if assignments:
+        dates = [a["date"] for a in assignments]
+        refresh_ledger(cur, min(dates), max(dates))
     conn.commit()
 
+def replace_month(year: int, month: int, assignments: List[Dict]):
+    """
+    Ayın atamalarını ve adil dağılım defterini tek transaction içinde yeniden
+    yazar (clear_month + insert_assignments'ın atomik hali).
+    assignments: [{"date":"YYYY-MM-DD","shift_type":"DAY","staff_id":1}, ...]
+    """
+    from datetime import date
+    start = date(year, month, 1).isoformat()
+    end = date(year + 1, 1, 1).isoformat() if month == 12 else date(year, month + 1, 1).isoformat()
+    replace_range(start, end, assignments)
+
 def list_month(year: int, month: int) -> List[Dict]:
     """
     Return rows including staff_id + full_name so UI can compute matrices.
@@ -72,3 +91,66 @@ def list_month(year: int, month: int) -> List[Dict]:
         (start, end),
     )
     return [dict(r) for r in cur.fetchall()]
+
+def replace_days(days: List[str], assignments: List[Dict]):
+    """
+    Sadece verilen günlerin atamalarını tek transaction içinde değiştirir
+    (pencereli yeniden plan). Hata olursa hiçbir gün değişmez.
+    assignments: [{"date":"YYYY-MM-DD","shift_type":"DAY","staff_id":1}, ...]
+    """
+    conn = ensure_ledger_table()
+    try:
+        cur = conn.cursor()
+        cur.executemany("DELETE FROM assignments WHERE date = ?", [(d,) for d in days])
+        cur.executemany(
+            "INSERT INTO assignments(date, shift_type, staff_id) VALUES(?,?,?)",
+            [(a["date"], a["shift_type"], int(a["staff_id"])) for a in assignments],
+        )
+        touched = list(days) + [a["date"] for a in assignments]
+        if touched:
+            refresh_ledger(cur, min(touched), max(touched))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def replace_range(start: str, end: str, assignments: List[Dict]):
+    """
+    [start, end) aralığını (ör. çeyrek planın tüm ayları) tek transaction içinde
+    silip yeniden yazar; bir ay yazılamazsa hiçbir ay değişmez. Adil dağılım
+    defterinin bu aylara ait satırları da aynı transaction'da güncellenir.
+    assignments: [{"date":"YYYY-MM-DD","shift_type":"DAY","staff_id":1}, ...]
+    """
+    from datetime import date, timedelta
+    conn = ensure_ledger_table()
+    try:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM assignments WHERE date >= ? AND date < ?", (start, end))
+        cur.executemany(
+            "INSERT INTO assignments(date, shift_type, staff_id) VALUES(?,?,?)",
+            [(a["date"], a["shift_type"], int(a["staff_id"])) for a in assignments],
+        )
+        last = (date.fromisoformat(end) - timedelta(days=1)).isoformat()  # end hariç
+        refresh_ledger(cur, start, last)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def list_days_before(year: int, month: int, n_days: int = 1) -> List[Tuple[str, str, int]]:
+    """
+    Ay başından önceki n_days günün atamaları [(date, shift_type, staff_id)].
+    Ay sınırı geçiş kuralları (31'i NIGHT -> 1'i DAY) için; önceki ayın
+    tamamı değil, sadece date indeksiyle bu aralık okunur.
+    """
+    from datetime import date, timedelta
+    end = date(year, month, 1)
+    start = end - timedelta(days=max(1, int(n_days)))
+
+    conn = ensure_assignments_table()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT date, shift_type, staff_id FROM assignments WHERE date >= ? AND date < ? ORDER BY date",
+        (start.isoformat(), end.isoformat()),
+    )
+    return [(r[0], r[1], int(r[2])) for r in cur.fetchall()]
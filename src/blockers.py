@@ -1,6 +1,6 @@
 from typing import Dict, Set, Tuple
 from src.unavailability_repo import list_unavailability
-from src.requests_repo import list_approved_requests
+from src.requests_repo import list_approved_requests, list_approved_requests_range
 
 def build_blocked_days_with_type(
     year: int | None,
@@ -12,6 +12,22 @@ def build_blocked_days_with_type(
       blocked_type: {staff_id: {YYYY-MM-DD: type}} -> rapor/yillik_izin/onayli_istek_hard
       soft_avoid: {staff_id: set(YYYY-MM-DD)} -> approved SOFT istek (mümkünse boş)
     """
+    reqs = []
+    if year is not None and month is not None:
+        reqs = list_approved_requests(year, month)
+    return _build_blocked(reqs)
+
+def build_blocked_days_for_range(
+    start: str,
+    end: str
+) -> Tuple[Dict[int, Set[str]], Dict[int, Dict[str, str]], Dict[int, Set[str]]]:
+    """
+    build_blocked_days_with_type'ın [start, end) aralığı sürümü (çok aylı plan):
+    ay başına ayrı okuma yerine rapor/izin ve onaylı istekler birer sorguyla okunur.
+    """
+    return _build_blocked(list_approved_requests_range(start, end))
+
+def _build_blocked(reqs) -> Tuple[Dict[int, Set[str]], Dict[int, Dict[str, str]], Dict[int, Set[str]]]:
     rows = list_unavailability(None)
     blocked_any: Dict[int, Set[str]] = {}
     blocked_type: Dict[int, Dict[str, str]] = {}
@@ -28,17 +44,15 @@ def build_blocked_days_with_type(
         blocked_type.setdefault(sid, {})[d] = t
 
     # onaylı istekler
-    if year is not None and month is not None:
-        reqs = list_approved_requests(year, month)
-        for r in reqs:
-            sid = int(r["staff_id"])
-            d = str(r["date"])
-            kind = (r.get("request_kind") or "HARD").upper()
+    for r in reqs:
+        sid = int(r["staff_id"])
+        d = str(r["date"])
+        kind = (r.get("request_kind") or "HARD").upper()
 
-            if kind == "HARD":
-                blocked_any.setdefault(sid, set()).add(d)
-                blocked_type.setdefault(sid, {})[d] = "onayli_istek_hard"
-            else:
-                soft_avoid.setdefault(sid, set()).add(d)
+        if kind == "HARD":
+            blocked_any.setdefault(sid, set()).add(d)
+            blocked_type.setdefault(sid, {})[d] = "onayli_istek_hard"
+        else:
+            soft_avoid.setdefault(sid, set()).add(d)
 
     return blocked_any, blocked_type, soft_avoid
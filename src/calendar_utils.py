@@ -1,5 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
 
 @dataclass(frozen=True)
 class DayInfo:
@@ -8,6 +10,23 @@ class DayInfo:
     weekday: int         # 0=Mon ... 6=Sun
     is_weekend: bool
 
+@dataclass(frozen=True)
+class DayTable:
+    """
+    Günleri küçük tamsayılara (0..n-1) eşleyen, bir kez hesaplanan tablo.
+    Scheduler çekirdeği ISO string yerine bu indekslerle çalışır.
+    """
+    isos: Tuple[str, ...]
+    weekday: Tuple[int, ...]
+    is_weekend: Tuple[bool, ...]
+    is_holiday: Tuple[bool, ...]
+    prev: Tuple[int, ...]        # önceki günün indeksi (tablo dışıysa -1)
+    prev_isos: Tuple[str, ...]   # önceki günün ISO'su (tablo dışında olsa bile)
+    index: Dict[str, int] = field(compare=False, hash=False, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.isos)
+
 def month_range(year: int, month: int):
     start = date(year, month, 1)
     if month == 12:
@@ -16,8 +35,16 @@ def month_range(year: int, month: int):
         end = date(year, month + 1, 1)
     return start, end
 
+def add_months(year: int, month: int, k: int) -> Tuple[int, int]:
+    m = year * 12 + (month - 1) + k
+    return m // 12, m % 12 + 1
+
 def iter_month_days(year: int, month: int):
     start, end = month_range(year, month)
+    return iter_range_days(start, end)
+
+def iter_range_days(start: date, end: date):
+    """[start, end) aralığındaki günler (ay sınırlarından bağımsız)."""
     cur = start
     out = []
     while cur < end:
@@ -32,6 +59,44 @@ def iter_month_days(year: int, month: int):
         cur += timedelta(days=1)
     return out
 
+def _build_day_table(days, holidays: frozenset) -> DayTable:
+    isos = tuple(d.iso for d in days)
+    return DayTable(
+        isos=isos,
+        weekday=tuple(d.weekday for d in days),
+        is_weekend=tuple(d.is_weekend for d in days),
+        is_holiday=tuple(d.iso in holidays for d in days),
+        prev=tuple(range(-1, len(isos) - 1)),
+        prev_isos=tuple((d.day - timedelta(days=1)).isoformat() for d in days),
+        index={iso: i for i, iso in enumerate(isos)},
+    )
+
+@lru_cache(maxsize=64)
+def _month_day_table(year: int, month: int, holidays: frozenset) -> DayTable:
+    return _build_day_table(iter_month_days(year, month), holidays)
+
+def month_day_table(year: int, month: int, holiday_isos: Iterable[str] | None = None) -> DayTable:
+    """(year, month, tatiller) başına bir kez kurulur ve önbellekte tutulur."""
+    return _month_day_table(int(year), int(month), frozenset(holiday_isos or ()))
+
+def horizon_range(year: int, month: int, n_months: int) -> Tuple[date, date]:
+    """(year, month)'dan başlayan n_months ayın [start, end) aralığı."""
+    start, _ = month_range(year, month)
+    ey, em = add_months(year, month, max(1, n_months) - 1)
+    _, end = month_range(ey, em)
+    return start, end
+
+@lru_cache(maxsize=16)
+def _horizon_day_table(year: int, month: int, n_months: int, holidays: frozenset) -> DayTable:
+    return _build_day_table(iter_range_days(*horizon_range(year, month, n_months)), holidays)
+
+def horizon_day_table(year: int, month: int, n_months: int, holiday_isos: Iterable[str] | None = None) -> DayTable:
+    """
+    (year, month)'dan başlayan n_months aylık tek gün tablosu (çeyrek planı için).
+    İndeksler ay sınırlarında kesilmez; prev sadece ilk gün için tablo dışıdır.
+    """
+    return _horizon_day_table(int(year), int(month), max(1, int(n_months)), frozenset(holiday_isos or ()))
+
 def count_weekdays_excluding_holidays(year: int, month: int, holiday_isos: set[str]) -> int:
     days = iter_month_days(year, month)
     count = 0
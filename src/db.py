@@ -69,6 +69,8 @@ def init_db() -> None:
         );
         """)
 
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_assignments_date ON assignments(date)")
+
         cur.execute("PRAGMA table_info(unavailability)")
         unav_cols = {row["name"] for row in cur.fetchall()}
         if "status" not in unav_cols:
@@ -83,4 +85,13 @@ def init_db() -> None:
                 """
             )
 
+        # yetkinlikler: kişi başına bit maskesi (bit numaraları skills tablosunda)
+        cur.execute("PRAGMA table_info(staff)")
+        staff_cols = {row["name"] for row in cur.fetchall()}
+        if "skills" not in staff_cols:
+            cur.execute("ALTER TABLE staff ADD COLUMN skills INTEGER NOT NULL DEFAULT 0")
+        # aylık üst saat sınırı (NULL: sınırsız)
+        if "max_hours" not in staff_cols:
+            cur.execute("ALTER TABLE staff ADD COLUMN max_hours INTEGER")
+
         conn.commit()
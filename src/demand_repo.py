@@ -0,0 +1,56 @@
+import sqlite3
+from typing import List, Dict
+
+from src.scheduler import DEFAULT_DEMAND
+
+def _connect():
+    try:
+        from src.db import get_conn  # type: ignore
+        return get_conn()
+    except Exception:
+        return sqlite3.connect("nobet_planner.sqlite3", check_same_thread=False)
+
+def ensure_demand_table():
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS demand (
+            day_kind TEXT NOT NULL,    -- WEEKDAY / WEEKEND / HOLIDAY
+            shift_type TEXT NOT NULL,  -- DAY / NIGHT / D24
+            count INTEGER NOT NULL,    -- o gün bu vardiyada çalışacak kişi sayısı
+            PRIMARY KEY (day_kind, shift_type)
+        )
+    """)
+    # ilk kurulum: eski sabit ihtiyaç (12'şer kişi)
+    cur.execute("SELECT COUNT(*) FROM demand")
+    if cur.fetchone()[0] == 0:
+        cur.executemany(
+            "INSERT INTO demand(day_kind, shift_type, count) VALUES(?,?,?)",
+            list(DEFAULT_DEMAND),
+        )
+    conn.commit()
+    return conn
+
+def list_demand() -> List[Dict]:
+    """Gün içi doldurma sırası ekleme sırasıdır (rowid): DAY, NIGHT gibi."""
+    conn = ensure_demand_table()
+    cur = conn.cursor()
+    cur.execute("SELECT day_kind, shift_type, count FROM demand ORDER BY rowid ASC")
+    return [dict(r) for r in cur.fetchall()]
+
+def set_demand(day_kind: str, shift_type: str, count: int) -> None:
+    conn = ensure_demand_table()
+    conn.execute(
+        """
+        INSERT INTO demand(day_kind, shift_type, count) VALUES(?,?,?)
+        ON CONFLICT(day_kind, shift_type) DO UPDATE SET count = excluded.count
+        """,
+        (day_kind, shift_type, max(0, int(count))),
+    )
+    conn.commit()
+
+def delete_demand(day_kind: str, shift_type: str) -> None:
+    conn = ensure_demand_table()
+    conn.execute("DELETE FROM demand WHERE day_kind = ? AND shift_type = ?", (day_kind, shift_type))
+    conn.commit()
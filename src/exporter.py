@@ -2,14 +2,22 @@
 from __future__ import annotations
 
 import io
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import pandas as pd
 
-def export_schedule_xlsx(df_matrix: "pd.DataFrame", year: int, month: int, sheet_name: str = "Cizelge") -> bytes:
+def export_schedule_xlsx(
+    df_matrix: "pd.DataFrame",
+    year: int,
+    month: int,
+    sheet_name: str = "Cizelge",
+    cell_colors: Optional[Dict[Tuple[int, str], str]] = None,
+) -> bytes:
     """
     df_matrix DataFrame'ini Excel'e yazar ve bytes döner.
     app.py bunu st.download_button ile indirir.
+    cell_colors: {(satır konumu, kolon adı): "#RRGGBB"} yazı renkleri
+    (vardiya tipi renkleri kayıtlı tiplerden gelir).
     """
     xlsx_buf = io.BytesIO()
 
@@ -37,6 +45,15 @@ def export_schedule_xlsx(df_matrix: "pd.DataFrame", year: int, month: int, sheet
                 for cell in row:
                     cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
 
+            # Vardiya renkleri (başlık 1. satır; veri 2. satırdan başlar)
+            if cell_colors:
+                col_pos = {str(cell.value): i for i, cell in enumerate(ws[1], start=1)}
+                for (row_pos, col_name), color in cell_colors.items():
+                    ci = col_pos.get(str(col_name))
+                    if ci is None or not color:
+                        continue
+                    ws.cell(row=row_pos + 2, column=ci).font = Font(color=color.lstrip("#").upper())
+
             # Kolon genişliği ayarla
             for col_idx, col in enumerate(ws.columns, start=1):
                 max_len = 10
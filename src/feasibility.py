@@ -0,0 +1,156 @@
+# src/feasibility.py
+"""
+Çözüm öncesi hızlı fizibilite kontrolü.
+
+Her gün için personel -> vardiya tipi ikili eşleşmesi kurulur:
+- bir kişi günde en fazla bir slot alır (aynı gün tekliği)
+- hard block (rapor/izin/onaylı HARD istek) olan kişi o gün eşleşemez
+- dün rapor/izin ise (ay başında: önceki ayın vardiyası) geçiş kuralının
+  yasakladığı tipler elenir
+Maksimum eşleşme, o gün doldurulabilecek slot sayısının üst sınırıdır;
+ihtiyaç - eşleşme ise dolmayan slot sayısı için alt sınırdır. Diğer
+günlerdeki atamalara bağlı geçişler burada bilinmez (iyimser sınır).
+"""
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+from src.calendar_utils import month_day_table
+from src.scheduler import _MonthState, _check, _demand_cells
+
+
+def max_type_matching(
+    eligible: Dict[int, Sequence[Hashable]],
+    demand: Dict[Hashable, int],
+    initial: Optional[Dict[int, Hashable]] = None,
+) -> Dict[int, Hashable]:
+    """
+    Kapasiteli ikili eşleşme: kişi -> tip, her tip en fazla demand[tip] kişi.
+    initial verilirse ondan başlanır ve sadece artırıcı yollarla büyütülür
+    (mevcut eşleşmedeki kimse eşleşmesiz bırakılmaz).
+    """
+    match: Dict[int, Hashable] = {}
+    holders: Dict[Hashable, List[int]] = {t: [] for t in demand}
+    for sid, t in (initial or {}).items():
+        if t in holders:
+            match[sid] = t
+            holders[t].append(sid)
+
+    def _augment(sid: int, seen: Set[Hashable]) -> bool:
+        for t in eligible.get(sid, ()):
+            if t in seen or t not in holders:
+                continue
+            seen.add(t)
+            if len(holders[t]) < demand[t]:
+                holders[t].append(sid)
+                match[sid] = t
+                return True
+            for other in list(holders[t]):
+                if _augment(other, seen):
+                    holders[t].remove(other)
+                    holders[t].append(sid)
+                    match[sid] = t
+                    return True
+        return False
+
+    # _augment(other) other'ı yeni tipe ekler; eski tipten çıkarma çağıranda
+    for sid in eligible:
+        if sid not in match:
+            _augment(sid, set())
+    return match
+
+
+def augment_to_type(
+    eligible: Dict[int, Sequence[Hashable]],
+    match: Dict[int, Hashable],
+    target_type: Hashable,
+) -> bool:
+    """
+    target_type'ta boş yer varken artırıcı yol arar: eşleşmesiz biri, zincirleme
+    yer değiştirmelerle (kişi tip değiştirir) oraya bir kişi ekleyebilir mi?
+    Bulursa match'i yerinde günceller ve True döner.
+    """
+    # geriye doğru BFS: t'ye girebilecek kişi boştaysa yol bitti; doluysa onun
+    # eski tipi (cur) boşalır ve cur'a girecek birini aramak gerekir.
+    via: Dict[Hashable, Tuple[int, Hashable]] = {}  # boşalan tip -> (ayrılan kişi, gittiği tip)
+    seen = {target_type}
+    frontier = [target_type]
+    while frontier:
+        nxt = []
+        for t in frontier:
+            for sid, types in eligible.items():
+                if t not in types:
+                    continue
+                cur = match.get(sid)
+                if cur is None:
+                    match[sid] = t
+                    while t != target_type:
+                        mover, t = via[t]
+                        match[mover] = t
+                    return True
+                if cur not in seen:
+                    seen.add(cur)
+                    via[cur] = (sid, t)
+                    nxt.append(cur)
+        frontier = nxt
+    return False
+
+
+def _day_eligibility(state: _MonthState, staff_ids: List[int], di: int, types: Sequence[str]) -> Dict[int, List[str]]:
+    """Sadece yapısal kısıtlar: hard block + dünkü rapor/izin (ya da önceki ay) kaynaklı geçiş yasağı."""
+    out: Dict[int, List[str]] = {}
+    tt = state.tt
+    kind = state.kinds[di]
+    for sid in staff_ids:
+        blocked = state.blocked[sid][di]
+        pc = state.prev_block[sid][di]
+        ok = [t for t in types if not _check(tt, kind, tt.code(t), blocked, False, pc)]
+        if ok:
+            out[sid] = ok
+    return out
+
+
+def find_impossible_days(
+    year: int,
+    month: int,
+    staff_ids: List[int],
+    blocked_any: Dict[int, Set[str]],
+    transition_rules: List[Dict] | None = None,
+    blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
+    boundary: Optional[List[Tuple[str, str, int]]] = None,
+    demand: List[Dict] | None = None,
+    holidays: Optional[Set[str]] = None,
+) -> List[Dict]:
+    """
+    Ay çözülmeden, yapısal olarak dolamayacak günleri döndürür:
+    [{"date", "need", "available_staff", "max_fillable", "missing_min", "by_type"}]
+    by_type: {tip: (ihtiyaç, en fazla doldurulabilen)}
+    demand / holidays: scheduler ihtiyaç deseni ve tatil günleri (HOLIDAY deseni için).
+    """
+    cal = month_day_table(year, month, holidays)
+    staff = list(dict.fromkeys(staff_ids))
+    state = _MonthState(cal, staff, blocked_any, transition_rules=transition_rules, blocked_type=blocked_type, boundary=boundary)
+
+    demand_by_day: List[Dict[str, int]] = [{} for _ in cal.isos]
+    for di, stype, k in _demand_cells(cal, demand):
+        demand_by_day[di][stype] = demand_by_day[di].get(stype, 0) + k
+
+    out: List[Dict] = []
+    for di, demand in enumerate(demand_by_day):
+        if not demand:
+            continue
+        need = sum(demand.values())
+        eligible = _day_eligibility(state, staff, di, list(demand))
+        match = max_type_matching(eligible, demand)
+        if len(match) >= need:
+            continue
+        filled: Dict[str, int] = {t: 0 for t in demand}
+        for t in match.values():
+            filled[t] += 1
+        out.append({
+            "date": cal.isos[di],
+            "need": need,
+            "available_staff": len(eligible),
+            "max_fillable": len(match),
+            "missing_min": need - len(match),
+            "by_type": {t: (demand[t], filled[t]) for t in demand},
+        })
+    return out
@@ -0,0 +1,110 @@
+import sqlite3
+from typing import Dict
+
+from src.scheduler import LEDGER_FIELDS
+
+def _connect():
+    try:
+        from src.db import get_conn  # type: ignore
+        return get_conn()
+    except Exception:
+        return sqlite3.connect("nobet_planner.sqlite3", check_same_thread=False)
+
+def _next_month(month: str) -> str:
+    y, m = int(month[:4]), int(month[5:7])
+    return f"{y + 1:04d}-01" if m == 12 else f"{y:04d}-{m + 1:02d}"
+
+def ensure_ledger_table():
+    """
+    Kişi x ay adil dağılım defteri. Tablo ilk kez kurulurken mevcut atamalardan
+    bir kez doldurulur; sonrasında her kayıt kendi transaction'ında günceller.
+    """
+    from src.assignments_repo import ensure_assignments_table
+    from src.shift_types_repo import ensure_shift_types_table
+
+    ensure_assignments_table()
+    ensure_shift_types_table()  # saat / gece bilgisi shift_types'tan okunur
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fairness_ledger'")
+    fresh = cur.fetchone() is None
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS fairness_ledger (
+            staff_id INTEGER NOT NULL,
+            month TEXT NOT NULL,                  -- YYYY-MM
+            hours INTEGER NOT NULL DEFAULT 0,
+            weekends INTEGER NOT NULL DEFAULT 0,  -- Cumartesi / Pazar vardiyası
+            nights INTEGER NOT NULL DEFAULT 0,    -- gece yarısını geçen vardiya
+            holidays INTEGER NOT NULL DEFAULT 0,  -- resmi tatil günü vardiyası
+            PRIMARY KEY (staff_id, month)
+        )
+    """)
+    cur.execute("CREATE TABLE IF NOT EXISTS holidays (date TEXT PRIMARY KEY)")
+    if fresh:
+        cur.execute("SELECT MIN(date), MAX(date) FROM assignments")
+        first, last = cur.fetchone()
+        if first:
+            refresh_ledger(cur, first, last)
+    conn.commit()
+    return conn
+
+def refresh_ledger(cur, start: str, last: str) -> None:
+    """
+    start..last (ISO gün, ikisi dahil) aralığının dokunduğu ayların defter
+    satırlarını o ayların atamalarından yeniden yazar. Çağıranın cursor'ı ile
+    çalışır: atama kaydıyla aynı transaction'da kalır (commit çağırana aittir).
+    Sadece bu aylar okunur; tüm atama geçmişi taranmaz.
+    """
+    first_month, last_month = start[:7], last[:7]
+    end_month = _next_month(last_month)
+    cur.execute("DELETE FROM fairness_ledger WHERE month >= ? AND month < ?", (first_month, end_month))
+    cur.execute(
+        """
+        INSERT INTO fairness_ledger(staff_id, month, hours, weekends, nights, holidays)
+        SELECT a.staff_id,
+               substr(a.date, 1, 7),
+               SUM(COALESCE(t.hours, 0)),
+               SUM(CASE WHEN strftime('%w', a.date) IN ('0', '6') THEN 1 ELSE 0 END),
+               SUM(CASE WHEN t.end_time <= t.start_time THEN 1 ELSE 0 END),
+               SUM(CASE WHEN h.date IS NOT NULL THEN 1 ELSE 0 END)
+        FROM assignments a
+        LEFT JOIN shift_types t ON t.code = a.shift_type
+        LEFT JOIN holidays h ON h.date = a.date
+        WHERE a.date >= ? AND a.date < ?
+        GROUP BY a.staff_id, substr(a.date, 1, 7)
+        """,
+        (first_month + "-01", end_month + "-01"),
+    )
+
+def rebuild_ledger() -> None:
+    """Defteri tüm atamalardan yeniden kurar (ör. tatil listesi / vardiya saatleri sonradan değiştiyse)."""
+    conn = ensure_ledger_table()
+    try:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM fairness_ledger")
+        cur.execute("SELECT MIN(date), MAX(date) FROM assignments")
+        row = cur.fetchone()
+        if row and row[0]:
+            refresh_ledger(cur, row[0], row[1])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def ledger_totals(year: int, month: int) -> Dict[int, Dict[str, int]]:
+    """
+    (year, month)'dan önceki tüm ayların kişi başı toplamları tek sorguda:
+    {kişi: {"hours", "weekends", "nights", "holidays"}} (scheduler'ın ledger girdisi).
+    """
+    conn = ensure_ledger_table()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT staff_id, SUM(hours), SUM(weekends), SUM(nights), SUM(holidays)
+        FROM fairness_ledger
+        WHERE month < ?
+        GROUP BY staff_id
+        """,
+        (f"{int(year):04d}-{int(month):02d}",),
+    )
+    return {int(r[0]): {name: int(v) for name, v in zip(LEDGER_FIELDS, r[1:])} for r in cur.fetchall()}
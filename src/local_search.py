@@ -0,0 +1,359 @@
+# src/local_search.py
+"""
+Greedy + repair sonrası iyileştirme fazı (simulated annealing).
+
+Komşuluklar:
+- fill : dolmayan bir slotu uygun birine ver
+- move : bir vardiyayı başka birine taşı
+- swap : iki kişinin farklı günlerdeki vardiyalarını değiş tokuş et
+
+Amaç fonksiyonu (küçük = iyi):
+    unfilled * W_UNFILLED + min saat açığı * W_DEFICIT
+    + SOFT isteğe rağmen atama * W_SOFT + sum((saat - hedef)^2) * W_SPREAD
+    + sum(hafta sonu vardiyası^2) * W_WEEKEND   (varsayılan 0; çok aylı ufukta açılır)
+
+Her hamlenin maliyet farkı sadece dokunulan kişiler/günler üzerinden O(1)
+hesaplanır; fizibilite _MonthState ile d-1, d, d+1 kontrolüdür. Ayın
+tamamı yeniden doğrulanmaz.
+"""
+from __future__ import annotations
+
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.calendar_utils import DayTable, month_day_table
+from src.scheduler import HOOK_EVERY_IMPROVE_ITERS, Shift, ShiftType, SolveHooks, _MonthState, shift_registry
+
+
+@dataclass(frozen=True)
+class ObjectiveWeights:
+    unfilled: float = 1000.0
+    deficit: float = 10.0
+    soft: float = 50.0
+    spread: float = 0.01
+    weekend: float = 0.0
+
+
+def _targets(staff_ids: List[int], min_required_hours: int | Dict[int, int]) -> Dict[int, int]:
+    if isinstance(min_required_hours, dict):
+        return {sid: int(min_required_hours.get(sid, 0)) for sid in staff_ids}
+    return {sid: int(min_required_hours) for sid in staff_ids}
+
+
+def evaluate_schedule(
+    assignments: List[Tuple[str, ShiftType, int]],
+    unfilled_count: int,
+    staff_ids: List[int],
+    min_required_hours: int | Dict[int, int],
+    soft_avoid: Optional[Dict[int, Set[str]]] = None,
+    weights: ObjectiveWeights = ObjectiveWeights(),
+) -> Dict[str, float]:
+    """Bir planın amaç fonksiyonu ve bileşenleri (çoklu başlangıç / raporlama için)."""
+    soft_avoid = soft_avoid or {}
+    target = _targets(staff_ids, min_required_hours)
+    hours = {sid: 0 for sid in staff_ids}
+    weekends = {sid: 0 for sid in staff_ids}
+    soft_hits = 0
+    hours_of = shift_registry().hours_of
+    for d, stype, sid in assignments:
+        hours[sid] = hours.get(sid, 0) + hours_of(stype)
+        if date.fromisoformat(d).weekday() >= 5:
+            weekends[sid] = weekends.get(sid, 0) + 1
+        if d in soft_avoid.get(sid, ()):
+            soft_hits += 1
+    deficit = sum(max(0, target.get(sid, 0) - h) for sid, h in hours.items())
+    spread = sum((h - target.get(sid, 0)) ** 2 for sid, h in hours.items())
+    weekend_sq = sum(w * w for w in weekends.values())
+    objective = (
+        weights.unfilled * unfilled_count
+        + weights.deficit * deficit
+        + weights.soft * soft_hits
+        + weights.spread * spread
+        + weights.weekend * weekend_sq
+    )
+    return {
+        "objective": objective,
+        "unfilled": unfilled_count,
+        "deficit_hours": deficit,
+        "soft_hits": soft_hits,
+        "spread": spread,
+        "weekend_sq": weekend_sq,
+    }
+
+
+class _Annealer:
+    def __init__(self, state: _MonthState, slots, missed, staff_ids, target, soft_days, weights, rnd, locked=frozenset()):
+        self.state = state
+        self.locked: Set[Tuple[int, ShiftType, int]] = locked  # kilitli hücreler taşınmaz
+        self.slots: List[Tuple[int, ShiftType, int]] = slots
+        self.missed: List[Tuple[int, ShiftType]] = missed
+        self.staff = list(dict.fromkeys(staff_ids))
+        self.target = target
+        self.soft_days = soft_days
+        self.w = weights
+        self.rnd = rnd
+        self.hours = {sid: 0 for sid in self.staff}
+        self.weekends = {sid: 0 for sid in self.staff}
+        for di, stype, sid in slots:
+            self.hours[sid] = self.hours.get(sid, 0) + self._h(stype)
+            self.weekends[sid] = self.weekends.get(sid, 0) + state.kinds[di]
+
+    def _h(self, stype: ShiftType) -> int:
+        """Saat: geçiş tablosu kodu ile dizi okuması."""
+        tt = self.state.tt
+        return tt.hours[tt.code(stype)]
+
+    # --- kişi bazlı maliyet (deficit + spread) ---
+    def _staff_cost(self, sid: int, h: int) -> float:
+        t = self.target.get(sid, 0)
+        return self.w.deficit * max(0, t - h) + self.w.spread * (h - t) ** 2
+
+    def _soft(self, sid: int, di: int) -> float:
+        return self.w.soft if di in self.soft_days.get(sid, ()) else 0.0
+
+    def _hours_delta(self, changes: Dict[int, int]) -> float:
+        delta = 0.0
+        for sid, dh in changes.items():
+            if dh:
+                h = self.hours[sid]
+                delta += self._staff_cost(sid, h + dh) - self._staff_cost(sid, h)
+        return delta
+
+    def _weekend_delta(self, changes: Dict[int, int]) -> float:
+        if not self.w.weekend:
+            return 0.0
+        delta = 0.0
+        for sid, dw in changes.items():
+            if dw:
+                w = self.weekends[sid]
+                delta += self.w.weekend * ((w + dw) ** 2 - w * w)
+        return delta
+
+    def objective(self) -> float:
+        cost = self.w.unfilled * len(self.missed)
+        for sid, h in self.hours.items():
+            cost += self._staff_cost(sid, h)
+        for w in self.weekends.values():
+            cost += self.w.weekend * w * w
+        for di, _stype, sid in self.slots:
+            cost += self._soft(sid, di)
+        return cost
+
+    # --- hamleler: (delta, uygula) döndürür; uygun değilse None ---
+    def propose_fill(self):
+        if not self.missed or not self.staff:
+            return None
+        k = self.rnd.randrange(len(self.missed))
+        di, stype = self.missed[k]
+        b = self.rnd.choice(self.staff)
+        code = self.state.tt.code(stype)
+        if not self.state.can_assign(b, di, code):
+            return None
+        short = self.state.cover_short(di, code)
+        if short:
+            # yetkinlik açığı olan hücreye sadece açığı azaltan kişi girer (açık
+            # kapanmadan yetkinliksiz atama ihlal üretir); kalan koltuklar da açığa yetmeli
+            m = self.state.skills.get(b, 0)
+            if not any(m & mask == mask for mask, _need in short):
+                return None
+            if not self.state.seat_ok(short, self.missed.count((di, stype)), b):
+                return None
+        h = self._h(stype)
+        wk = self.state.kinds[di]
+        delta = -self.w.unfilled + self._hours_delta({b: h}) + self._weekend_delta({b: wk}) + self._soft(b, di)
+
+        def apply():
+            self.missed[k] = self.missed[-1]
+            self.missed.pop()
+            self.state.assign(b, di, stype)
+            self.slots.append((di, stype, b))
+            self.hours[b] += h
+            self.weekends[b] += wk
+        return delta, apply
+
+    def propose_move(self):
+        if not self.slots or len(self.staff) < 2:
+            return None
+        i = self.rnd.randrange(len(self.slots))
+        if self.slots[i] in self.locked:
+            return None
+        di, stype, a = self.slots[i]
+        b = self.rnd.choice(self.staff)
+        code = self.state.tt.code(stype)
+        if b == a or not self.state.can_assign(b, di, code) or not self.state.cover_keeps(a, b, di, code):
+            return None
+        h = self._h(stype)
+        wk = self.state.kinds[di]
+        delta = (
+            self._hours_delta({a: -h, b: h}) + self._weekend_delta({a: -wk, b: wk})
+            + self._soft(b, di) - self._soft(a, di)
+        )
+
+        def apply():
+            self.state.unassign(a, di, stype)
+            self.state.assign(b, di, stype)
+            self.slots[i] = (di, stype, b)
+            self.hours[a] -= h
+            self.hours[b] += h
+            self.weekends[a] -= wk
+            self.weekends[b] += wk
+        return delta, apply
+
+    def propose_swap(self):
+        if len(self.slots) < 2:
+            return None
+        i = self.rnd.randrange(len(self.slots))
+        j = self.rnd.randrange(len(self.slots))
+        if self.slots[i] in self.locked or self.slots[j] in self.locked:
+            return None
+        d1, t1, a = self.slots[i]
+        d2, t2, b = self.slots[j]
+        if a == b or d1 == d2:
+            return None
+        st = self.state
+        if not st.cover_keeps(a, b, d1, st.tt.code(t1)) or not st.cover_keeps(b, a, d2, st.tt.code(t2)):
+            return None
+        # önce ikisini de çıkar, sonra yeni yerlerde kontrol et (komşu günler için gerekli)
+        st.unassign(a, d1, t1)
+        st.unassign(b, d2, t2)
+        ok = st.can_assign(a, d2, st.tt.code(t2))
+        if ok:
+            st.assign(a, d2, t2)
+            ok = st.can_assign(b, d1, st.tt.code(t1))
+            st.unassign(a, d2, t2)
+        st.assign(a, d1, t1)
+        st.assign(b, d2, t2)
+        if not ok:
+            return None
+        h1 = self._h(t1)
+        h2 = self._h(t2)
+        dw = st.kinds[d2] - st.kinds[d1]
+        delta = (
+            self._hours_delta({a: h2 - h1, b: h1 - h2})
+            + self._weekend_delta({a: dw, b: -dw})
+            + self._soft(a, d2) + self._soft(b, d1) - self._soft(a, d1) - self._soft(b, d2)
+        )
+
+        def apply():
+            st.unassign(a, d1, t1)
+            st.unassign(b, d2, t2)
+            st.assign(a, d2, t2)
+            st.assign(b, d1, t1)
+            self.slots[i] = (d2, t2, a)
+            self.slots[j] = (d1, t1, b)
+            self.hours[a] += h2 - h1
+            self.hours[b] += h1 - h2
+            self.weekends[a] += dw
+            self.weekends[b] -= dw
+        return delta, apply
+
+
+def improve_schedule(
+    year: int,
+    month: int,
+    assignments: List[Tuple[str, ShiftType, int]],
+    unfilled: List[Shift],
+    staff_ids: List[int],
+    blocked_any: Dict[int, Set[str]],
+    min_required_hours: int | Dict[int, int],
+    transition_rules: List[Dict] | None = None,
+    blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
+    soft_avoid: Optional[Dict[int, Set[str]]] = None,
+    time_budget_s: float = 1.0,
+    max_iters: Optional[int] = None,
+    seed: int = 0,
+    weights: ObjectiveWeights = ObjectiveWeights(),
+    hooks: Optional[SolveHooks] = None,
+    locked: Optional[Set[Tuple[str, ShiftType, int]]] = None,
+    boundary: Optional[List[Tuple[str, ShiftType, int]]] = None,
+    day_table: Optional[DayTable] = None,
+    skills: Optional[Dict[int, int]] = None,
+    max_hours: Optional[Dict[int, int]] = None,
+    overtime_budget: int = 0,
+) -> Tuple[List[Tuple[str, ShiftType, int]], List[Shift], Dict]:
+    """
+    Simulated annealing ile planı iyileştirir; hard kurallar hiç bozulmaz.
+    time_budget_s: duvar saati bütçesi (Streamlit isteği içinde çalışabilsin diye)
+    locked: taşınmayacak / takas edilmeyecek atamalar (warm start kilitleri)
+    day_table: verilirse ay yerine bu gün tablosu (çok aylı ufuk; hedef saat toplamdır)
+    skills: yetkinlik maskeleri; hamleler hücrelerin yetkinlik minimumunu bozmaz
+    max_hours / overtime_budget: fill / move / swap üst saat sınırını (+ havuzu) aşmaz
+    Dönüş: (atamalar, dolmayan slotlar, istatistik)
+    """
+    cal = day_table or month_day_table(year, month)
+    state = _MonthState(cal, staff_ids, blocked_any, transition_rules=transition_rules, blocked_type=blocked_type, boundary=boundary, skills=skills, max_hours=max_hours, overtime_budget=overtime_budget)
+    slots: List[Tuple[int, ShiftType, int]] = []
+    for d, stype, sid in assignments:
+        di = cal.index[d]
+        slots.append((di, stype, sid))
+        state.assign(sid, di, stype)
+    missed = [(cal.index[sh.day], sh.shift_type) for sh in unfilled]
+    soft_days: Dict[int, Set[int]] = {}
+    for sid, ds in (soft_avoid or {}).items():
+        soft_days[sid] = {cal.index[d] for d in ds if d in cal.index}
+
+    fixed = {(cal.index[d], stype, sid) for d, stype, sid in (locked or ()) if d in cal.index}
+    rnd = random.Random(seed)
+    sa = _Annealer(state, slots, missed, staff_ids, _targets(staff_ids, min_required_hours), soft_days, weights, rnd, fixed)
+
+    cur = sa.objective()
+    start_obj = cur
+    best = cur
+    best_slots = list(sa.slots)
+    best_missed = list(sa.missed)
+
+    t_start = time.monotonic()
+    t0, t_end = 50.0, 0.5
+    temp = t0
+    it = accepted = 0
+    while True:
+        if max_iters is not None and it >= max_iters:
+            break
+        if it % HOOK_EVERY_IMPROVE_ITERS == 0:
+            frac = (time.monotonic() - t_start) / time_budget_s if time_budget_s > 0 else 1.0
+            if frac >= 1.0:
+                break
+            if hooks is not None:
+                if hooks.should_stop():
+                    break
+                hooks.progress("improve", best_objective=best, unfilled=len(best_missed))
+            temp = t0 * (t_end / t0) ** frac
+        it += 1
+
+        r = rnd.random()
+        if r < 0.2 and sa.missed:
+            prop = sa.propose_fill()
+        elif r < 0.6:
+            prop = sa.propose_move()
+        else:
+            prop = sa.propose_swap()
+        if prop is None:
+            continue
+
+        delta, apply = prop
+        if delta <= 0 or rnd.random() < math.exp(-delta / temp):
+            apply()
+            accepted += 1
+            cur += delta
+            if cur < best - 1e-9:
+                best = cur
+                best_slots = list(sa.slots)
+                best_missed = list(sa.missed)
+
+    isos = cal.isos
+    best_slots.sort(key=lambda x: x[0])
+    best_missed.sort(key=lambda x: x[0])
+    out_assignments = [(isos[di], stype, sid) for di, stype, sid in best_slots]
+    out_unfilled = [Shift(isos[di], stype) for di, stype in best_missed]
+    stats = {
+        "iterations": it,
+        "accepted": accepted,
+        "start_objective": start_obj,
+        "best_objective": best,
+        "seconds": round(time.monotonic() - t_start, 3),
+    }
+    return out_assignments, out_unfilled, stats
@@ -91,7 +91,10 @@ def list_approved_requests(year: int, month: int) -> List[Dict]:
         end = date(year + 1, 1, 1).isoformat()
     else:
         end = date(year, month + 1, 1).isoformat()
+    return list_approved_requests_range(start, end)
 
+def list_approved_requests_range(start: str, end: str) -> List[Dict]:
+    """[start, end) aralığındaki onaylı istekler; çok aylı planda tek sorgu."""
     conn = ensure_requests_table()
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
@@ -4,7 +4,7 @@ from typing import Dict, List
 from src.rules_repo import add_rule, list_rules, set_rule_active
 
 # Kural formatı: prev_type -> next_type (apply_day: ANY/WEEKDAY/WEEKEND)
-# Not: burada sadece "YASAK" geçişleri tanımlanır.
+# Not: burada sadece "YASAK" geçişleri tanımlanır (pencere kuralları preset dışıdır).
 
 # Preset adları (TR):
 # - Varsayılan
@@ -48,7 +48,8 @@ def apply_preset(preset_name: str, deactivate_others: bool = False) -> int:
     if not rules:
         return 0
 
-    existing = list_rules(active_only=None)
+    # presetler sadece geçiş kurallarıdır; pencere kurallarına dokunulmaz
+    existing = [r for r in list_rules(active_only=None) if r.get("rule_kind", "TRANSITION") == "TRANSITION"]
     by_key = {}
     for r in existing:
         k = _key(r["prev_type"], r["next_type"], r.get("apply_day","ANY"))
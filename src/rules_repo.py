@@ -32,13 +32,35 @@ def ensure_rules_table():
         cur.execute("ALTER TABLE rules ADD COLUMN apply_day TEXT NOT NULL DEFAULT 'ANY'")
         conn.commit()
 
+    # --- Migration: pencere kuralları (rule_kind / max_count / window_days) ---
+    # TRANSITION: prev_type -> next_type yasağı (eski satırlar)
+    # WINDOW     : herhangi window_days günde en fazla max_count next_type
+    # CONSECUTIVE: en fazla max_count gün üst üste next_type (ANY: çalışma günü)
+    if "rule_kind" not in cols:
+        cur.execute("ALTER TABLE rules ADD COLUMN rule_kind TEXT NOT NULL DEFAULT 'TRANSITION'")
+        cur.execute("ALTER TABLE rules ADD COLUMN max_count INTEGER NOT NULL DEFAULT 0")
+        cur.execute("ALTER TABLE rules ADD COLUMN window_days INTEGER NOT NULL DEFAULT 0")
+        conn.commit()
+
+    # --- Migration: REST (vardiya bitişi -> sonraki başlangıç en az rest_hours saat) ---
+    if "rest_hours" not in cols:
+        cur.execute("ALTER TABLE rules ADD COLUMN rest_hours INTEGER NOT NULL DEFAULT 0")
+        conn.commit()
+
+    # --- Migration: COVERAGE (next_type vardiyasında en az min_count kişi skill_mask yetkinliğinde) ---
+    if "skill_mask" not in cols:
+        cur.execute("ALTER TABLE rules ADD COLUMN skill_mask INTEGER NOT NULL DEFAULT 0")
+        cur.execute("ALTER TABLE rules ADD COLUMN min_count INTEGER NOT NULL DEFAULT 0")
+        conn.commit()
+
     return conn
 
 def add_rule(prev_type: str, next_type: str, apply_day: str = "ANY", note: str = "") -> int:
     conn = ensure_rules_table()
     cur = conn.cursor()
     cur.execute(
-        "SELECT id FROM rules WHERE prev_type=? AND next_type=? AND apply_day=? ORDER BY id DESC LIMIT 1",
+        "SELECT id FROM rules WHERE rule_kind='TRANSITION' AND prev_type=? AND next_type=? AND apply_day=? "
+        "ORDER BY id DESC LIMIT 1",
         (prev_type, next_type, apply_day),
     )
     row = cur.fetchone()
@@ -56,6 +78,125 @@ def add_rule(prev_type: str, next_type: str, apply_day: str = "ANY", note: str =
     conn.commit()
     return int(cur.lastrowid)
 
+def add_window_rule(rule_kind: str, shift_type: str, max_count: int, window_days: int = 0, note: str = "") -> int:
+    """
+    WINDOW / CONSECUTIVE kuralı ekler (aynı tip + vardiya + pencere varsa günceller
+    ve aktif eder). CONSECUTIVE için window_days kullanılmaz (0 yazılır).
+    """
+    if rule_kind not in ("WINDOW", "CONSECUTIVE"):
+        raise ValueError(f"Pencere kuralı değil: {rule_kind}")
+    window_days = 0 if rule_kind == "CONSECUTIVE" else int(window_days)
+    conn = ensure_rules_table()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT id FROM rules WHERE rule_kind=? AND next_type=? AND window_days=? ORDER BY id DESC LIMIT 1",
+        (rule_kind, shift_type, window_days),
+    )
+    row = cur.fetchone()
+    if row:
+        cur.execute(
+            "UPDATE rules SET max_count=?, note=?, is_active=1 WHERE id=?",
+            (int(max_count), note or "", int(row["id"])),
+        )
+        conn.commit()
+        return int(row["id"])
+    cur.execute(
+        """
+        INSERT INTO rules(prev_type, next_type, apply_day, is_active, note, rule_kind, max_count, window_days)
+        VALUES('ANY', ?, 'ANY', 1, ?, ?, ?, ?)
+        """,
+        (shift_type, note or "", rule_kind, int(max_count), window_days),
+    )
+    conn.commit()
+    return int(cur.lastrowid)
+
+def update_window_rule(rule_id: int, shift_type: str, max_count: int, window_days: int = 0, note: str = "", is_active: bool = True):
+    conn = ensure_rules_table()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        UPDATE rules
+        SET next_type=?, max_count=?, window_days=CASE WHEN rule_kind='CONSECUTIVE' THEN 0 ELSE ? END,
+            note=?, is_active=?
+        WHERE id=?
+        """,
+        (shift_type, int(max_count), int(window_days), note or "", 1 if is_active else 0, rule_id),
+    )
+    conn.commit()
+
+def set_rest_rule(rest_hours: int, note: str = "") -> int:
+    """
+    En az dinlenme kuralını yazar. Tek REST satırı tutulur (varsa güncellenir
+    ve aktif edilir); saatler vardiya tiplerinin başlangıç/bitişinden hesaplanır.
+    """
+    conn = ensure_rules_table()
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM rules WHERE rule_kind='REST' ORDER BY id DESC LIMIT 1")
+    row = cur.fetchone()
+    if row:
+        cur.execute(
+            "UPDATE rules SET rest_hours=?, note=?, is_active=1 WHERE id=?",
+            (int(rest_hours), note or "", int(row["id"])),
+        )
+        conn.commit()
+        return int(row["id"])
+    cur.execute(
+        """
+        INSERT INTO rules(prev_type, next_type, apply_day, is_active, note, rule_kind, rest_hours)
+        VALUES('ANY', 'ANY', 'ANY', 1, ?, 'REST', ?)
+        """,
+        (note or "", int(rest_hours)),
+    )
+    conn.commit()
+    return int(cur.lastrowid)
+
+def update_rest_rule(rule_id: int, rest_hours: int, note: str = "", is_active: bool = True):
+    conn = ensure_rules_table()
+    cur = conn.cursor()
+    cur.execute(
+        "UPDATE rules SET rest_hours=?, note=?, is_active=? WHERE id=?",
+        (int(rest_hours), note or "", 1 if is_active else 0, rule_id),
+    )
+    conn.commit()
+
+def add_coverage_rule(shift_type: str, skill_mask: int, min_count: int, note: str = "") -> int:
+    """
+    Yetkinlik kapsama kuralı ekler (aynı vardiya + maske varsa günceller ve aktif eder).
+    note validation mesajında yetkinlik etiketi olarak görünür (ör. "KIDEMLI").
+    """
+    conn = ensure_rules_table()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT id FROM rules WHERE rule_kind='COVERAGE' AND next_type=? AND skill_mask=? ORDER BY id DESC LIMIT 1",
+        (shift_type, int(skill_mask)),
+    )
+    row = cur.fetchone()
+    if row:
+        cur.execute(
+            "UPDATE rules SET min_count=?, note=?, is_active=1 WHERE id=?",
+            (int(min_count), note or "", int(row["id"])),
+        )
+        conn.commit()
+        return int(row["id"])
+    cur.execute(
+        """
+        INSERT INTO rules(prev_type, next_type, apply_day, is_active, note, rule_kind, skill_mask, min_count)
+        VALUES('ANY', ?, 'ANY', 1, ?, 'COVERAGE', ?, ?)
+        """,
+        (shift_type, note or "", int(skill_mask), int(min_count)),
+    )
+    conn.commit()
+    return int(cur.lastrowid)
+
+def update_coverage_rule(rule_id: int, min_count: int, note: str = "", is_active: bool = True):
+    conn = ensure_rules_table()
+    cur = conn.cursor()
+    cur.execute(
+        "UPDATE rules SET min_count=?, note=?, is_active=? WHERE id=?",
+        (int(min_count), note or "", 1 if is_active else 0, rule_id),
+    )
+    conn.commit()
+
 def list_rules(active_only: bool | None = None) -> List[Dict]:
     conn = ensure_rules_table()
     cur = conn.cursor()
@@ -1,9 +1,12 @@
+import heapq
+import random
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import date, timedelta
-from typing import Dict, List, Tuple, Set, Optional
+from typing import Callable, Dict, Iterator, List, Tuple, Set, Optional
 from collections import Counter
 
-from src.calendar_utils import iter_month_days
+from src.calendar_utils import DayTable, iter_month_days, month_day_table
 
 ShiftType = str  # 'DAY' | 'NIGHT' | 'D24' | 'RAPOR' | 'YILLIK_IZIN'
 
@@ -12,21 +15,178 @@ class Shift:
     day: str
     shift_type: ShiftType
 
-SHIFT_HOURS = {"DAY": 8, "NIGHT": 16, "D24": 24}
+# -------------------- VARDİYA TİPLERİ --------------------
+@dataclass(frozen=True)
+class ShiftTypeDef:
+    code: ShiftType
+    hours: int
+    start: str = "08:00"    # HH:MM
+    end: str = "16:00"      # başlangıçtan küçük/eşitse ertesi gün biter
+    color: str = "#000000"  # çizelge / Excel rengi
+
+DEFAULT_SHIFT_TYPES: Tuple[ShiftTypeDef, ...] = (
+    ShiftTypeDef("DAY", 8, "08:00", "16:00", "#2F75B5"),
+    ShiftTypeDef("NIGHT", 16, "16:00", "08:00", "#C9A100"),
+    ShiftTypeDef("D24", 24, "08:00", "08:00", "#2E8B57"),
+)
+
+def _minutes(hhmm: str) -> int:
+    h, m = str(hhmm).split(":")[:2]
+    return int(h) * 60 + int(m)
+
+class ShiftRegistry:
+    """
+    Kayıtlı vardiya tiplerinin derlenmiş hali: tip -> küçük tamsayı kod
+    (geçiş tablosu kodlarının ilk kısmı bunlardır); saat, başlangıç ve bitiş
+    dakikası, renk kod indeksli dizilerdir. Bitiş dakikası başlangıca göredir
+    (gece yarısını geçen vardiyada > 1440).
+    """
 
-def build_required_shifts(year: int, month: int) -> List[Shift]:
-    shifts: List[Shift] = []
-    days = iter_month_days(year, month)
-    for d in days:
-        if d.is_weekend:
-            for _ in range(12):
-                shifts.append(Shift(d.iso, "D24"))
-        else:
-            for _ in range(12):
-                shifts.append(Shift(d.iso, "DAY"))
-            for _ in range(12):
-                shifts.append(Shift(d.iso, "NIGHT"))
-    return shifts
+    def __init__(self, types: Tuple[ShiftTypeDef, ...]):
+        self.types = types
+        self.names: Tuple[ShiftType, ...] = tuple(t.code for t in types)
+        self.codes: Dict[ShiftType, int] = {name: i for i, name in enumerate(self.names)}
+        self.hours: List[int] = [int(t.hours) for t in types]
+        self.start_min: List[int] = [_minutes(t.start) for t in types]
+        self.end_min: List[int] = []
+        for t, start in zip(types, self.start_min):
+            end = _minutes(t.end)
+            self.end_min.append(end if end > start else end + 1440)
+        self.colors: List[str] = [t.color for t in types]
+
+    def code(self, stype: ShiftType | None) -> int:
+        return self.codes.get(stype, -1)
+
+    def hours_of(self, stype: ShiftType | None) -> int:
+        c = self.codes.get(stype)
+        return self.hours[c] if c is not None else 0
+
+    def color_of(self, stype: ShiftType | None, default: str = "") -> str:
+        c = self.codes.get(stype)
+        return self.colors[c] if c is not None else default
+
+@lru_cache(maxsize=8)
+def _registry_for(types: Tuple[ShiftTypeDef, ...]) -> ShiftRegistry:
+    return ShiftRegistry(types)
+
+_REGISTRY = _registry_for(DEFAULT_SHIFT_TYPES)
+
+def shift_registry() -> ShiftRegistry:
+    return _REGISTRY
+
+def set_shift_types(types: List[Dict] | Tuple[ShiftTypeDef, ...] | None) -> ShiftRegistry:
+    """
+    Kayıtlı vardiya tiplerini kurar (uygulama başlangıcında DB'den).
+    types: ShiftTypeDef'ler ya da {"code", "hours", "start_time", "end_time", "color"}
+    satırları; boş/None ise varsayılan DAY/NIGHT/D24.
+    """
+    global _REGISTRY
+    defs = tuple(
+        t if isinstance(t, ShiftTypeDef) else ShiftTypeDef(
+            str(t["code"]), int(t["hours"]), str(t["start_time"]), str(t["end_time"]), str(t.get("color") or "#000000"),
+        )
+        for t in (types or ())
+    )
+    _REGISTRY = _registry_for(defs or DEFAULT_SHIFT_TYPES)
+    return _REGISTRY
+
+class SolveHooks:
+    """
+    Uzun süren fazlar (greedy / repair / iyileştirme) için durdurma ve
+    ilerleme kancaları. Varsayılan hiçbir şey yapmaz; solver.solve_anytime
+    süre sınırı, iptal ve ilerleme bildirimi için bunu alt sınıflar.
+    """
+
+    def should_stop(self) -> bool:
+        return False
+
+    def progress(self, phase: str, **info) -> None:
+        pass
+
+    def time_left(self, budget_s: float) -> float:
+        """İyileştirme fazına kalan süre; repair bittikten sonra çağrılır."""
+        return budget_s
+
+# kancaların yoklama aralıkları (faz kendi iş biriminde sayar). Birimlerin
+# maliyeti farklı olduğundan aralıklar da farklı: greedy hücresi (gün, tip) tüm
+# personeli puanlayıp ihtiyaç kadar slot doldurur, repair adımı bir bağışçı
+# araması yapar, iyileştirme hamlesi O(1) deltadır. Üçünde de iki yoklama
+# arası birkaç milisaniyeyi geçmez (40 kişi / bir ay).
+HOOK_EVERY_GREEDY_CELLS = 4
+HOOK_EVERY_REPAIR_ITERS = 16
+HOOK_EVERY_IMPROVE_ITERS = 256
+
+# -------------------- İHTİYAÇ (DEMAND) --------------------
+# Gün deseni -> vardiya tipi -> kişi sayısı. Hafta sonu tatili WEEKEND desenini
+# alır; HOLIDAY sadece hafta içine denk gelen tatillerde kullanılır (tanımlı
+# değilse WEEKDAY ile aynıdır).
+DEMAND_KINDS = ("WEEKDAY", "WEEKEND", "HOLIDAY")
+DEFAULT_DEMAND: Tuple[Tuple[str, ShiftType, int], ...] = (
+    ("WEEKDAY", "DAY", 12),
+    ("WEEKDAY", "NIGHT", 12),
+    ("WEEKEND", "D24", 12),
+    ("HOLIDAY", "DAY", 12),
+    ("HOLIDAY", "NIGHT", 12),
+)
+
+@lru_cache(maxsize=32)
+def _compiled_demand(rows: Tuple[Tuple[str, ShiftType, int], ...]) -> Dict[str, Tuple[Tuple[ShiftType, int], ...]]:
+    pattern: Dict[str, Dict[ShiftType, int]] = {}
+    for kind, stype, k in rows:
+        cell = pattern.setdefault(kind, {})
+        cell[stype] = cell.get(stype, 0) + k
+    if "HOLIDAY" not in pattern:
+        pattern["HOLIDAY"] = pattern.get("WEEKDAY", {})
+    return {
+        kind: tuple((stype, k) for stype, k in pattern.get(kind, {}).items() if k > 0)
+        for kind in DEMAND_KINDS
+    }
+
+def _compile_demand(demand: List[Dict] | None) -> Dict[str, Tuple[Tuple[ShiftType, int], ...]]:
+    """İhtiyaç satırlarının önbellekli derlemesi; boş/None ise varsayılan (12'şer kişi)."""
+    if not demand:
+        return _compiled_demand(DEFAULT_DEMAND)
+    rows = tuple((str(r["day_kind"]), str(r["shift_type"]), int(r["count"])) for r in demand)
+    return _compiled_demand(rows)
+
+def _demand_kind(cal: DayTable, di: int) -> str:
+    if cal.is_weekend[di]:
+        return "WEEKEND"
+    return "HOLIDAY" if cal.is_holiday[di] else "WEEKDAY"
+
+def _demand_cells(cal: DayTable, demand: List[Dict] | None = None) -> List[Tuple[int, ShiftType, int]]:
+    """Takvim sırasıyla ihtiyaç hücreleri: (gün indeksi, vardiya, kişi sayısı)."""
+    pattern = _compile_demand(demand)
+    cells: List[Tuple[int, ShiftType, int]] = []
+    for di in range(len(cal)):
+        for stype, k in pattern[_demand_kind(cal, di)]:
+            cells.append((di, stype, k))
+    return cells
+
+def build_required_shifts(
+    year: int,
+    month: int,
+    demand: List[Dict] | None = None,
+    holidays: Optional[Set[str]] = None,
+) -> List[Shift]:
+    """Ayın tüm slotları, kişi başına bir Shift (rapor/sayım için)."""
+    cal = month_day_table(year, month, holidays)
+    return [Shift(cal.isos[di], stype) for di, stype, k in _demand_cells(cal, demand) for _ in range(k)]
+
+def _unfilled_slots(
+    cal: DayTable,
+    assignments: List[Tuple[str, ShiftType, int]],
+    demand: List[Dict] | None = None,
+) -> List[Shift]:
+    """Ay ihtiyacından atamalarla karşılanan slotlar düşülünce kalanlar (takvim sırasıyla)."""
+    have = Counter((d, stype) for d, stype, _sid in assignments)
+    out: List[Shift] = []
+    for di, stype, k in _demand_cells(cal, demand):
+        key = (cal.isos[di], stype)
+        missing = k - have[key]
+        if missing > 0:
+            out.extend([Shift(*key)] * missing)
+    return out
 
 def _prev_day_iso(day_iso: str) -> str:
     return (date.fromisoformat(day_iso) - timedelta(days=1)).isoformat()
@@ -34,8 +194,19 @@ def _prev_day_iso(day_iso: str) -> str:
 def _is_weekend(day_iso: str) -> bool:
     return date.fromisoformat(day_iso).weekday() >= 5
 
-def _day_kind(day_iso: str) -> str:
-    return "WEEKEND" if _is_weekend(day_iso) else "WEEKDAY"
+def _blocked_prev_type(t: Optional[str]) -> ShiftType | None:
+    if t == "rapor":
+        return "RAPOR"
+    if t == "yillik_izin":
+        return "YILLIK_IZIN"
+    return None
+
+def _block_reason(t: Optional[str]) -> str:
+    if t == "rapor":
+        return "RAPORLU"
+    if t == "yillik_izin":
+        return "IZINLI"
+    return "HARD_BLOCK"  # hard istek / başka blocker
 
 def _get_prev_shift_type(
     staff_id: int,
@@ -47,11 +218,9 @@ def _get_prev_shift_type(
 
     # Dün rapor/izin miydi?
     if blocked_type is not None:
-        t = blocked_type.get(staff_id, {}).get(prev)
-        if t == "rapor":
-            return "RAPOR"
-        if t == "yillik_izin":
-            return "YILLIK_IZIN"
+        t = _blocked_prev_type(blocked_type.get(staff_id, {}).get(prev))
+        if t is not None:
+            return t
 
     # Dün vardiya aldı mı?
     for sid, stype in assigned_by_day.get(prev, []):
@@ -59,25 +228,318 @@ def _get_prev_shift_type(
             return stype
     return None
 
-def _match(rule_val: str, actual: str) -> bool:
-    return rule_val == "ANY" or rule_val == actual
-
-def _match_day(rule_day: str, cur_day_iso: str) -> bool:
+def _match_day(rule_day: str, day_kind: str) -> bool:
     if rule_day == "ANY":
         return True
-    return rule_day == _day_kind(cur_day_iso)
+    return rule_day == day_kind
+
+DAY_KINDS = ("WEEKDAY", "WEEKEND")
+_BLOCK_TYPES = ("RAPOR", "YILLIK_IZIN")
+# rules.rule_kind: TRANSITION = prev_type -> next_type yasağı,
+# WINDOW = herhangi window_days günde en fazla max_count next_type,
+# CONSECUTIVE = en fazla max_count gün üst üste next_type (ANY: çalışma günü),
+# REST = bir vardiyanın bitişi ile sonrakinin başlangıcı arasında en az rest_hours saat,
+# COVERAGE = her next_type vardiyasında en az min_count kişi skill_mask yetkinliğinde
+RULE_KINDS = ("TRANSITION", "WINDOW", "CONSECUTIVE", "REST", "COVERAGE")
+
+class _WindowRule:
+    """
+    Derlenmiş pencere kuralı: match[kod] -> bu vardiya sayılır mı.
+    CONSECUTIVE N kuralı "her N+1 günde en fazla N" ile aynıdır; tek sayaç
+    yapısı ikisini de karşılar (kind sadece raporlama için tutulur).
+    """
+
+    __slots__ = ("kind", "stype", "max_count", "days", "match")
+
+    def __init__(self, kind: str, stype: str, max_count: int, days: int, match: bytearray):
+        self.kind = kind
+        self.stype = stype
+        self.max_count = max_count
+        self.days = days
+        self.match = match
+
+    def detail(self, peak: int) -> str:
+        what = "çalışma günü" if self.stype == "ANY" else self.stype
+        if self.kind == "CONSECUTIVE":
+            return f"Ardışık gün ihlali: {peak} gün üst üste {what} (en fazla {self.max_count})"
+        return f"Pencere ihlali: {self.days} günde {peak} {what} (en fazla {self.max_count})"
+
+class _TransitionTable:
+    """
+    Aktif geçiş kurallarının derlenmiş hali: (prev kodu, next kodu, gün tipi)
+    -> yasak mı. Kodlar önce kayıtlı vardiya tipleri (ShiftRegistry ile aynı),
+    sonra RAPOR / YILLIK_IZIN ve kurallarda geçen diğer tiplerdir. Adı hiç
+    geçmeyen tipler ortak "diğer" koduna düşer; onlara sadece ANY kuralları uyar.
+    hours[kod]: vardiya saati (kayıtlı olmayanlar 0).
+    windows: pencere / ardışık gün kuralları (_WindowRule).
+    min_rest: en az dinlenme (dakika, 0 = kural yok); start_min / end_min
+    kayıtlı tiplerin gün başına göre dakikalarıdır (kod < n_timed).
+    rest_span: dinlenme için bakılacak komşu gün sayısı; vardiya en fazla 24
+    saat sürdüğünden k gün önceki vardiya ancak min_rest > (k-2)*24 saatse
+    çakışabilir -> 11 saatlik kuralda 2 gün.
+    coverage: yetkinlik sayaç yuvaları [(skill_mask, min_count, etiket)];
+    cover_by_code[kod]: o vardiyanın yuvaları [(yuva no, skill_mask, min_count)].
+    """
 
-def _violates_transition_rules(prev: ShiftType | None, cur: ShiftType, cur_day_iso: str, transition_rules: List[Dict]) -> bool:
-    if prev is None:
+    def __init__(
+        self,
+        rule_rows: Tuple[Tuple[str, str, str], ...],
+        registry: ShiftRegistry,
+        window_rows: Tuple[Tuple[str, str, int, int], ...] = (),
+        min_rest: int = 0,
+        cover_rows: Tuple[Tuple[str, int, int, str], ...] = (),
+    ):
+        names = list(registry.names) + [t for t in _BLOCK_TYPES if t not in registry.codes]
+        for prev_t, next_t, _day in rule_rows:
+            for t in (prev_t, next_t):
+                if t != "ANY" and t not in names:
+                    names.append(t)
+        for _kind, t, _n, _k in window_rows:
+            if t != "ANY" and t not in names:
+                names.append(t)
+        for t, _mask, _n, _label in cover_rows:
+            if t != "ANY" and t not in names:
+                names.append(t)
+        self.codes: Dict[str, int] = {t: i for i, t in enumerate(names)}
+        self.other = len(names)
+        self.n = len(names) + 1
+        n = self.n
+        self.hours: List[int] = registry.hours + [0] * (n - len(registry.hours))
+        table = bytearray(n * n * 2)
+        for prev_t, next_t, apply_day in rule_rows:
+            kinds = [k for k, name in enumerate(DAY_KINDS) if _match_day(apply_day, name)]
+            prevs = range(n) if prev_t == "ANY" else [self.codes[prev_t]]
+            nexts = range(n) if next_t == "ANY" else [self.codes[next_t]]
+            for pc in prevs:
+                for nc in nexts:
+                    for k in kinds:
+                        table[(pc * n + nc) * 2 + k] = 1
+        self.table = table
+        self.windows: List[_WindowRule] = []
+        for kind, t, max_count, days in window_rows:
+            if t == "ANY":
+                match = bytearray([1]) * n
+            else:
+                match = bytearray(n)
+                match[self.codes[t]] = 1
+            self.windows.append(_WindowRule(kind, t, max_count, days, match))
+        self.n_timed = len(registry.names)
+        self.start_min = registry.start_min
+        self.end_min = registry.end_min
+        # gece vardiyası: gece yarısını geçen kayıtlı tipler (adil dağılım defteri için)
+        self.night = bytearray(1 if c < self.n_timed and self.end_min[c] > 1440 else 0 for c in range(n))
+        self.min_rest = min_rest
+        self.rest_span = 1 + -(-min_rest // 1440) if min_rest > 0 else 0
+        # ay başında geriye bakılacak gün sayısı (boundary bu kadar gün taşımalı)
+        self.lookback = max([1, self.rest_span] + [w.days - 1 for w in self.windows])
+        # sayaç yuvası (vardiya, kural) başına: ANY kuralı her kayıtlı tip için ayrı sayılır
+        self.coverage: List[Tuple[int, int, str]] = []
+        self.cover_by_code: List[List[Tuple[int, int, int]]] = [[] for _ in range(n)]
+        for t, mask, min_count, label in cover_rows:
+            for c in (range(len(registry.names)) if t == "ANY" else [self.codes[t]]):
+                self.cover_by_code[c].append((len(self.coverage), mask, min_count))
+                self.coverage.append((mask, min_count, label))
+
+    def code(self, t: ShiftType | None) -> int:
+        if t is None:
+            return -1
+        return self.codes.get(t, self.other)
+
+    def forbidden(self, prev_code: int, cur_code: int, kind: int) -> bool:
+        if prev_code < 0:
+            return False
+        return self.table[(prev_code * self.n + cur_code) * 2 + kind] == 1
+
+@lru_cache(maxsize=32)
+def _compiled_rules(
+    rule_rows: Tuple[Tuple[str, str, str], ...],
+    types: Tuple[ShiftTypeDef, ...],
+    window_rows: Tuple[Tuple[str, str, int, int], ...] = (),
+    min_rest: int = 0,
+    cover_rows: Tuple[Tuple[str, int, int, str], ...] = (),
+) -> _TransitionTable:
+    return _TransitionTable(rule_rows, _registry_for(types), window_rows, min_rest, cover_rows)
+
+def _compile_transition_rules(transition_rules: List[Dict] | None) -> _TransitionTable:
+    """
+    Kural satırları + kayıtlı vardiya tiplerine göre önbellekli derleme (aynı girdi -> aynı tablo).
+    rule_kind'ı olmayan satırlar (eski kayıtlar / presetler) geçiş kuralıdır.
+    """
+    rows = []
+    windows = []
+    min_rest = 0
+    covers = []
+    for r in transition_rules or []:
+        kind = str(r.get("rule_kind") or "TRANSITION")
+        if kind == "TRANSITION":
+            rows.append((str(r["prev_type"]), str(r["next_type"]), str(r.get("apply_day", "ANY"))))
+            continue
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Bilinmeyen kural tipi: {kind}")
+        if kind == "REST":
+            min_rest = max(min_rest, int(r.get("rest_hours") or 0) * 60)  # birden çoksa en sıkısı
+            continue
+        if kind == "COVERAGE":
+            mask, min_count = int(r.get("skill_mask") or 0), int(r.get("min_count") or 0)
+            if mask and min_count > 0:
+                label = str(r.get("note") or "") or f"yetkinlik {mask:#b}"
+                covers.append((str(r["next_type"]), mask, min_count, label))
+            continue
+        max_count = int(r.get("max_count") or 0)
+        if kind == "CONSECUTIVE":
+            days = max_count + 1
+        else:
+            days = int(r.get("window_days") or 0)
+        if max_count < 1 or days < 2:
+            continue  # anlamsız / eksik satır: kısıt değil
+        windows.append((kind, str(r["next_type"]), max_count, days))
+    return _compiled_rules(tuple(rows), _REGISTRY.types, tuple(windows), min_rest, tuple(covers))
+
+def rule_lookback_days(transition_rules: List[Dict] | None) -> int:
+    """Kuralların ay başından geriye baktığı gün sayısı (boundary için list_days_before'a verilir)."""
+    return _compile_transition_rules(transition_rules).lookback
+
+# -------------------- KISIT ÇEKİRDEĞİ --------------------
+# can_assign (fizibilite), explain (neden) ve validate (toplu doğrulama) aynı
+# çekirdekten geçer; yeni bir hard kural sadece burada eklenir.
+V_BLOCKED = 1
+V_SAME_DAY = 2
+V_TRANSITION = 4
+V_WINDOW = 8
+V_REST = 16
+V_HOURS = 32
+
+def _check(
+    tt: "_TransitionTable",
+    kind: int,
+    cur_code: int,
+    blocked: bool,
+    same_day: bool,
+    prev_code: int,
+    next_code: int = -1,
+    next_kind: int = 0,
+    first: bool = True,
+    window: bool = False,
+    rest: bool = False,
+    hours: bool = False,
+) -> int:
+    """
+    İhlal bit maskesi döndürür (0 = uygun).
+    same_day : kişinin o gün (bu atama dışında) başka vardiyası var
+    next_code: ertesi gün zaten atanmışsa onun kodu (takvim dışı sıralı yollar için)
+    window   : bir pencere / ardışık gün kuralı doluyor (sayaçlar çağıranda)
+    rest     : komşu vardiyalarla arada en az dinlenme süresi kalmıyor
+    hours    : kişinin üst saat sınırı (+ kalan fazla mesai havuzu) aşılıyor
+    first    : True -> ilk ihlalde dur (fizibilite/explain), False -> tüm bitler (validate)
+    """
+    mask = 0
+    if blocked:
+        if first:
+            return V_BLOCKED
+        mask |= V_BLOCKED
+    if same_day:
+        if first:
+            return V_SAME_DAY
+        mask |= V_SAME_DAY
+    if tt.forbidden(prev_code, cur_code, kind) or (next_code >= 0 and tt.forbidden(cur_code, next_code, next_kind)):
+        mask |= V_TRANSITION
+    if window:
+        mask |= V_WINDOW
+    if rest:
+        mask |= V_REST
+    if hours:
+        mask |= V_HOURS
+    return mask
+
+def _explain_mask(mask: int, block_type: Optional[str]) -> List[str]:
+    if mask & V_BLOCKED:
+        return [_block_reason(block_type)]
+    if mask & V_SAME_DAY:
+        return ["AYNI_GUN_ZATEN_ATANMIS"]
+    if mask & V_TRANSITION:
+        return ["GECIS_KURALI_IHLALI"]
+    if mask & V_WINDOW:
+        return ["PENCERE_KURALI_IHLALI"]
+    if mask & V_REST:
+        return ["DINLENME_SURESI_IHLALI"]
+    if mask & V_HOURS:
+        return ["MAX_SAAT_ASIMI"]
+    # burada hala atanamıyorsa, can_assign True olmalıydı
+    return ["BILINMEYEN"]
+
+def _iso_check(
+    staff_id: int,
+    shift: Shift,
+    assigned_by_day: Dict[str, List[Tuple[int, ShiftType]]],
+    blocked_any: Dict[int, Set[str]],
+    transition_rules: List[Dict] | None,
+    blocked_type: Optional[Dict[int, Dict[str, str]]],
+) -> int:
+    """ISO/assigned_by_day tabanlı public API için çekirdek girdilerini toplar."""
+    tt = _compile_transition_rules(transition_rules)
+    day = shift.day
+    blocked = day in blocked_any.get(staff_id, set())
+    same = any(sid == staff_id for sid, _s in assigned_by_day.get(day, []))
+    prev = _get_prev_shift_type(staff_id, day, assigned_by_day, blocked_type=blocked_type)
+    cur = tt.code(shift.shift_type)
+    # ertesi gün zaten atanmışsa d -> d+1 geçişi de (_MonthState.check ile aynı)
+    nxt = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+    next_code = next((tt.code(t) for sid, t in assigned_by_day.get(nxt, []) if sid == staff_id), -1)
+    return _check(tt, 1 if _is_weekend(day) else 0, cur, blocked, same, tt.code(prev),
+                  next_code, 1 if _is_weekend(nxt) else 0,
+                  window=_iso_window_hit(tt, staff_id, day, cur, assigned_by_day),
+                  rest=_iso_rest_hit(tt, staff_id, day, cur, assigned_by_day))
+
+def _iso_rest_hit(
+    tt: "_TransitionTable",
+    staff_id: int,
+    day_iso: str,
+    cur_code: int,
+    assigned_by_day: Dict[str, List[Tuple[int, ShiftType]]],
+) -> bool:
+    """ISO API yolu için dinlenme kontrolü: günün iki yanındaki rest_span gün."""
+    if not tt.min_rest or cur_code >= tt.n_timed:
         return False
+    d0 = date.fromisoformat(day_iso)
+    start, end = tt.start_min[cur_code], tt.end_min[cur_code]
+    for off in range(-tt.rest_span, tt.rest_span + 1):
+        if off == 0:
+            continue
+        iso = (d0 + timedelta(days=off)).isoformat()
+        for sid, t in assigned_by_day.get(iso, []):
+            c = tt.code(t)
+            if sid != staff_id or c >= tt.n_timed:
+                continue
+            if off < 0:
+                gap = start - (off * 1440 + tt.end_min[c])
+            else:
+                gap = off * 1440 + tt.start_min[c] - end
+            if gap < tt.min_rest:
+                return True
+    return False
 
-    for r in transition_rules:
-        apply_day = r.get("apply_day", "ANY")
-        if not _match_day(apply_day, cur_day_iso):
+def _iso_window_hit(
+    tt: "_TransitionTable",
+    staff_id: int,
+    day_iso: str,
+    cur_code: int,
+    assigned_by_day: Dict[str, List[Tuple[int, ShiftType]]],
+) -> bool:
+    """ISO API yolu için pencere kontrolü: sayaç yok, günün etrafındaki K-1 gün taranır."""
+    if not tt.windows:
+        return False
+    d0 = date.fromisoformat(day_iso)
+    for rule in tt.windows:
+        if not rule.match[cur_code]:
             continue
-        if _match(r["prev_type"], prev) and _match(r["next_type"], cur):
+        k = rule.days
+        hits = []
+        for off in range(-k + 1, k):
+            iso = (d0 + timedelta(days=off)).isoformat()
+            hits.append(sum(1 for sid, t in assigned_by_day.get(iso, []) if sid == staff_id and rule.match[tt.code(t)]))
+        hits[k - 1] += 1
+        if any(sum(hits[s:s + k]) > rule.max_count for s in range(k)):
             return True
-
     return False
 
 def can_assign(
@@ -88,25 +550,353 @@ def can_assign(
     transition_rules: List[Dict] | None = None,
     blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
 ) -> bool:
-    transition_rules = transition_rules or []
-    day = shift.day
-    stype = shift.shift_type
+    return _iso_check(staff_id, shift, assigned_by_day, blocked_any, transition_rules, blocked_type) == 0
+# -------------------- /KISIT ÇEKİRDEĞİ --------------------
 
-    # Hard block
-    if day in blocked_any.get(staff_id, set()):
-        return False
+# -------------------- GÜN-İNDEKSLİ DURUM --------------------
+# boş gün zaman damgaları: karşılaştırmalar dalsız kalsın diye uç değerler
+_NO_START = 1 << 40
+_NO_END = -(1 << 40)
 
-    # aynı gün çift vardiya yok
-    for sid, _s in assigned_by_day.get(day, []):
-        if sid == staff_id:
-            return False
+class _WindowCounter:
+    """
+    Bir kişi x bir pencere kuralı için artımlı sayaçlar. Gün g = di + off
+    (off = K-1: tablonun önündeki boundary günleri de sayılır).
+    - cnt[s] : s'de başlayan K günlük penceredeki sayılan vardiya sayısı
+    - peak[g]: g'yi içeren pencerelerin en doludur -> aday kontrolü O(1)
+    Atama/geri alma sadece değişen ~2K günü günceller; geçmiş yeniden taranmaz.
+    """
 
-    prev = _get_prev_shift_type(staff_id, day, assigned_by_day, blocked_type=blocked_type)
+    __slots__ = ("k", "off", "cnt", "peak")
+
+    def __init__(self, k: int, n_days: int):
+        self.k = k
+        self.off = k - 1
+        self.cnt = [0] * (self.off + n_days)
+        self.peak = [0] * (self.off + n_days)
+
+    def add(self, g: int, delta: int) -> None:
+        k = self.k
+        cnt = self.cnt
+        lo = max(0, g - k + 1)
+        for s in range(lo, g + 1):
+            cnt[s] += delta
+        peak = self.peak
+        for h in range(lo, min(len(cnt), g + k)):
+            peak[h] = max(cnt[max(0, h - k + 1):h + 1])
+
+class _MonthState:
+    """
+    Scheduler çekirdeğinin ay durumu. Günler DayTable indeksleridir (0..n-1);
+    ISO string'e sadece API sınırında (çıktı/girdi) dönülür.
+
+    - shift_of[sid][di]  : o gün atanan vardiya (yoksa None)
+    - code_of[sid][di]   : aynı vardiyanın geçiş tablosu kodu (yoksa -1)
+    - blocked[sid][di]   : hard block (rapor/izin/onaylı HARD istek)
+    - count_of[sid][di]  : o gün kişiye yazılmış vardiya sayısı (doğrulama için >1 olabilir)
+    - prev_block[sid][di]: önceki gün plan dışı sabit bir şey varsa kodu (yoksa -1):
+                           rapor/izin ya da ay başında önceki ayın vardiyası (boundary)
+    - windows[sid][r]    : r. pencere kuralının sayaçları (_WindowCounter); ay
+                           başındaki pencereler boundary'deki önceki günleri de sayar
+    - start_ts / end_ts  : dinlenme kuralı varsa kişinin o günkü vardiyasının
+                           başlangıç / bitişi, tablo başından dakika (tamsayı);
+                           iki yanda rest_span gün pay (sol pay boundary'den dolar)
+    - skills[sid]        : kişinin yetkinlik bit maskesi (yoksa 0)
+    - cover_cnt[di*R + r]: di günü r. yetkinlik yuvasının (vardiya, kural) o
+                           yetkinliği taşıyan atanmış kişi sayısı (atama/geri almada güncellenir)
+    - worked[sid]        : kişinin durumdaki toplam saati (atama/geri almada güncellenir)
+    - max_hours[sid]     : üst saat sınırı (yoksa sınırsız); sınırı aşan saatler ortak
+                           fazla mesai havuzundan (overtime_budget) düşer, overtime_used
+                           havuzun kullanılan kısmıdır -> sınır kontrolü O(1)
+    """
 
-    if _violates_transition_rules(prev, stype, day, transition_rules):
+    def __init__(
+        self,
+        cal: DayTable,
+        staff_ids: List[int],
+        blocked_any: Dict[int, Set[str]],
+        transition_rules: List[Dict] | None = None,
+        blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
+        boundary: Optional[List[Tuple[str, ShiftType, int]]] = None,
+        skills: Optional[Dict[int, int]] = None,
+        max_hours: Optional[Dict[int, int]] = None,
+        overtime_budget: int = 0,
+    ):
+        self.cal = cal
+        self.n_days = len(cal.isos)
+        self.kinds = [1 if w else 0 for w in cal.is_weekend]
+        self.tt = _compile_transition_rules(transition_rules)
+        self.blocked_any = blocked_any
+        self.blocked_type = blocked_type or {}
+        # tablodan önceki günlerin (önceki ay) vardiyaları: sid -> {iso: vardiya}
+        self.boundary: Dict[int, Dict[str, ShiftType]] = {}
+        for d, stype, sid in boundary or ():
+            self.boundary.setdefault(int(sid), {})[d] = stype
+        self.by_day: List[List[Tuple[int, ShiftType]]] = [[] for _ in range(self.n_days)]
+        self.n_assigned = 0
+        self.shift_of: Dict[int, List[Optional[ShiftType]]] = {}
+        self.code_of: Dict[int, List[int]] = {}
+        self.count_of: Dict[int, List[int]] = {}
+        self.blocked: Dict[int, bytearray] = {}
+        self.prev_block: Dict[int, List[int]] = {}
+        self.windows: Dict[int, List[_WindowCounter]] = {}
+        self.start_ts: Dict[int, List[int]] = {}
+        self.end_ts: Dict[int, List[int]] = {}
+        self.skills: Dict[int, int] = skills or {}
+        self.cover_cnt: List[int] = [0] * (self.n_days * len(self.tt.coverage))
+        self.worked: Dict[int, int] = {}
+        self.max_hours: Dict[int, int] = max_hours or {}
+        self.overtime_budget = int(overtime_budget)
+        self.overtime_used = 0
+        for sid in staff_ids:
+            self._ensure(sid)
+
+    def _ensure(self, sid: int) -> None:
+        if sid in self.shift_of:
+            return
+        n = self.n_days
+        bset = self.blocked_any.get(sid, ())
+        btype = self.blocked_type.get(sid, {})
+        code = self.tt.code
+        self.shift_of[sid] = [None] * n
+        self.code_of[sid] = [-1] * n
+        self.count_of[sid] = [0] * n
+        self.worked[sid] = 0
+        self.blocked[sid] = bytearray(1 if iso in bset else 0 for iso in self.cal.isos)
+        bnd = self.boundary.get(sid, {})
+        prev = self.cal.prev
+        self.prev_block[sid] = [
+            code(_blocked_prev_type(btype.get(p)) or (bnd.get(p) if prev[di] < 0 else None))
+            for di, p in enumerate(self.cal.prev_isos)
+        ]
+        rules = self.tt.windows
+        counters = [_WindowCounter(rule.days, n) for rule in rules]
+        self.windows[sid] = counters
+        if rules and bnd:
+            first = date.fromisoformat(self.cal.isos[0])
+            for iso, stype in bnd.items():
+                back = (first - date.fromisoformat(iso)).days
+                c = code(stype)
+                for rule, wc in zip(rules, counters):
+                    if 1 <= back <= wc.off and rule.match[c]:
+                        wc.add(wc.off - back, 1)
+        span = self.tt.rest_span
+        if span:
+            self.start_ts[sid] = [_NO_START] * (n + 2 * span)
+            self.end_ts[sid] = [_NO_END] * (n + 2 * span)
+            first = date.fromisoformat(self.cal.isos[0])
+            for iso, stype in bnd.items():
+                back = (first - date.fromisoformat(iso)).days
+                if 1 <= back <= span:
+                    self._stamp(sid, -back, code(stype))
+
+    def n_shifts(self, sid: int, weekend: bool = False) -> int:
+        """Kişinin durumdaki vardiya sayısı (weekend=True: sadece hafta sonu günleri)."""
+        row = self.count_of.get(sid)
+        if row is None:
+            return 0
+        if not weekend:
+            return sum(row)
+        return sum(c for c, k in zip(row, self.kinds) if k)
+
+    def prev_code(self, sid: int, di: int) -> int:
+        c = self.prev_block[sid][di]
+        if c >= 0:
+            return c
+        p = self.cal.prev[di]
+        if p < 0:
+            return -1
+        return self.code_of[sid][p]
+
+    def prev_type(self, sid: int, di: int) -> ShiftType | None:
+        t = _blocked_prev_type(self.blocked_type.get(sid, {}).get(self.cal.prev_isos[di]))
+        if t is not None:
+            return t
+        p = self.cal.prev[di]
+        if p < 0:
+            return self.boundary.get(sid, {}).get(self.cal.prev_isos[di])
+        return self.shift_of[sid][p]
+
+    def _stamp(self, sid: int, di: int, c: int) -> None:
+        """di günündeki vardiya zamanlarını yazar (c < 0 ya da saatsiz tip: boş)."""
+        tt = self.tt
+        g = di + tt.rest_span
+        if 0 <= c < tt.n_timed:
+            self.start_ts[sid][g] = di * 1440 + tt.start_min[c]
+            self.end_ts[sid][g] = di * 1440 + tt.end_min[c]
+        else:
+            self.start_ts[sid][g] = _NO_START
+            self.end_ts[sid][g] = _NO_END
+
+    def rest_gap(self, sid: int, di: int, cur_code: int, existing: bool = False) -> Optional[int]:
+        """
+        cur_code di'ye konursa önceki vardiyanın bitişi -> bu başlangıç ve bu
+        bitiş -> sonraki başlangıç aralıklarının en kısası (dakika), en az
+        dinlenmeden kısaysa; değilse None. existing=True: sadece önceki yön
+        (doğrulamada her ihlal bir kez raporlanır).
+        """
+        tt = self.tt
+        if not tt.min_rest or cur_code >= tt.n_timed:
+            return None
+        span = tt.rest_span
+        g = di + span
+        base = di * 1440
+        gap = base + tt.start_min[cur_code] - max(self.end_ts[sid][g - span:g])
+        if not existing:
+            gap = min(gap, min(self.start_ts[sid][g + 1:g + span + 1]) - base - tt.end_min[cur_code])
+        return gap if gap < tt.min_rest else None
+
+    def cover_short(self, di: int, cur_code: int) -> List[Tuple[int, int]]:
+        """(di, cur_code) hücresinde karşılanmamış yetkinlikler [(skill_mask, eksik kişi)]."""
+        rules = self.tt.cover_by_code[cur_code] if self.tt.coverage else ()
+        base = di * len(self.tt.coverage)
+        cnt = self.cover_cnt
+        return [(mask, need - cnt[base + r]) for r, mask, need in rules if cnt[base + r] < need]
+
+    def cover_keeps(self, out_sid: int, in_sid: int, di: int, cur_code: int) -> bool:
+        """Hücrede out_sid yerine in_sid geçerse yetkinlik sayısı minimumun altına düşmez mi."""
+        if not self.tt.coverage:
+            return True
+        base = di * len(self.tt.coverage)
+        m_out = self.skills.get(out_sid, 0)
+        m_in = self.skills.get(in_sid, 0)
+        for r, mask, need in self.tt.cover_by_code[cur_code]:
+            if m_out & mask == mask and m_in & mask != mask and self.cover_cnt[base + r] <= need:
+                return False
+        return True
+
+    def seat_ok(self, short: List[Tuple[int, int]], seats: int, sid: int) -> bool:
+        """
+        Hücrenin kalan seats koltuğundan biri sid'e verilirse yetkinlik açıkları
+        kalan koltuklara hâlâ sığar mı (açık yoksa her zaman True).
+        """
+        if not short:
+            return True
+        m = self.skills.get(sid, 0)
+        left = sum(need - 1 if m & mask == mask else need for mask, need in short)
+        return left <= seats - 1
+
+    def _count_cover(self, sid: int, di: int, cur_code: int, delta: int) -> None:
+        m = self.skills.get(sid, 0)
+        base = di * len(self.tt.coverage)
+        for r, mask, _need in self.tt.cover_by_code[cur_code]:
+            if m & mask == mask:
+                self.cover_cnt[base + r] += delta
+
+    def overtime_extra(self, sid: int, h: int) -> int:
+        """sid'in saatine h eklenince havuzdan çekilen (negatifse iade edilen) fazla mesai."""
+        cap = self.max_hours.get(sid)
+        if cap is None:
+            return 0
+        w = self.worked[sid]
+        return max(0, w + h - cap) - max(0, w - cap)
+
+    def over_cap(self, sid: int, h: int, pending: int = 0) -> bool:
+        """
+        sid'e h saat eklenirse üst sınırın üstündeki kısım kalan fazla mesai
+        havuzunu aşar mı. pending: aynı hücrede henüz atanmamış seçimlerin çekişi.
+        """
+        return self.overtime_extra(sid, h) > self.overtime_budget - self.overtime_used - pending
+
+    def _count_hours(self, sid: int, h: int) -> None:
+        self.overtime_used += self.overtime_extra(sid, h)
+        self.worked[sid] += h
+
+    def window_hit(self, sid: int, di: int, cur_code: int, existing: bool = False) -> Optional[Tuple[_WindowRule, int]]:
+        """
+        cur_code bu güne eklenirse dolan ilk pencere kuralı ve o penceredeki
+        sayı (existing=True: atama zaten sayaçta, sadece aşım aranır). Yoksa None.
+        """
+        rules = self.tt.windows
+        if not rules:
+            return None
+        extra = 0 if existing else 1
+        for rule, wc in zip(rules, self.windows[sid]):
+            if rule.match[cur_code]:
+                peak = wc.peak[di + wc.off] + extra
+                if peak > rule.max_count:
+                    return rule, peak
+        return None
+
+    def check(self, sid: int, di: int, cur_code: int, first: bool = True) -> int:
+        """Boş (sid, di) hücresine cur_code atanırsa ihlal maskesi (d-1 ve d+1 geçişleri dahil)."""
+        nx = di + 1
+        has_next = nx < self.n_days
+        return _check(
+            self.tt, self.kinds[di], cur_code,
+            self.blocked[sid][di], self.code_of[sid][di] >= 0, self.prev_code(sid, di),
+            self.code_of[sid][nx] if has_next else -1, self.kinds[nx] if has_next else 0,
+            first, self.window_hit(sid, di, cur_code) is not None,
+            self.rest_gap(sid, di, cur_code) is not None,
+            self.over_cap(sid, self.tt.hours[cur_code]),
+        )
+
+    def check_existing(self, sid: int, di: int, cur_code: int) -> int:
+        """Yapılmış bir atamanın tüm ihlal bitleri (doğrulama; geçiş sadece d-1 yönünde sayılır)."""
+        return _check(
+            self.tt, self.kinds[di], cur_code,
+            self.blocked[sid][di], self.count_of[sid][di] > 1, self.prev_code(sid, di),
+            first=False, window=self.window_hit(sid, di, cur_code, existing=True) is not None,
+            rest=self.rest_gap(sid, di, cur_code, existing=True) is not None,
+        )
+
+    def _count_window(self, sid: int, di: int, cur_code: int, delta: int) -> None:
+        for rule, wc in zip(self.tt.windows, self.windows[sid]):
+            if rule.match[cur_code]:
+                wc.add(di + wc.off, delta)
+
+    def can_assign(self, sid: int, di: int, cur_code: int) -> bool:
+        return self.check(sid, di, cur_code) == 0
+
+    def explain(self, sid: int, di: int, cur_code: int) -> List[str]:
+        return _explain_mask(self.check(sid, di, cur_code), self.blocked_type.get(sid, {}).get(self.cal.isos[di]))
+
+    def assign(self, sid: int, di: int, stype: ShiftType, windows: bool = True) -> None:
+        """windows=False: pencere sayaçlarını çağıran tutar (numpy motoru sonda geri yazar)."""
+        self._ensure(sid)
+        code = self.tt.code(stype)
+        if self.shift_of[sid][di] is None:
+            self.shift_of[sid][di] = stype
+            self.code_of[sid][di] = code
+            if self.tt.rest_span:
+                self._stamp(sid, di, code)
+        self.count_of[sid][di] += 1
+        self._count_hours(sid, self.tt.hours[code])
+        if windows and self.tt.windows:
+            self._count_window(sid, di, code, 1)
+        if self.tt.coverage:
+            self._count_cover(sid, di, code, 1)
+        self.by_day[di].append((sid, stype))
+        self.n_assigned += 1
+
+    def unassign(self, sid: int, di: int, stype: ShiftType) -> bool:
+        day_list = self.by_day[di]
+        for j in range(len(day_list)):
+            if day_list[j][0] == sid and day_list[j][1] == stype:
+                day_list.pop(j)
+                self.n_assigned -= 1
+                self.count_of[sid][di] -= 1
+                self._count_hours(sid, -self.tt.hours[self.tt.code(stype)])
+                if self.tt.windows:
+                    self._count_window(sid, di, self.tt.code(stype), -1)
+                if self.tt.coverage:
+                    self._count_cover(sid, di, self.tt.code(stype), -1)
+                self.shift_of[sid][di] = None
+                self.code_of[sid][di] = -1
+                if self.count_of[sid][di]:
+                    for psid, pst in day_list:
+                        if psid == sid:
+                            self.shift_of[sid][di] = pst
+                            self.code_of[sid][di] = self.tt.code(pst)
+                            break
+                if self.tt.rest_span:
+                    self._stamp(sid, di, self.code_of[sid][di])
+                return True
         return False
 
-    return True
+    def assigned_by_day(self) -> Dict[str, List[Tuple[int, ShiftType]]]:
+        isos = self.cal.isos
+        return {isos[di]: list(lst) for di, lst in enumerate(self.by_day) if lst}
 
 # -------------------- UNFILLED "NEDEN" ANALİZİ --------------------
 def explain_cannot_assign(
@@ -120,40 +910,22 @@ def explain_cannot_assign(
     """
     Hard gerekçeler üretir. (SOFT istekler burada sayılmaz; çünkü soft sadece ceza)
     """
-    transition_rules = transition_rules or []
-    day = shift.day
-    stype = shift.shift_type
-
-    reasons: List[str] = []
-
-    # 1) Hard block (rapor/izin/approved-hard istek vs.)
-    if day in blocked_any.get(staff_id, set()):
-        # mümkünse rapor/izin türünü de belirt
-        t = (blocked_type or {}).get(staff_id, {}).get(day)
-        if t == "rapor":
-            reasons.append("RAPORLU")
-        elif t == "yillik_izin":
-            reasons.append("IZINLI")
-        else:
-            reasons.append("HARD_BLOCK")  # hard istek / başka blocker
-        return reasons  # hard block varsa zaten bitti
-
-    # 2) aynı gün zaten atanmış mı?
-    for sid, _s in assigned_by_day.get(day, []):
-        if sid == staff_id:
-            reasons.append("AYNI_GUN_ZATEN_ATANMIS")
-            return reasons
-
-    # 3) geçiş (prev->next) kural ihlali
-    prev = _get_prev_shift_type(staff_id, day, assigned_by_day, blocked_type=blocked_type)
-    if _violates_transition_rules(prev, stype, day, transition_rules):
-        reasons.append("GECIS_KURALI_IHLALI")
-        return reasons
-
-    # burada hala atanamıyorsa, can_assign True olmalıydı
-    reasons.append("BILINMEYEN")
-    return reasons
-
+    mask = _iso_check(staff_id, shift, assigned_by_day, blocked_any, transition_rules, blocked_type)
+    return _explain_mask(mask, (blocked_type or {}).get(staff_id, {}).get(shift.day))
+
+
+def _unfilled_row(sh: Shift, c: Counter, root_cause: str = "N/A") -> Dict:
+    reason_summary = ", ".join([f"{k}:{v}" for k, v in c.most_common(5)])
+    return {
+        "date": sh.day,
+        "shift_type": sh.shift_type,
+        "need": 1,
+        "assigned": 0,
+        "missing": 1,
+        "reason": reason_summary if reason_summary else "N/A",
+        "root_cause": root_cause,
+        "fixable": 0 if root_cause in ("KIMSE_MUSAIT_DEGIL", "N/A") else 1,
+    }
 
 def analyze_unfilled(
     unfilled: List[Shift],
@@ -162,39 +934,149 @@ def analyze_unfilled(
     blocked_any: Dict[int, Set[str]],
     transition_rules: List[Dict] | None = None,
     blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
+    boundary: Optional[List[Tuple[str, ShiftType, int]]] = None,
+    skills: Optional[Dict[int, int]] = None,
+    max_hours: Optional[Dict[int, int]] = None,
+    overtime_budget: int = 0,
 ) -> List[Dict]:
     """
-    Her dolmayan slot için: gün, shift, ihtiyaç, atanan, eksik, neden döndürür.
+    Her dolmayan slot için: gün, shift, ihtiyaç, atanan, eksik, neden ve kök neden döndürür.
+    (Ay, dolmayan slotların tarihinden alınır.)
     """
-    out: List[Dict] = []
-    transition_rules = transition_rules or []
+    if not unfilled:
+        return []
+    y, m = int(unfilled[0].day[:4]), int(unfilled[0].day[5:7])
+    cal = month_day_table(y, m)
+    state = _MonthState(cal, staff_ids, blocked_any, transition_rules=transition_rules, blocked_type=blocked_type, boundary=boundary, skills=skills, max_hours=max_hours, overtime_budget=overtime_budget)
+    for d, lst in assigned_by_day.items():
+        di = cal.index.get(d)
+        if di is None:
+            continue
+        for sid, stype in lst:
+            state.assign(sid, di, stype)
+    return _analyze_unfilled_state(state, unfilled, staff_ids)
 
+def _day_reason_counts(state: _MonthState, di: int, staff_ids: List[int], codes: List[int]) -> Dict[int, Counter]:
+    """
+    Bir gün için tüm personelin neden maskesi tek geçişte; tipten bağımsız
+    nedenler (block, aynı gün) bir kez, geçiş / pencere kuralı sadece boştakiler için.
+    """
+    base: Counter = Counter()
+    free: List[int] = []
+    iso = state.cal.isos[di]
+    for sid in staff_ids:
+        mask = state.check(sid, di, codes[0]) & (V_BLOCKED | V_SAME_DAY)
+        if mask:
+            base[_explain_mask(mask, state.blocked_type.get(sid, {}).get(iso))[0]] += 1
+        else:
+            free.append(sid)
+    out: Dict[int, Counter] = {}
+    for code in codes:
+        c = Counter(base)
+        bad = 0
+        # yetkinlik açığı: açığı kapatamayan boştakiler (koltuklar onlara ayrılmıştı)
+        short = state.cover_short(di, code)
+        for sid in free:
+            mask = state.check(sid, di, code)
+            if mask:
+                bad += 1
+                c[_explain_mask(mask, None)[0]] += 1
+            elif short and not state.seat_ok(short, 1, sid):
+                bad += 1
+                c["YETKINLIK_EKSIK"] += 1
+        if len(free) > bad:
+            c["BILINMEYEN"] += len(free) - bad
+        out[code] = c
+    return out
+
+def _analyze_unfilled_state(state: _MonthState, unfilled: List[Shift], staff_ids: List[int]) -> List[Dict]:
+    """
+    Kök neden (gün içi artırıcı yol araması, iki kademeli):
+    - GUN_ICI_DEGISIMLE_DOLAR : diğer günler aynı kalsa da o günün kişileri
+                                tipler arasında kaydırılarak slot dolar
+    - ONCEKI_ATAMALAR_TUKETTI : sadece rapor/izin kısıtlarıyla müsait biri var;
+                                başka günlerdeki atamalar (geçiş / pencere / dinlenme /
+                                üst saat sınırı) onu tüketmiş
+    - KIMSE_MUSAIT_DEGIL      : yapısal olarak kimse yok (fizibilite alt sınırı)
+    """
+    from src.feasibility import _day_eligibility, augment_to_type
+
+    if not unfilled:
+        return []
+    staff = list(dict.fromkeys(staff_ids))
+    for sid in staff:
+        state._ensure(sid)
+    index = state.cal.index
+    tt = state.tt
+
+    by_day: Dict[int, List[Shift]] = {}
     for sh in unfilled:
-        c = Counter()
-        for sid in staff_ids:
-            rs = explain_cannot_assign(
-                sid, sh, assigned_by_day, blocked_any,
-                transition_rules=transition_rules,
-                blocked_type=blocked_type
-            )
-            if rs:
-                c[rs[0]] += 1
+        by_day.setdefault(index[sh.day], []).append(sh)
+
+    causes: Dict[int, List[str]] = {}
+    counts: Dict[Tuple[int, int], Counter] = {}
+    for di, shs in by_day.items():
+        # günün tipleri: mevcut atamalar + dolmayanlar (ihtiyacı olan her tip ikisinden birinde)
+        types = sorted({t for _sid, t in state.by_day[di]} | {sh.shift_type for sh in shs}, key=tt.code)
+        codes = [tt.code(t) for t in types]
+        for code, c in _day_reason_counts(state, di, staff, codes).items():
+            counts[(di, code)] = c
+
+        current = {sid: stype for sid, stype in state.by_day[di]}
+        now_ok: Dict[int, List[ShiftType]] = {}
+        for sid in staff:
+            if state.blocked[sid][di]:
+                continue
+            ok = [t for t, code in zip(types, codes)
+                  if current.get(sid) == t or not state.check(sid, di, code, first=False) & (V_TRANSITION | V_WINDOW | V_REST | V_HOURS)]
+            if ok:
+                now_ok[sid] = ok
+        structural = _day_eligibility(state, staff, di, types)
+        for sid, t in current.items():
+            if t not in structural.setdefault(sid, []):
+                structural[sid].append(t)
+
+        m_now, m_struct = dict(current), dict(current)
+        day_causes: List[str] = []
+        for sh in shs:
+            if augment_to_type(now_ok, m_now, sh.shift_type):
+                augment_to_type(structural, m_struct, sh.shift_type)
+                day_causes.append("GUN_ICI_DEGISIMLE_DOLAR")
+            elif augment_to_type(structural, m_struct, sh.shift_type):
+                day_causes.append("ONCEKI_ATAMALAR_TUKETTI")
             else:
-                c["BILINMEYEN"] += 1
-
-        reason_summary = ", ".join([f"{k}:{v}" for k, v in c.most_common(5)])
-
-        out.append({
-            "date": sh.day,
-            "shift_type": sh.shift_type,
-            "need": 1,
-            "assigned": 0,
-            "missing": 1,
-            "reason": reason_summary if reason_summary else "N/A",
-        })
+                day_causes.append("KIMSE_MUSAIT_DEGIL")
+        causes[di] = day_causes
+
+    out: List[Dict] = []
+    taken: Dict[int, int] = {}
+    for sh in unfilled:
+        di = index[sh.day]
+        k = taken.get(di, 0)
+        taken[di] = k + 1
+        out.append(_unfilled_row(sh, counts[(di, tt.code(sh.shift_type))], causes[di][k]))
     return out
 # -------------------- /UNFILLED --------------------
 
+def _state_from_assignments(
+    cal: DayTable,
+    staff_ids: List[int],
+    assignments: List[Tuple[str, ShiftType, int]],
+    blocked_any: Dict[int, Set[str]],
+    transition_rules: List[Dict] | None = None,
+    blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
+    boundary: Optional[List[Tuple[str, ShiftType, int]]] = None,
+    skills: Optional[Dict[int, int]] = None,
+    max_hours: Optional[Dict[int, int]] = None,
+    overtime_budget: int = 0,
+) -> _MonthState:
+    state = _MonthState(cal, staff_ids, blocked_any, transition_rules=transition_rules, blocked_type=blocked_type, boundary=boundary, skills=skills, max_hours=max_hours, overtime_budget=overtime_budget)
+    for d, stype, sid in assignments:
+        di = cal.index.get(d)
+        if di is not None:
+            state.assign(sid, di, stype)
+    return state
+
 def _build_assigned_by_day(assignments: List[Tuple[str, ShiftType, int]]) -> Dict[str, List[Tuple[int, ShiftType]]]:
     out: Dict[str, List[Tuple[int, ShiftType]]] = {}
     for d, stype, sid in assignments:
@@ -203,10 +1085,329 @@ def _build_assigned_by_day(assignments: List[Tuple[str, ShiftType, int]]) -> Dic
 
 def _compute_hours(assignments: List[Tuple[str, ShiftType, int]], staff_ids: List[int]) -> Dict[int, int]:
     hours = {sid: 0 for sid in staff_ids}
+    hours_of = _REGISTRY.hours_of
     for _d, stype, sid in assignments:
-        hours[sid] += SHIFT_HOURS.get(stype, 0)
+        hours[sid] += hours_of(stype)
     return hours
 
+class _CandidateHeap:
+    """
+    Aday sıralaması için (anahtar, sıra) min-heap'i.
+
+    Eski davranış: her slotta sorted(staff_ids, key=(penalty, count)).
+    Burada heap (count, sıra) tutar; SOFT cezalılar slot bazında geri itilir,
+    böylece seçim sırası birebir aynı kalır. Seçilen kişinin anahtarı
+    değişince sadece onun kaydı O(log n) ile güncellenir (lazy silme).
+    """
+
+    def __init__(self, staff_ids: List[int], key: Callable[[int], object]):
+        self._key = key
+        self._rank = {}
+        for i, sid in enumerate(staff_ids):
+            self._rank.setdefault(sid, i)
+        self._entry: Dict[int, Tuple] = {}
+        self._heap: List[Tuple] = []
+        for sid, i in self._rank.items():
+            e = (key(sid), i, sid)
+            self._entry[sid] = e
+            self._heap.append(e)
+        heapq.heapify(self._heap)
+
+    def update(self, sid: int) -> None:
+        e = (self._key(sid), self._rank[sid], sid)
+        self._entry[sid] = e
+        heapq.heappush(self._heap, e)
+
+    def ordered(self, penalized: Callable[[int], bool]) -> Iterator[int]:
+        """
+        Adayları (penalty, key, sıra) düzeninde üretir. Heap'ten çekilenler
+        generator kapanınca geri konur; bu yüzden çağıran taraf tüketmeyi
+        bitirdiğinde (break / close) heap eski haline döner.
+        """
+        popped: List[Tuple] = []
+        deferred: List[int] = []
+        try:
+            while self._heap:
+                e = heapq.heappop(self._heap)
+                sid = e[2]
+                if self._entry.get(sid) is not e:
+                    continue  # eskimiş kayıt
+                popped.append(e)
+                if penalized(sid):
+                    deferred.append(sid)
+                    continue
+                yield sid
+            for sid in deferred:
+                yield sid
+        finally:
+            for e in popped:
+                if self._entry.get(e[2]) is e:
+                    heapq.heappush(self._heap, e)
+
+
+class _CalendarOrder:
+    """İhtiyaç hücrelerini (gün, vardiya, kişi sayısı) takvim sırasıyla verir."""
+
+    reads_state = False  # picked() state'e bakmaz
+
+    def __init__(self, state: "_MonthState", cells: List[Tuple[int, ShiftType, int]]):
+        self._cells = cells
+
+    def __iter__(self) -> Iterator[Tuple[int, ShiftType, int]]:
+        return iter(self._cells)
+
+    def picked(self, sid: int, di: int) -> None:
+        pass
+
+class _ScarcityOrder:
+    """
+    En kısıtlı gün önce, ama takvim gibi tek yönlü: hücre slack'i = (o vardiyayı
+    alabilecek kişi sayısı) - (ihtiyaç). Uygunluk state.can_assign'dan gelir;
+    dolu komşu günlerin geçiş kuralları (d-1 -> d ve d -> d+1) dahildir.
+    - Doldurma en düşük slack'li günden başlar; dolu blok her adımda iki
+      komşusundan (lo-1, hi+1) slack'i düşük olanla büyür. Böylece her gün sadece
+      dolu tarafından kısıtlanır, iki yandan sıkışan gün kalmaz.
+    - Gün içinde hücreler tip slack'ine göre (en kısıtlı vardiya önce) verilir.
+    Bir atama sadece o kişinin d-1, d, d+1 uygunluğunu değiştirebildiği için
+    sayaçlar artımlı güncellenir.
+    """
+
+    reads_state = True  # picked() uygunluğu state.can_assign'dan yeniden sayar
+
+    def __init__(self, state: "_MonthState", cells: List[Tuple[int, ShiftType, int]]):
+        self.state = state
+        n = state.n_days
+        code = state.tt.code
+        # gün -> [(vardiya, kod, kişi sayısı)], ihtiyaç sırasıyla (eşitlikte bu sıra)
+        self.pending: List[List[Tuple[ShiftType, int, int]]] = [[] for _ in range(n)]
+        for di, stype, k in cells:
+            self.pending[di].append((stype, code(stype), k))
+        self.staff = list(state.shift_of.keys())
+        # (gün, kod) -> o vardiyaya uygun kişiler
+        self.elig: Dict[Tuple[int, int], Set[int]] = {}
+        for di, lst in enumerate(self.pending):
+            for _stype, c, _k in lst:
+                if (di, c) not in self.elig:
+                    self.elig[(di, c)] = {sid for sid in self.staff if state.can_assign(sid, di, c)}
+
+    def _slack(self, di: int, cell: Tuple[ShiftType, int, int]) -> int:
+        return len(self.elig[(di, cell[1])]) - cell[2]
+
+    def _day_slack(self, di: int) -> int:
+        return min(self._slack(di, cell) for cell in self.pending[di])
+
+    def __iter__(self) -> Iterator[Tuple[int, ShiftType, int]]:
+        n = self.state.n_days
+        live = [di for di in range(n) if self.pending[di]]
+        if not live:
+            return
+        cur = min(live, key=lambda di: (self._day_slack(di), di))
+        lo = hi = cur
+        while True:
+            lst = self.pending[cur]
+            while lst:
+                i = min(range(len(lst)), key=lambda j: (self._slack(cur, lst[j]), j))
+                stype, _c, k = lst.pop(i)
+                yield cur, stype, k
+            nxt = [di for di in (lo - 1, hi + 1) if 0 <= di < n]
+            if not nxt:
+                return
+            # ihtiyacı olmayan gün de bloğa katılır (atlanmadan geçilir); eşitlikte ileri
+            cur = min(nxt, key=lambda di: (self._day_slack(di) if self.pending[di] else 1 << 30, -di))
+            lo, hi = min(lo, cur), max(hi, cur)
+
+    def picked(self, sid: int, di: int) -> None:
+        can_assign = self.state.can_assign
+        for d in (di - 1, di, di + 1):
+            if d < 0 or d >= self.state.n_days:
+                continue
+            for _stype, c, _k in self.pending[d]:
+                s = self.elig[(d, c)]
+                if can_assign(sid, d, c):
+                    s.add(sid)
+                else:
+                    s.discard(sid)
+
+SLOT_ORDERS = {"calendar": _CalendarOrder, "scarcity": _ScarcityOrder}
+
+class _HookedOrder:
+    """
+    Hücre sırasını SolveHooks ile sarar: birkaç hücrede bir ilerleme bildirir ve
+    durdurma istenirse kalan hücreleri dropped listesine aktarıp biter
+    (kalan slotlar dolmayan sayılır; o ana kadarki plan korunur).
+    """
+
+    def __init__(self, order, hooks: SolveHooks, state: _MonthState, total: int):
+        self.order = order
+        self.hooks = hooks
+        self.state = state
+        self.total = total
+        self.dropped: List[Tuple[int, ShiftType, int]] = []
+
+    @property
+    def reads_state(self) -> bool:
+        return getattr(self.order, "reads_state", True)
+
+    def __iter__(self) -> Iterator[Tuple[int, ShiftType, int]]:
+        it = iter(self.order)
+        for i, cell in enumerate(it):
+            if i % HOOK_EVERY_GREEDY_CELLS == 0:
+                if self.hooks.should_stop():
+                    self.dropped.append(cell)
+                    self.dropped.extend(it)
+                    return
+                self.hooks.progress("greedy", slots_filled=self.state.n_assigned, slots_total=self.total)
+            yield cell
+
+    def picked(self, sid: int, di: int) -> None:
+        self.order.picked(sid, di)
+
+# adil dağılım kategorileri (fairness_ledger kolonlarıyla aynı adlar; bit = sıra)
+BURDENS = ("weekends", "nights", "holidays")
+LEDGER_FIELDS = ("hours",) + BURDENS
+
+def _ledger_carry(ledger: Optional[Dict[int, Dict[str, int]]], staff_ids: List[int]) -> Optional[Dict[str, Dict[int, int]]]:
+    """
+    Geçmiş ayların toplamları -> kişi başı ortalamadan fark (kategori -> kişi -> fark).
+    Defterde satırı olmayan (yeni) kişi ortalamadan başlar (fark 0).
+    """
+    if ledger is None:
+        return None
+    rows = {sid: ledger[sid] for sid in dict.fromkeys(staff_ids) if sid in ledger}
+    carry: Dict[str, Dict[int, int]] = {}
+    for name in LEDGER_FIELDS:
+        mean = sum(int(r.get(name, 0)) for r in rows.values()) // len(rows) if rows else 0
+        carry[name] = {sid: int(r.get(name, 0)) - mean for sid, r in rows.items()}
+    return carry
+
+def _burden_counts(state: _MonthState, staff_ids: List[int], all_kinds: bool) -> Dict[str, Dict[int, int]]:
+    """Durumdaki (pinned) atamalardan kategori sayıları; all_kinds=False: sadece hafta sonu."""
+    out = {name: {sid: 0 for sid in staff_ids} for name in BURDENS}
+    wk = out["weekends"]
+    for sid in staff_ids:
+        wk[sid] = state.n_shifts(sid, weekend=True)
+    if all_kinds:
+        night = state.tt.night
+        hol = state.cal.is_holiday
+        for di, lst in enumerate(state.by_day):
+            for sid, stype in lst:
+                if sid in wk:
+                    out["nights"][sid] += night[state.tt.code(stype)]
+                    out["holidays"][sid] += hol[di]
+    return out
+
+def _cell_burdens(state: _MonthState, di: int, cur_code: int, weekends: bool, ledger: bool) -> int:
+    """Hücrenin kategori bitleri: hafta sonu (weekends ya da ledger açıksa), gece ve bayram (ledger)."""
+    m = 1 if state.kinds[di] and (weekends or ledger) else 0
+    if ledger:
+        if state.tt.night[cur_code]:
+            m |= 2
+        if state.cal.is_holiday[di]:
+            m |= 4
+    return m
+
+def _greedy_python(
+    state: _MonthState,
+    order: "_CalendarOrder | _ScarcityOrder",
+    staff_ids: List[int],
+    soft_days: Dict[int, Set[int]],
+    balance_weekends: bool = False,
+    target: Optional[Dict[int, int]] = None,
+    carry: Optional[Dict[str, Dict[int, int]]] = None,
+) -> Tuple[List[Tuple[int, ShiftType, int]], List[Tuple[int, ShiftType]]]:
+    # sayaçlar durumdaki (pinned) atamalarla başlar
+    counts = {sid: state.n_shifts(sid) for sid in staff_ids}
+    burden = _burden_counts(state, staff_ids, carry is not None)
+    carry = carry or {}
+    picks: List[Tuple[int, ShiftType, int]] = []
+    missed: List[Tuple[int, ShiftType]] = []
+
+    # yük: atama sayısı ya da (target verilmişse) saat - hedef; ikincisi
+    # durumun worked dizisinden okunur, atamayla kendiliğinden güncellenir
+    if target is None:
+        def load(sid: int) -> int:
+            return counts.get(sid, 0)
+    else:
+        worked = state.worked
+
+        def load(sid: int) -> int:
+            return worked[sid] - target.get(sid, 0)
+
+    # sıralama anahtarı: (soft ceza, yük, staff_ids sırası)
+    queue = _CandidateHeap(staff_ids, key=load)
+    # ortak fazla mesai havuzu: hücrenin seçimleri atanmadan önce havuzu birlikte aşmamalı
+    pooled = bool(state.max_hours) and state.overtime_budget > 0
+    # yük kategorili hücrelerde (hafta sonu / gece / bayram): (soft ceza, kategori
+    # sayıları + geçmiş ayların farkı, yük, sıra); kategori bileşimi başına bir heap
+    queues = {0: queue}
+
+    def queue_for(m: int) -> _CandidateHeap:
+        q = queues.get(m)
+        if q is None:
+            names = [name for bit, name in enumerate(BURDENS) if m >> bit & 1]
+
+            def key(sid: int):
+                return sum(burden[n].get(sid, 0) + carry.get(n, {}).get(sid, 0) for n in names), load(sid)
+            q = queues[m] = _CandidateHeap(staff_ids, key=key)
+        return q
+
+    for di, stype, k in order:
+        cur = state.tt.code(stype)
+        cats = _cell_burdens(state, di, cur, balance_weekends, bool(carry))
+
+        def penalized(sid: int) -> bool:
+            return di in soft_days.get(sid, ())
+
+        # hücrenin k kişisi tek geçişte: sıradaki ilk k uygun aday. Bir kişiyi
+        # atamak sadece onun uygunluğunu değiştirir; sonuç tek tek seçimle aynı.
+        # Yetkinlik açığı varsa koltuklar ayrılır: açıklar kalan koltuklara
+        # sığmayacaksa yetkinliği olmayan aday atlanır.
+        chosen: List[int] = []
+        short = state.cover_short(di, cur)
+        h = state.tt.hours[cur]
+        pending = 0
+        candidates = queue_for(cats).ordered(penalized)
+        for sid in candidates:
+            if state.can_assign(sid, di, cur) and state.seat_ok(short, k - len(chosen), sid):
+                if pending and state.over_cap(sid, h, pending):
+                    continue
+                chosen.append(sid)
+                if short:
+                    short = _take_seat(short, state.skills.get(sid, 0))
+                if pooled:
+                    pending += state.overtime_extra(sid, h)
+                if len(chosen) == k:
+                    break
+        candidates.close()
+
+        missed.extend([(di, stype)] * (k - len(chosen)))
+        for picked in chosen:
+            picks.append((di, stype, picked))
+            state.assign(picked, di, stype)
+            counts[picked] += 1
+            for bit, name in enumerate(BURDENS):
+                if cats >> bit & 1:
+                    burden[name][picked] += 1
+            for q in queues.values():
+                q.update(picked)
+            order.picked(picked, di)
+
+    return picks, missed
+
+def _take_seat(short: List[Tuple[int, int]], m: int) -> List[Tuple[int, int]]:
+    """m yetkinlikli kişi koltuğa oturunca kalan açıklar."""
+    out = []
+    for mask, need in short:
+        if m & mask == mask:
+            need -= 1
+        if need > 0:
+            out.append((mask, need))
+    return out
+
+ENGINES = ("python", "numpy")
+# count: az vardiyası olan önce; hours: min saat hedefinin en çok altında kalan önce
+SCORE_MODES = ("count", "hours")
+
 def generate_schedule(
     year: int,
     month: int,
@@ -215,46 +1416,141 @@ def generate_schedule(
     transition_rules: List[Dict] | None = None,
     blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
     soft_avoid: Optional[Dict[int, Set[str]]] = None,
+    engine: str = "python",
+    slot_order: str = "calendar",
+    seed: Optional[int] = None,
+    hooks: Optional[SolveHooks] = None,
+    pinned: Optional[List[Tuple[str, ShiftType, int]]] = None,
+    only_days: Optional[Set[str]] = None,
+    boundary: Optional[List[Tuple[str, ShiftType, int]]] = None,
+    day_table: Optional[DayTable] = None,
+    balance_weekends: bool = False,
+    demand: List[Dict] | None = None,
+    skills: Optional[Dict[int, int]] = None,
+    max_hours: Optional[Dict[int, int]] = None,
+    overtime_budget: int = 0,
+    score_mode: str = "count",
+    min_required_hours: int | Dict[int, int] | None = None,
+    ledger: Optional[Dict[int, Dict[str, int]]] = None,
 ) -> Tuple[List[Tuple[str, ShiftType, int]], List[Shift], List[Dict]]:
-    required = build_required_shifts(year, month)
-    counts = {sid: 0 for sid in staff_ids}
-    assigned_by_day: Dict[str, List[Tuple[int, ShiftType]]] = {}
+    """
+    engine="python": aday heap'i + tek tek can_assign (varsayılan)
+    engine="numpy" : personel x gün dizileri, slot başına tek vektörel uygunluk maskesi
+    İki motor da aynı atamaları üretir; numpy yüklü değilse python'a düşülür.
+
+    slot_order="calendar": slotlar takvim sırasıyla doldurulur (varsayılan)
+    slot_order="scarcity": en az boşluğu (slack) olan gün önce doldurulur
+
+    seed verilirse eşit anahtarlı adaylar arasındaki sıra (staff_ids sırası
+    yerine) bu seed ile karıştırılmış sıradır; çoklu başlangıç için.
+
+    pinned: değişmeyecek atamalar; duruma önceden yazılır, karşıladıkları
+    slotlar düşülür ve adil dağılım sayacı onlarla başlar (çıktıda yer alır).
+    only_days: verilirse sadece bu günlerin slotları çözülür (pencereli yeniden plan).
+    boundary: önceki ayın son gün(ler)inin atamaları; ay başı geçiş kuralları
+    (ör. 31'i NIGHT -> 1'i DAY) bunlara göre kontrol edilir.
+    day_table: verilirse ay yerine bu gün tablosu çözülür (çok aylı ufuk).
+    balance_weekends: hafta sonu slotlarında önce hafta sonu sayısı az olan seçilir.
+    demand: ihtiyaç satırları [{"day_kind", "shift_type", "count"}] (None: 12'şer kişi);
+    her (gün, vardiya) hücresi tek seferde ilk k uygun adayla doldurulur.
+    HOLIDAY deseni için day_table tatillerle kurulmuş olmalı.
+    skills: kişi -> yetkinlik bit maskesi; COVERAGE kuralları için hücrede
+    açık kadar koltuk yetkinliği olanlara ayrılır (bulunamazsa boş kalır).
+    max_hours: kişi -> üst saat sınırı (verilmeyen kişi sınırsız);
+    overtime_budget: sınırların üstüne çıkılabilecek ortak fazla mesai saati.
+    Sınırı havuzdan da karşılanamayacak aday atanmaz (slot boş kalabilir).
+
+    score_mode="count": adaylar vardiya sayısına göre sıralanır (varsayılan)
+    score_mode="hours": min saat hedefinin en çok altında kalan önce (saat - hedef);
+    D24 üç DAY kadar sayılır, plan ilk geçişte saatçe dengeli çıkar ve repair'e
+    az iş kalır. Hedef min_required_hours'tan gelir (verilmezse 0).
+
+    ledger: önceki ayların kişi başı toplamları {kişi: {"hours", "weekends",
+    "nights", "holidays"}} (ledger_repo.ledger_totals, tek sorgu). Verilirse hafta
+    sonu / gece / bayram hücrelerinde önce o kategoride (bu ay + geçmiş ayların
+    ortalamadan farkı) az yüklenen seçilir; "hours" modunda geçmiş saat farkı da
+    hedefe katılır. Geçmiş atamalar yeniden taranmaz.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Bilinmeyen engine: {engine}")
+    if slot_order not in SLOT_ORDERS:
+        raise ValueError(f"Bilinmeyen slot_order: {slot_order}")
+    if score_mode not in SCORE_MODES:
+        raise ValueError(f"Bilinmeyen score_mode: {score_mode}")
+
+    cal = day_table or month_day_table(year, month)
+    isos = cal.isos
+    state = _MonthState(cal, staff_ids, blocked_any, transition_rules=transition_rules, blocked_type=blocked_type, boundary=boundary, skills=skills, max_hours=max_hours, overtime_budget=overtime_budget)
     soft_avoid = soft_avoid or {}
-
-    assignments: List[Tuple[str, ShiftType, int]] = []
-    unfilled: List[Shift] = []
-
-    for sh in required:
-        def score(sid: int):
-            penalty = 1 if sh.day in soft_avoid.get(sid, set()) else 0
-            return (penalty, counts.get(sid, 0))
-
-        candidates = sorted(staff_ids, key=score)
-
-        picked = None
-        for sid in candidates:
-            if can_assign(
-                sid, sh, assigned_by_day, blocked_any,
-                transition_rules=transition_rules,
-                blocked_type=blocked_type
-            ):
-                picked = sid
-                break
-
-        if picked is None:
-            unfilled.append(sh)
-            continue
-
-        assignments.append((sh.day, sh.shift_type, picked))
-        counts[picked] += 1
-        assigned_by_day.setdefault(sh.day, []).append((picked, sh.shift_type))
+    # SOFT istekler de gün indeksine çevrilir
+    soft_days: Dict[int, Set[int]] = {}
+    for sid in staff_ids:
+        ds = soft_avoid.get(sid)
+        if ds:
+            soft_days[sid] = {cal.index[d] for d in ds if d in cal.index}
+
+    greedy = _greedy_python
+    if engine == "numpy":
+        try:
+            from src.scheduler_numpy import greedy_numpy
+            greedy = greedy_numpy
+        except ImportError:
+            pass
+
+    tie_order = list(staff_ids)
+    if seed is not None:
+        random.Random(seed).shuffle(tie_order)
+
+    cells = _demand_cells(cal, demand)
+    if only_days is not None:
+        keep = {cal.index[d] for d in only_days if d in cal.index}
+        cells = [cell for cell in cells if cell[0] in keep]
+    fixed: List[Tuple[int, ShiftType, int]] = []
+    if pinned:
+        covered: Counter = Counter()
+        for d, stype, sid in pinned:
+            di = cal.index.get(d)
+            if di is None:
+                continue
+            state.assign(sid, di, stype)
+            fixed.append((di, stype, sid))
+            covered[(di, stype)] += 1
+        rest = []
+        for di, stype, k in cells:
+            k -= covered[(di, stype)]
+            if k > 0:
+                rest.append((di, stype, k))
+        cells = rest
+
+    total = sum(k for _di, _stype, k in cells)
+    order = SLOT_ORDERS[slot_order](state, cells)
+    if hooks is not None:
+        order = _HookedOrder(order, hooks, state, total)
+    carry = _ledger_carry(ledger, staff_ids)
+    target: Optional[Dict[int, int]] = None
+    if score_mode == "hours":
+        if isinstance(min_required_hours, dict):
+            target = {sid: int(min_required_hours.get(sid, 0)) for sid in staff_ids}
+        else:
+            target = {sid: int(min_required_hours or 0) for sid in staff_ids}
+        if carry:
+            # geçen aylarda ortalamadan fazla çalışanın bu ayki hedefi o kadar düşük sayılır
+            for sid, extra in carry["hours"].items():
+                target[sid] = target.get(sid, 0) - extra
+    picks, missed = greedy(state, order, tie_order, soft_days, balance_weekends, target, carry)
+    if hooks is not None:
+        missed.extend((di, stype) for di, stype, k in order.dropped for _ in range(k))
+        hooks.progress("greedy", slots_filled=len(picks), slots_total=total)
+    if fixed:
+        picks = fixed + picks
+    if slot_order != "calendar" or hooks is not None or fixed:
+        picks.sort(key=lambda x: x[0])
+        missed.sort(key=lambda x: x[0])
+    assignments = [(isos[di], stype, sid) for di, stype, sid in picks]
+    unfilled = [Shift(isos[di], stype) for di, stype in missed]
 
     # unfilled neden analizi
-    unfilled_debug = analyze_unfilled(
-        unfilled, staff_ids, assigned_by_day, blocked_any,
-        transition_rules=transition_rules,
-        blocked_type=blocked_type
-    )
+    unfilled_debug = _analyze_unfilled_state(state, unfilled, staff_ids)
 
     return assignments, unfilled, unfilled_debug
 
@@ -268,82 +1564,189 @@ def repair_to_meet_min_hours(
     transition_rules: List[Dict] | None = None,
     blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
     max_iters: int = 20000,
+    hooks: Optional[SolveHooks] = None,
+    locked: Optional[Set[Tuple[str, ShiftType, int]]] = None,
+    boundary: Optional[List[Tuple[str, ShiftType, int]]] = None,
+    day_table: Optional[DayTable] = None,
+    skills: Optional[Dict[int, int]] = None,
+    max_hours: Optional[Dict[int, int]] = None,
+    overtime_budget: int = 0,
 ) -> Tuple[List[Tuple[str, ShiftType, int]], Dict[int, int], int]:
-    transition_rules = transition_rules or []
-    assigned_by_day = _build_assigned_by_day(assignments)
-    hours = _compute_hours(assignments, staff_ids)
+    """
+    Min saat altındaki kişilere, min saatin üstündeki kişilerden vardiya taşır.
+
+    - deficit heap'i: en az saati olan önce (hours, staff_ids sırası)
+    - surplus heap'i: en çok saati olan bağışçı önce
+    - by_staff: kişi -> atama indeksleri (tüm listeyi baştan taramak yok)
+    Bir kişiye hiçbir bağışçıdan vardiya taşınamıyorsa o kişi atlanır,
+    sıradaki eksik kişiyle devam edilir.
+    locked: taşınmayacak atamalar (saatleri sayılır ama bağışlanmaz).
+    day_table verilirse (çok aylı ufuk) min saat tüm ufuk için toplam hedeftir.
+    skills: yetkinlik maskeleri; bağışçının yerine geçen kişi hücrenin
+    yetkinlik minimumunu düşürmemeli (sayaçtan O(kural) kontrol).
+    max_hours / overtime_budget: alıcı üst sınırını (+ kalan havuzu) aşamaz;
+    saatler durumun artımlı worked dizisinden okunur.
+    """
+    cal = day_table or month_day_table(year, month)
+    state = _MonthState(cal, staff_ids, blocked_any, transition_rules=transition_rules, blocked_type=blocked_type, boundary=boundary, skills=skills, max_hours=max_hours, overtime_budget=overtime_budget)
+    # (gün indeksi, vardiya, kişi) — ISO'ya sadece dönüşte çevrilir
+    slots: List[Tuple[int, ShiftType, int]] = []
+    by_staff: Dict[int, Set[int]] = {sid: set() for sid in staff_ids}
+    locked = locked or set()
+    for idx, (d, stype, sid) in enumerate(assignments):
+        di = cal.index[d]
+        slots.append((di, stype, sid))
+        by_staff.setdefault(sid, set())
+        if (d, stype, sid) not in locked:
+            by_staff[sid].add(idx)
+        state.assign(sid, di, stype)
+    hours = state.worked  # assign / unassign ile güncel kalır
 
     def _target_min(sid: int) -> int:
         if isinstance(min_required_hours, dict):
             return int(min_required_hours.get(sid, 0))
         return int(min_required_hours)
 
-    def deficits():
-        return [sid for sid in staff_ids if hours[sid] < _target_min(sid)]
-
-    def surpluses():
-        return [sid for sid in staff_ids if hours[sid] > _target_min(sid)]
+    target = {sid: _target_min(sid) for sid in staff_ids}
+    rank = {}
+    for i, sid in enumerate(staff_ids):
+        rank.setdefault(sid, i)
+
+    deficit_heap: List[Tuple[int, int, int]] = []
+    surplus_heap: List[Tuple[int, int, int]] = []
+    surplus: Set[int] = set()
+
+    def _push(sid: int) -> None:
+        h = hours[sid]
+        if h < target[sid]:
+            heapq.heappush(deficit_heap, (h, rank[sid], sid))
+        if h > target[sid]:
+            surplus.add(sid)
+            heapq.heappush(surplus_heap, (-h, rank[sid], sid))
+        else:
+            surplus.discard(sid)
+
+    for sid in rank:
+        _push(sid)
+
+    def _donors():
+        """Surplus heap'ini bozmadan bağışçıları (çok saat -> az saat) sırayla verir."""
+        popped = []
+        try:
+            while surplus_heap:
+                e = heapq.heappop(surplus_heap)
+                sid = e[2]
+                if sid not in surplus or -e[0] != hours[sid]:
+                    continue  # eskimiş kayıt
+                popped.append(e)
+                yield sid
+        finally:
+            for e in popped:
+                heapq.heappush(surplus_heap, e)
+
+    def _try_move(d_staff: int) -> Optional[int]:
+        donors = _donors()
+        try:
+            for s_staff in donors:
+                if s_staff == d_staff:
+                    continue
+                for idx in sorted(by_staff[s_staff]):
+                    di, stype, _sid = slots[idx]
+                    code = state.tt.code(stype)
+                    h = state.tt.hours[code]
+                    if hours[s_staff] - h < target[s_staff]:
+                        continue
+                    if not state.can_assign(d_staff, di, code) or not state.cover_keeps(s_staff, d_staff, di, code):
+                        continue
+                    if not state.unassign(s_staff, di, stype):
+                        continue
+                    state.assign(d_staff, di, stype)
+
+                    slots[idx] = (di, stype, d_staff)
+                    by_staff[s_staff].discard(idx)
+                    by_staff[d_staff].add(idx)
+                    return s_staff
+        finally:
+            donors.close()
+        return None
 
     swaps = 0
     it = 0
 
-    while True:
+    while deficit_heap and surplus:
         it += 1
         if it > max_iters:
             break
+        if hooks is not None and it % HOOK_EVERY_REPAIR_ITERS == 0:
+            if hooks.should_stop():
+                break
+            hooks.progress("repair", swaps=swaps, deficit_hours=sum(
+                max(0, target[sid] - hours[sid]) for sid in target
+            ))
 
-        deficit_list = sorted(deficits(), key=lambda s: hours[s])
-        if not deficit_list:
-            break
-
-        surplus_list = sorted(surpluses(), key=lambda s: hours[s], reverse=True)
-        if not surplus_list:
-            break
-
-        d_staff = deficit_list[0]
-        moved = False
-
-        for idx, (d, stype, s_staff) in enumerate(assignments):
-            if s_staff not in surplus_list:
-                continue
-
-            sh = Shift(d, stype)
-            if not can_assign(
-                d_staff, sh, assigned_by_day, blocked_any,
-                transition_rules=transition_rules,
-                blocked_type=blocked_type
-            ):
-                continue
-
-            h = SHIFT_HOURS.get(stype, 0)
-            if hours[s_staff] - h < _target_min(s_staff):
-                continue
-
-            day_list = assigned_by_day.get(d, [])
-            removed = False
-            for j in range(len(day_list)):
-                if day_list[j][0] == s_staff and day_list[j][1] == stype:
-                    day_list.pop(j)
-                    removed = True
-                    break
-            if not removed:
-                continue
-
-            day_list.append((d_staff, stype))
-            assigned_by_day[d] = day_list
+        h, _r, d_staff = heapq.heappop(deficit_heap)
+        if h != hours[d_staff] or h >= target[d_staff]:
+            continue  # eskimiş kayıt
 
-            assignments[idx] = (d, stype, d_staff)
-            hours[s_staff] -= h
-            hours[d_staff] += h
+        s_staff = _try_move(d_staff)
+        if s_staff is None:
+            continue  # bu kişiye taşınabilecek vardiya yok
 
-            swaps += 1
-            moved = True
-            break
+        swaps += 1
+        _push(s_staff)
+        _push(d_staff)
 
-        if not moved:
-            break
+    isos = cal.isos
+    assignments[:] = [(isos[di], stype, sid) for di, stype, sid in slots]
+    return assignments, dict(hours), swaps
 
-    return assignments, hours, swaps
+def _warm_start_plan(
+    cal: DayTable,
+    staff_ids: List[int],
+    warm_start: List[Tuple[str, ShiftType, int, bool]],
+    blocked_any: Dict[int, Set[str]],
+    transition_rules: List[Dict] | None = None,
+    blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
+    boundary: Optional[List[Tuple[str, ShiftType, int]]] = None,
+    demand: List[Dict] | None = None,
+    skills: Optional[Dict[int, int]] = None,
+    max_hours: Optional[Dict[int, int]] = None,
+    overtime_budget: int = 0,
+) -> Tuple[List[Tuple[str, ShiftType, int]], Set[Tuple[str, ShiftType, int]]]:
+    """
+    Başlangıç planını (pinned, locked) ikilisine çevirir.
+    - kilitli hücreler kontrolsüz alınır (kullanıcı kararı; ihlal varsa validation gösterir)
+    - kilitsizler gün sırasıyla, ihtiyaç fazlası değilse ve çekirdek kontrolünden
+      geçiyorsa tutulur; geçmeyenler atılır ve slotları greedy'ye kalır
+    """
+    state = _MonthState(cal, staff_ids, blocked_any, transition_rules=transition_rules, blocked_type=blocked_type, boundary=boundary, skills=skills, max_hours=max_hours, overtime_budget=overtime_budget)
+    need: Counter = Counter({(di, stype): k for di, stype, k in _demand_cells(cal, demand)})
+    pinned: List[Tuple[str, ShiftType, int]] = []
+    locked: Set[Tuple[str, ShiftType, int]] = set()
+    loose: List[Tuple[int, ShiftType, int]] = []
+    for d, stype, sid, is_locked in warm_start:
+        di = cal.index.get(d)
+        if di is None:
+            continue
+        sid = int(sid)
+        if is_locked:
+            state.assign(sid, di, stype)
+            need[(di, stype)] -= 1
+            pinned.append((d, stype, sid))
+            locked.add((d, stype, sid))
+        else:
+            loose.append((di, stype, sid))
+    loose.sort(key=lambda x: x[0])
+    for di, stype, sid in loose:
+        if need[(di, stype)] <= 0:
+            continue
+        state._ensure(sid)
+        if not state.can_assign(sid, di, state.tt.code(stype)):
+            continue
+        state.assign(sid, di, stype)
+        need[(di, stype)] -= 1
+        pinned.append((cal.isos[di], stype, sid))
+    return pinned, locked
 
 def generate_schedule_hard_min_hours(
     year: int,
@@ -354,18 +1757,108 @@ def generate_schedule_hard_min_hours(
     transition_rules: List[Dict] | None = None,
     blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
     soft_avoid: Optional[Dict[int, Set[str]]] = None,
+    engine: str = "python",
+    slot_order: str = "calendar",
+    improve_seconds: float = 0.0,
+    seed: Optional[int] = None,
+    hooks: Optional[SolveHooks] = None,
+    warm_start: Optional[List[Tuple[str, ShiftType, int, bool]]] = None,
+    boundary: Optional[List[Tuple[str, ShiftType, int]]] = None,
+    day_table: Optional[DayTable] = None,
+    balance_weekends: bool = False,
+    weights=None,
+    demand: List[Dict] | None = None,
+    skills: Optional[Dict[int, int]] = None,
+    max_hours: Optional[Dict[int, int]] = None,
+    overtime_budget: int = 0,
+    score_mode: str = "count",
+    ledger: Optional[Dict[int, Dict[str, int]]] = None,
 ) -> Tuple[List[Tuple[str, ShiftType, int]], List[Shift], List[Dict], Dict[int, int], int]:
+    """
+    greedy -> min saat repair -> (improve_seconds > 0 ise) local search iyileştirme.
+
+    warm_start: başlangıç planı [(gün, vardiya, kişi, kilitli)]. Kilitli
+    hücreler olduğu gibi kalır; kilitsizler hâlâ geçerliyse başlangıç olarak
+    alınır (repair/iyileştirme taşıyabilir). Greedy sadece boş slotları doldurur.
+    day_table / balance_weekends: generate_schedule ile aynı (çok aylı ufuk).
+    weights: iyileştirme fazının amaç ağırlıkları (local_search.ObjectiveWeights).
+    demand: ihtiyaç satırları (generate_schedule ile aynı).
+    skills: yetkinlik maskeleri (COVERAGE kuralları; generate_schedule ile aynı).
+    max_hours / overtime_budget: üst saat sınırları (generate_schedule ile aynı).
+    score_mode: greedy aday puanı (generate_schedule ile aynı; "hours" hedef olarak
+    min_required_hours'u kullanır).
+    ledger: önceki ayların adil dağılım toplamları (generate_schedule ile aynı).
+    """
+    cal = day_table or month_day_table(year, month)
+    pinned: Optional[List[Tuple[str, ShiftType, int]]] = None
+    locked: Optional[Set[Tuple[str, ShiftType, int]]] = None
+    if warm_start:
+        pinned, locked = _warm_start_plan(
+            cal, staff_ids, warm_start, blocked_any,
+            transition_rules=transition_rules, blocked_type=blocked_type, boundary=boundary,
+            demand=demand, skills=skills, max_hours=max_hours, overtime_budget=overtime_budget,
+        )
     assignments, unfilled, unfilled_debug = generate_schedule(
         year, month, staff_ids, blocked_any,
         transition_rules=transition_rules,
         blocked_type=blocked_type,
-        soft_avoid=soft_avoid
+        soft_avoid=soft_avoid,
+        engine=engine,
+        slot_order=slot_order,
+        seed=seed,
+        hooks=hooks,
+        pinned=pinned,
+        boundary=boundary,
+        day_table=day_table,
+        balance_weekends=balance_weekends,
+        demand=demand,
+        skills=skills,
+        max_hours=max_hours,
+        overtime_budget=overtime_budget,
+        score_mode=score_mode,
+        min_required_hours=min_required_hours,
+        ledger=ledger,
     )
     assignments, hours, swaps = repair_to_meet_min_hours(
         year, month, assignments, staff_ids, blocked_any, min_required_hours,
         transition_rules=transition_rules,
-        blocked_type=blocked_type
+        blocked_type=blocked_type,
+        hooks=hooks,
+        locked=locked,
+        boundary=boundary,
+        day_table=day_table,
+        skills=skills,
+        max_hours=max_hours,
+        overtime_budget=overtime_budget,
     )
+    if improve_seconds > 0 and hooks is not None:
+        improve_seconds = hooks.time_left(improve_seconds)
+    if improve_seconds > 0:
+        from src.local_search import ObjectiveWeights, improve_schedule
+
+        assignments, unfilled, _stats = improve_schedule(
+            year, month, assignments, unfilled, staff_ids, blocked_any, min_required_hours,
+            transition_rules=transition_rules,
+            blocked_type=blocked_type,
+            soft_avoid=soft_avoid,
+            time_budget_s=improve_seconds,
+            seed=seed or 0,
+            weights=weights or ObjectiveWeights(),
+            hooks=hooks,
+            locked=locked,
+            boundary=boundary,
+            day_table=day_table,
+            skills=skills,
+            max_hours=max_hours,
+            overtime_budget=overtime_budget,
+        )
+        hours = _compute_hours(assignments, staff_ids)
+        state = _state_from_assignments(
+            cal, staff_ids, assignments, blocked_any,
+            transition_rules=transition_rules, blocked_type=blocked_type, boundary=boundary, skills=skills,
+            max_hours=max_hours, overtime_budget=overtime_budget,
+        )
+        unfilled_debug = _analyze_unfilled_state(state, unfilled, staff_ids)
     return assignments, unfilled, unfilled_debug, hours, swaps
 # -------------------- VALIDATION --------------------
 def validate_assignments(
@@ -377,90 +1870,138 @@ def validate_assignments(
     min_required_hours: int,
     transition_rules: List[Dict] | None = None,
     blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
+    boundary: Optional[List[Tuple[str, ShiftType, int]]] = None,
+    day_table: Optional[DayTable] = None,
+    skills: Optional[Dict[int, int]] = None,
+    max_hours: Optional[Dict[int, int]] = None,
+    overtime_budget: int = 0,
+    demand: List[Dict] | None = None,
 ) -> Tuple[Dict, List[Dict], List[int]]:
+    """
+    Planı hard kurallara göre doğrular: (özet, ihlaller, min saat altı kişiler).
+    demand: yetkinlik kapsamı bu ihtiyaç hücrelerinde aranır (None: varsayılan desen);
+    hiç atama almamış hücre de eksik sayılır.
+    """
     transition_rules = transition_rules or []
     blocked_type = blocked_type or {}
 
     hours = _compute_hours(assignments, staff_ids)
     deficits = [sid for sid in staff_ids if hours.get(sid, 0) < min_required_hours]
 
-    assigned_by_day: Dict[str, List[Tuple[int, ShiftType]]] = _build_assigned_by_day(assignments)
-
-    def _match(rule_val: str, actual: str) -> bool:
-        return rule_val == "ANY" or rule_val == actual
-
-    def _match_day(rule_day: str, cur_day_iso: str) -> bool:
-        if rule_day == "ANY":
-            return True
-        return rule_day == _day_kind(cur_day_iso)
-
-    def _violates(prev: ShiftType | None, cur: ShiftType, cur_day_iso: str) -> bool:
-        if prev is None:
-            return False
-        for r in transition_rules:
-            apply_day = r.get("apply_day", "ANY")
-            if not _match_day(apply_day, cur_day_iso):
-                continue
-            if _match(r["prev_type"], prev) and _match(r["next_type"], cur):
-                return True
-        return False
-
-    violations: List[Dict] = []
-
-    # same-day multi shift + blocked check
-    seen = {}
+    cal = day_table or month_day_table(year, month)
+    state = _MonthState(cal, [], blocked_any, transition_rules=transition_rules, blocked_type=blocked_type, boundary=boundary, skills=skills)
+    outside: Counter = Counter()
     for d, stype, sid in assignments:
-        key = (d, sid)
-        seen[key] = seen.get(key, 0) + 1
-        if d in blocked_any.get(sid, set()):
-            violations.append({
+        di = cal.index.get(d)
+        if di is None:
+            outside[(d, sid)] += 1  # ay dışı satır: sadece blok / aynı gün kontrolüne girer
+        else:
+            state.assign(sid, di, stype)
+
+    # tek geçiş; rapor sırası: BLOCKED_DAY, SAME_DAY_MULTI_SHIFT, TRANSITION_RULE, WINDOW_RULE, REST_RULE
+    # (+ hücre bazlı SKILL_COVERAGE, kişi bazlı MAX_HOURS)
+    blocked_v: List[Dict] = []
+    same_day_v: List[Dict] = []
+    transition_v: List[Dict] = []
+    window_v: List[Dict] = []
+    rest_v: List[Dict] = []
+    reported = set()
+    tt = state.tt
+    for d, stype, sid in assignments:
+        di = cal.index.get(d)
+        if di is None:
+            cnt = outside[(d, sid)]
+            mask = _check(tt, 0, -1, d in blocked_any.get(sid, set()), cnt > 1, -1, first=False)
+        else:
+            cnt = state.count_of[sid][di]
+            mask = state.check_existing(sid, di, tt.code(stype))
+        if mask & V_BLOCKED:
+            blocked_v.append({
                 "type": "BLOCKED_DAY",
                 "date": d,
                 "shift_type": stype,
                 "staff_id": sid,
                 "detail": "Hard block gününe atama"
             })
-
-    for (d, sid), cnt in seen.items():
-        if cnt > 1:
-            violations.append({
+        if mask & V_SAME_DAY and (d, sid) not in reported:
+            reported.add((d, sid))
+            same_day_v.append({
                 "type": "SAME_DAY_MULTI_SHIFT",
                 "date": d,
                 "shift_type": "",
                 "staff_id": sid,
                 "detail": f"Aynı günde {cnt} vardiya"
             })
-
-    # transition violations
-    for d, stype, sid in assignments:
-        prev_day = _prev_day_iso(d)
-        prev_t = None
-
-        bt = blocked_type.get(sid, {}).get(prev_day)
-        if bt == "rapor":
-            prev_t = "RAPOR"
-        elif bt == "yillik_izin":
-            prev_t = "YILLIK_IZIN"
-        else:
-            prev_list = assigned_by_day.get(prev_day, [])
-            for psid, pst in prev_list:
-                if psid == sid:
-                    prev_t = pst
-                    break
-
-        if _violates(prev_t, stype, d):
-            violations.append({
+        if mask & V_TRANSITION:
+            transition_v.append({
                 "type": "TRANSITION_RULE",
                 "date": d,
                 "shift_type": stype,
                 "staff_id": sid,
-                "detail": f"Geçiş ihlali: {prev_t} -> {stype}"
+                "detail": f"Geçiş ihlali: {state.prev_type(sid, di)} -> {stype}"
+            })
+        if mask & V_WINDOW:
+            rule, peak = state.window_hit(sid, di, tt.code(stype), existing=True)
+            window_v.append({
+                "type": "WINDOW_RULE",
+                "date": d,
+                "shift_type": stype,
+                "staff_id": sid,
+                "detail": rule.detail(peak),
+            })
+        if mask & V_REST:
+            gap = state.rest_gap(sid, di, tt.code(stype), existing=True)
+            rest_v.append({
+                "type": "REST_RULE",
+                "date": d,
+                "shift_type": stype,
+                "staff_id": sid,
+                "detail": f"Dinlenme ihlali: önceki vardiyadan sonra {gap / 60:g} saat (en az {tt.min_rest / 60:g})",
+            })
+    # yetkinlik kapsamı: ihtiyaç hücreleri (boş kalanlar dahil) + ihtiyaç dışı
+    # atanmış hücreler; sayılar hücre sayaçlarından, atama listesi taranmadan
+    cover_v: List[Dict] = []
+    if tt.coverage:
+        n_rules = len(tt.coverage)
+        cells = {(di, stype) for di, stype, k in _demand_cells(cal, demand) if k > 0}
+        cells.update((di, stype) for di, lst in enumerate(state.by_day) for _sid, stype in lst)
+        for di, stype in sorted(cells, key=lambda cell: (cell[0], tt.code(cell[1]))):
+            for r, _mask, need in tt.cover_by_code[tt.code(stype)]:
+                have = state.cover_cnt[di * n_rules + r]
+                if have < need:
+                    cover_v.append({
+                        "type": "SKILL_COVERAGE",
+                        "date": cal.isos[di],
+                        "shift_type": stype,
+                        "staff_id": -1,
+                        "detail": f"Yetkinlik eksik: {tt.coverage[r][2]} {have} kişi (en az {need})",
+                    })
+    # üst saat sınırı: aşımların toplamı fazla mesai havuzunu geçerse aşan herkes raporlanır
+    hours_v: List[Dict] = []
+    max_hours = max_hours or {}
+    over = {
+        sid: hours[sid] - max_hours[sid]
+        for sid in staff_ids
+        if sid in max_hours and hours.get(sid, 0) > max_hours[sid]
+    }
+    overtime = sum(over.values())
+    if overtime > overtime_budget:
+        for sid, extra in over.items():
+            hours_v.append({
+                "type": "MAX_HOURS",
+                "date": "",
+                "shift_type": "",
+                "staff_id": sid,
+                "detail": f"Üst saat sınırı aşıldı: {hours[sid]} saat (sınır {max_hours[sid]}); "
+                          f"toplam fazla mesai {overtime} / {overtime_budget} saat",
             })
+    violations: List[Dict] = blocked_v + same_day_v + transition_v + window_v + rest_v + cover_v + hours_v
 
     summary = {
         "hard_ok": (len(violations) == 0),
         "min_hours_ok": (len(deficits) == 0),
         "violations_count": len(violations),
         "deficits_count": len(deficits),
+        "overtime_hours": overtime,
     }
     return summary, violations, deficits
@@ -0,0 +1,263 @@
+# src/scheduler_numpy.py
+"""
+Greedy scheduler'ın NumPy motoru (scheduler.generate_schedule(engine="numpy")).
+
+Ay durumu başta bir kez gün x personel dizilerine kopyalanır (gün satırları
+bitişik: hücre başına okunan hep bir gün satırıdır) ve greedy boyunca yerinde
+güncellenir; hücre başına iş personel sayısından bağımsız sabit sayıda vektörel
+ifadedir, python'da personel üzerinde döngü yoktur. Hücrenin k kişisi en küçük
+k anahtarla (argpartition) tek seferde seçilir ve dizilere tek seferde yazılır.
+Seçim anahtarı python motoruyla aynıdır: (soft ceza, yük, staff_ids sırası);
+yük atama sayısı ya da score_mode="hours"ta saat - hedef — bu yüzden iki motor
+aynı planı üretir. balance_weekends açıkken hafta sonu slotlarında araya hafta
+sonu sayısı girer; adil dağılım defteri (ledger) verilmişse gece / bayram
+hücrelerinde de o kategorinin bu ay + geçmiş ay farkı girer (iki motorda da).
+Atamalar state'e de yazılır (slot sırası, unfilled analizi ve repair onu okur);
+pencere kuralı sayaçları dizilerde tutulur ve takvim sırasında state'e sonda
+bir kez geri yazılır.
+
+Hücre başına sabit maliyet yüzünden büyük hücrelerde (yüzlerce kişilik ihtiyaç)
+python heap'inden hızlıdır; hücre başına birkaç kişilik küçük problemlerde iki
+motor yakındır.
+"""
+from itertools import chain
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.scheduler import _NO_END, _NO_START, BURDENS, _burden_counts, _cell_burdens, _take_seat
+
+
+def _forbidden_cube(tt) -> "np.ndarray":
+    """(prev kodu + 1, cur kodu, gün tipi) -> yasak; satır 0 = önceki vardiya yok."""
+    n = tt.n
+    cube = np.zeros((n + 1, n, 2), dtype=bool)
+    cube[1:] = np.frombuffer(bytes(tt.table), dtype=np.uint8).reshape(n, n, 2).astype(bool)
+    return cube
+
+
+def greedy_numpy(
+    state,
+    order,
+    staff_ids: List[int],
+    soft_days: Dict[int, Set[int]],
+    balance_weekends: bool = False,
+    target: Optional[Dict[int, int]] = None,
+    carry: Optional[Dict[str, Dict[int, int]]] = None,
+) -> Tuple[List[Tuple[int, str, int]], List[Tuple[int, str]]]:
+    staff = list(dict.fromkeys(staff_ids))
+    n_staff = len(staff)
+    n_days = state.n_days
+    tt = state.tt
+    picks: List[Tuple[int, str, int]] = []
+    missed: List[Tuple[int, str]] = []
+    if n_staff == 0:
+        return picks, [(di, stype) for di, stype, k in order for _ in range(k)]
+
+    # --- durum dizileri (gün x personel; greedy boyunca yerinde güncellenir) ---
+    index = {sid: i for i, sid in enumerate(staff)}
+    code = np.full((n_days, n_staff), -1, dtype=np.int16)     # atanan vardiya kodu
+    counts = np.zeros((n_days, n_staff), dtype=np.int64)       # o günkü vardiya sayısı
+    for di, lst in enumerate(state.by_day):                     # durumdaki (pinned) atamalar
+        for sid, _stype in lst:
+            i = index.get(sid)
+            if i is not None:
+                counts[di, i] += 1
+                code[di, i] = state.code_of[sid][di]
+    blocked = (
+        np.frombuffer(b"".join(state.blocked[sid] for sid in staff), dtype=np.uint8)
+        .reshape(n_staff, n_days).T.astype(bool)
+    )                                                           # hard block
+    prev_block = (
+        np.fromiter(chain.from_iterable(state.prev_block[sid] for sid in staff), dtype=np.int16, count=n_staff * n_days)
+        .reshape(n_staff, n_days).T.copy()
+    )                                                           # dün rapor/izin kodu
+    soft = np.zeros((n_days, n_staff), dtype=bool)              # SOFT istek
+    for sid, days in soft_days.items():
+        i = index.get(sid)
+        if i is not None and days:
+            soft[list(days), i] = True
+
+    # pencere kuralları: kural başına sayaç ve tepe dizileri (state._WindowCounter'ın
+    # gün x personel hali; g = di + off). Sayaç dizisinin önünde K-1 sıfır satır
+    # var: g'yi içeren pencerelerin tepesi = cnt_pad[g:g+K].max() (kesit üstünde)
+    windows = []
+    for r, rule in enumerate(tt.windows):
+        k = rule.days
+        length = k - 1 + n_days
+        cnt = np.zeros((k - 1 + length, n_staff), dtype=np.int32)
+        cnt[k - 1:] = (
+            np.fromiter(chain.from_iterable(state.windows[sid][r].cnt for sid in staff), dtype=np.int32, count=n_staff * length)
+            .reshape(n_staff, length).T
+        )
+        peak = (
+            np.fromiter(chain.from_iterable(state.windows[sid][r].peak for sid in staff), dtype=np.int32, count=n_staff * length)
+            .reshape(n_staff, length).T.copy()
+        )
+        windows.append((rule.match, rule.max_count, k, cnt, peak))
+
+    # dinlenme kuralı: vardiya başlangıç / bitiş zamanları (dakika, ay başından),
+    # gün x personel; iki yanda rest_span gün pay ve boş gün sentinel'i state'teki gibi
+    rest_span = tt.rest_span
+    if rest_span:
+        length = n_days + 2 * rest_span
+        start_t = (
+            np.fromiter(chain.from_iterable(state.start_ts[sid] for sid in staff), dtype=np.float64, count=n_staff * length)
+            .reshape(n_staff, length).T.copy()
+        )
+        end_t = (
+            np.fromiter(chain.from_iterable(state.end_ts[sid] for sid in staff), dtype=np.float64, count=n_staff * length)
+            .reshape(n_staff, length).T.copy()
+        )
+
+    # hücre sırası state'i okumuyorsa (takvim sırası) state'in python sayaçları
+    # greedy boyunca güncellenmez; dizilerden sonda, atanan kişiler için yazılır
+    defer = bool(windows) and not getattr(order, "reads_state", True)
+    touched: Set[int] = set()
+
+    cube = _forbidden_cube(tt)
+    kinds = state.kinds
+    prev_day = state.cal.prev
+    # sayaçlar durumdaki (pinned) atamalarla başlar
+    # yük: atama sayısı (0..n_days) ya da saat - hedef; anahtara negatif olmasın
+    # diye en küçük başlangıç yükünden ölçülür (greedy yükü sadece artırır)
+    if target is None:
+        load = counts.sum(axis=0)
+        span = n_days + 1
+    else:
+        load = np.array([state.worked[sid] - target.get(sid, 0) for sid in staff], dtype=np.int64)
+        load -= load.min()
+        span = int(load.max()) + n_days * max(tt.hours + [1]) + 1
+    # kategori sayıları (hafta sonu / gece / bayram) + geçmiş ay farkı, kategori
+    # başına en küçükten ölçülür (hücre içinde sıra değişmez)
+    if carry is not None:
+        counted = _burden_counts(state, staff, True)
+        burden = np.array(
+            [[counted[name][sid] + carry.get(name, {}).get(sid, 0) for sid in staff] for name in BURDENS],
+            dtype=np.int64,
+        )
+    else:
+        burden = np.zeros((len(BURDENS), n_staff), dtype=np.int64)
+        burden[0] = counts[np.array(kinds, dtype=bool)].sum(axis=0)
+    burden -= burden.min(axis=1, keepdims=True)
+    rank = np.arange(n_staff, dtype=np.int64)
+    big = np.int64(n_staff) * span
+    # kategorili hücre anahtarı: (soft, kategori toplamı, yük, sıra)
+    wk_big = big * (int(burden.max(axis=1).sum()) + len(BURDENS) * n_days + 1)
+    none_prev = np.full(n_staff, -1, dtype=np.int16)
+    inf = np.iinfo(np.int64).max
+    capped = bool(state.max_hours)
+    pooled = capped and state.overtime_budget > 0
+    if capped:
+        # saat üst sınırı: çalışılan saat ve sınır dizisi (sınırı olmayan: inf)
+        worked = np.array([state.worked[sid] for sid in staff], dtype=np.float64)
+        cap = np.array([state.max_hours.get(sid, np.inf) for sid in staff], dtype=np.float64)
+
+    for di, stype, k in order:
+        cur = tt.code(stype)
+        kind = kinds[di]
+        cats = _cell_burdens(state, di, cur, balance_weekends, bool(carry))
+        bits = [bit for bit in range(len(BURDENS)) if cats >> bit & 1]
+        p = prev_day[di]
+        pb = prev_block[di]
+        prev_code = np.where(pb >= 0, pb, code[p] if p >= 0 else none_prev)
+
+        eligible = ~blocked[di] & (code[di] < 0) & ~cube[prev_code + 1, cur, kind]
+        if di + 1 < n_days:
+            # takvim dışı sıralamada ertesi gün dolu olabilir
+            nxt = code[di + 1]
+            eligible &= ~((nxt >= 0) & cube[cur + 1, np.maximum(nxt, 0), kinds[di + 1]])
+        for match, max_count, k_win, _cnt, peak in windows:
+            if match[cur]:
+                eligible &= peak[di + k_win - 1] < max_count  # +1 atama tepeyi aşmamalı
+        if rest_span and cur < tt.n_timed:
+            # önceki bitiş -> bu başlangıç ve bu bitiş -> sonraki başlangıç (state.rest_gap)
+            g = di + rest_span
+            base = di * 1440
+            gap = np.minimum(
+                base + tt.start_min[cur] - end_t[g - rest_span:g].max(axis=0),
+                start_t[g + 1:g + rest_span + 1].min(axis=0) - (base + tt.end_min[cur]),
+            )
+            eligible &= gap >= tt.min_rest
+        h = tt.hours[cur]
+        if capped:
+            # havuzdan çekilecek fazla mesai (state.overtime_extra) kalan havuzu aşmamalı
+            extra = np.maximum(0, worked + h - cap) - np.maximum(0, worked - cap)
+            room = state.overtime_budget - state.overtime_used
+            eligible &= extra <= room
+        n_ok = int(np.count_nonzero(eligible))
+        if n_ok < k:
+            missed.extend([(di, stype)] * (k - n_ok))
+        if n_ok == 0:
+            continue
+
+        if bits:
+            key = soft[di] * wk_big + burden[bits].sum(axis=0) * big + load * n_staff + rank
+        else:
+            key = soft[di] * big + load * n_staff + rank
+        masked = np.where(eligible, key, inf)
+        take = min(k, n_ok)
+        short = state.cover_short(di, cur)
+        if short or (pooled and take > 1):
+            # yetkinlik açığı / ortak fazla mesai havuzu: uygunlar anahtar sırasıyla,
+            # koltuk ayırarak ve havuz çekişini biriktirerek (python motoruyla aynı)
+            chosen = []
+            pending = 0
+            for i in np.argsort(masked, kind="stable")[:n_ok].tolist():
+                sid = staff[i]
+                if not state.seat_ok(short, k - len(chosen), sid):
+                    continue
+                if pending and extra[i] > room - pending:
+                    continue
+                chosen.append(i)
+                if short:
+                    short = _take_seat(short, state.skills.get(sid, 0))
+                if pooled:
+                    pending += int(extra[i])
+                if len(chosen) == k:
+                    break
+            if len(chosen) < take:
+                missed.extend([(di, stype)] * (take - len(chosen)))
+            if not chosen:
+                continue
+            ch = np.array(chosen, dtype=np.intp)
+        elif take == 1:
+            ch = np.array([masked.argmin()], dtype=np.intp)
+        else:
+            top = np.argpartition(masked, take - 1)[:take]
+            ch = top[np.argsort(masked[top])]  # python motoruyla aynı sıra
+
+        # seçilenler dizilere tek seferde yazılır
+        code[di, ch] = cur
+        load[ch] += 1 if target is None else h
+        for bit in bits:
+            burden[bit, ch] += 1
+        if capped:
+            worked[ch] += h
+        for match, _max_count, k_win, cnt, peak in windows:
+            if match[cur]:
+                # g'yi içeren pencerelerin sayacı +1; tepeler sadece değişen kesitte
+                g = di + k_win - 1
+                lo = max(0, g - k_win + 1)
+                hi = min(len(peak), g + k_win)
+                cnt[lo + k_win - 1:g + k_win, ch] += 1
+                peak[lo:hi, ch] = sliding_window_view(cnt[lo:hi + k_win - 1, ch], k_win, axis=0).max(axis=-1)
+        if rest_span:
+            timed = cur < tt.n_timed
+            start_t[di + rest_span, ch] = di * 1440 + tt.start_min[cur] if timed else _NO_START
+            end_t[di + rest_span, ch] = di * 1440 + tt.end_min[cur] if timed else _NO_END
+        chosen = ch.tolist()
+        if defer:
+            touched.update(chosen)
+        for i in chosen:
+            sid = staff[i]
+            picks.append((di, stype, sid))
+            state.assign(sid, di, stype, windows=not defer)
+            order.picked(sid, di)
+
+    for i in sorted(touched):
+        for (_match, _max_count, k_win, cnt, peak), wc in zip(windows, state.windows[staff[i]]):
+            wc.cnt[:] = cnt[k_win - 1:, i].tolist()
+            wc.peak[:] = peak[:, i].tolist()
+    return picks, missed
@@ -0,0 +1,61 @@
+import sqlite3
+from typing import List, Dict
+
+from src.scheduler import DEFAULT_SHIFT_TYPES
+
+def _connect():
+    try:
+        from src.db import get_conn  # type: ignore
+        return get_conn()
+    except Exception:
+        return sqlite3.connect("nobet_planner.sqlite3", check_same_thread=False)
+
+def ensure_shift_types_table():
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS shift_types (
+            code TEXT PRIMARY KEY,          -- DAY / NIGHT / D24 / ...
+            hours INTEGER NOT NULL,
+            start_time TEXT NOT NULL,       -- HH:MM
+            end_time TEXT NOT NULL,         -- HH:MM (başlangıçtan küçük/eşitse ertesi gün)
+            color TEXT NOT NULL DEFAULT '#000000'
+        )
+    """)
+    # ilk kurulum: eski sabit tipler (DAY 8 / NIGHT 16 / D24 24 saat)
+    cur.execute("SELECT COUNT(*) FROM shift_types")
+    if cur.fetchone()[0] == 0:
+        cur.executemany(
+            "INSERT INTO shift_types(code, hours, start_time, end_time, color) VALUES(?,?,?,?,?)",
+            [(t.code, t.hours, t.start, t.end, t.color) for t in DEFAULT_SHIFT_TYPES],
+        )
+    conn.commit()
+    return conn
+
+def list_shift_types() -> List[Dict]:
+    """Kayıt sırasıyla (rowid); scheduler.set_shift_types bu sırayla kod verir."""
+    conn = ensure_shift_types_table()
+    cur = conn.cursor()
+    cur.execute("SELECT code, hours, start_time, end_time, color FROM shift_types ORDER BY rowid ASC")
+    return [dict(r) for r in cur.fetchall()]
+
+def upsert_shift_type(code: str, hours: int, start_time: str, end_time: str, color: str = "#000000") -> None:
+    conn = ensure_shift_types_table()
+    conn.execute(
+        """
+        INSERT INTO shift_types(code, hours, start_time, end_time, color) VALUES(?,?,?,?,?)
+        ON CONFLICT(code) DO UPDATE SET
+            hours = excluded.hours,
+            start_time = excluded.start_time,
+            end_time = excluded.end_time,
+            color = excluded.color
+        """,
+        (code.strip().upper(), int(hours), start_time, end_time, color or "#000000"),
+    )
+    conn.commit()
+
+def delete_shift_type(code: str) -> None:
+    conn = ensure_shift_types_table()
+    conn.execute("DELETE FROM shift_types WHERE code = ?", (code,))
+    conn.commit()
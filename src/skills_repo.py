@@ -0,0 +1,73 @@
+import sqlite3
+from typing import List, Dict, Iterable
+
+MAX_SKILLS = 62  # staff.skills INTEGER (işaretli 64 bit) içinde güvenli bit sayısı
+
+def _connect():
+    try:
+        from src.db import get_conn  # type: ignore
+        return get_conn()
+    except Exception:
+        return sqlite3.connect("nobet_planner.sqlite3", check_same_thread=False)
+
+def ensure_skills_table():
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS skills (
+            bit INTEGER PRIMARY KEY,      -- staff.skills maskesindeki bit numarası
+            code TEXT NOT NULL UNIQUE     -- KIDEMLI / YOGUN_BAKIM / ...
+        )
+    """)
+    conn.commit()
+    return conn
+
+def list_skills() -> List[Dict]:
+    conn = ensure_skills_table()
+    cur = conn.cursor()
+    cur.execute("SELECT bit, code FROM skills ORDER BY bit ASC")
+    return [dict(r) for r in cur.fetchall()]
+
+def add_skill(code: str) -> int:
+    """Yeni yetkinliğe ilk boş biti verir (varsa mevcut biti döndürür)."""
+    code = code.strip().upper()
+    conn = ensure_skills_table()
+    cur = conn.cursor()
+    cur.execute("SELECT bit FROM skills WHERE code = ?", (code,))
+    row = cur.fetchone()
+    if row:
+        return int(row["bit"])
+    used = {int(r["bit"]) for r in cur.execute("SELECT bit FROM skills").fetchall()}
+    free = [b for b in range(MAX_SKILLS) if b not in used]
+    if not free:
+        raise ValueError("Yetkinlik sayısı sınıra ulaştı")
+    cur.execute("INSERT INTO skills(bit, code) VALUES(?, ?)", (free[0], code))
+    conn.commit()
+    return free[0]
+
+def delete_skill(code: str) -> None:
+    """Yetkinliği siler; biti personel maskelerinden de temizlenir (bit yeniden kullanılabilir)."""
+    conn = ensure_skills_table()
+    cur = conn.cursor()
+    cur.execute("SELECT bit FROM skills WHERE code = ?", (code,))
+    row = cur.fetchone()
+    if not row:
+        return
+    bit = int(row["bit"])
+    cur.execute("UPDATE staff SET skills = skills & ? WHERE skills & ? != 0", (~(1 << bit), 1 << bit))
+    cur.execute("DELETE FROM skills WHERE bit = ?", (bit,))
+    conn.commit()
+
+def skills_mask(codes: Iterable[str]) -> int:
+    """Yetkinlik kodları -> bit maskesi (bilinmeyen kodlar yok sayılır)."""
+    bits = {r["code"]: r["bit"] for r in list_skills()}
+    mask = 0
+    for c in codes:
+        if c in bits:
+            mask |= 1 << int(bits[c])
+    return mask
+
+def mask_codes(mask: int) -> List[str]:
+    """Bit maskesi -> yetkinlik kodları (bit sırasıyla)."""
+    return [r["code"] for r in list_skills() if int(mask) >> int(r["bit"]) & 1]
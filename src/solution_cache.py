@@ -0,0 +1,147 @@
+# src/solution_cache.py
+"""
+ProblemSpec özetine göre çözüm önbelleği.
+
+- Bellek içi LRU (maxsize kayıt)
+- persist=True ise SQLite'ta `solution_cache` tablosunda da saklanır; süreç
+  yeniden başlasa bile aynı girdiler için plan anında döner. Tablo da sınırlıdır
+  (disk_maxsize, varsayılan maxsize): her yazımda en eski kayıtlar silinir.
+"""
+import copy
+import json
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing
+from typing import Optional, Set
+
+from src import db
+from src.scheduler import Shift
+
+# tablosu kurulmuş veritabanı yolları: CREATE TABLE her okuma / yazımda değil,
+# yol başına bir kez çalışır (testler ve yeniden kurulum DB_PATH'i değiştirebilir)
+_READY: Set[str] = set()
+
+
+def ensure_solution_cache_table():
+    conn = db.get_conn()
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS solution_cache (
+            key TEXT PRIMARY KEY,          -- solver.solution_key (sha256)
+            payload TEXT NOT NULL,         -- JSON (SolveResult)
+            created_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
+    conn.commit()
+    _READY.add(str(db.DB_PATH))
+    return conn
+
+
+def _open():
+    """Tablo bu veritabanında daha önce kurulduysa sadece bağlantı açar."""
+    if str(db.DB_PATH) in _READY:
+        return db.get_conn()
+    return ensure_solution_cache_table()
+
+
+def _to_json(result) -> str:
+    return json.dumps({
+        "assignments": [list(a) for a in result.assignments],
+        "unfilled": [[sh.day, sh.shift_type] for sh in result.unfilled],
+        "unfilled_debug": result.unfilled_debug,
+        "hours": [[sid, h] for sid, h in result.hours.items()],
+        "swaps": result.swaps,
+        "score": result.score,
+        "seed": result.seed,
+    }, ensure_ascii=False)
+
+
+def _from_json(raw: str):
+    from src.solver import SolveResult
+
+    d = json.loads(raw)
+    return SolveResult(
+        assignments=[(a[0], a[1], int(a[2])) for a in d["assignments"]],
+        unfilled=[Shift(day, stype) for day, stype in d["unfilled"]],
+        unfilled_debug=d["unfilled_debug"],
+        hours={int(sid): int(h) for sid, h in d["hours"]},
+        swaps=int(d["swaps"]),
+        score=d["score"],
+        seed=d.get("seed"),
+    )
+
+
+class SolutionCache:
+    def __init__(self, maxsize: int = 32, persist: bool = False, disk_maxsize: Optional[int] = None):
+        self.maxsize = maxsize
+        self.persist = persist
+        self.disk_maxsize = maxsize if disk_maxsize is None else disk_maxsize
+        self._mem: "OrderedDict[str, object]" = OrderedDict()
+
+    def get(self, key: str):
+        """Kopya döndürür; çağıran taraf sonucu değiştirse de önbellek bozulmaz."""
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            return copy.deepcopy(self._mem[key])
+        if not self.persist:
+            return None
+        try:
+            with closing(_open()) as conn:
+                row = conn.execute("SELECT payload FROM solution_cache WHERE key=?", (key,)).fetchone()
+        except sqlite3.Error:
+            _READY.discard(str(db.DB_PATH))  # dosya değiştiyse tablo bir sonraki çağrıda yeniden kurulur
+            return None
+        if row is None:
+            return None
+        result = _from_json(row[0])
+        self._remember(key, result)
+        return copy.deepcopy(result)
+
+    def put(self, key: str, result) -> None:
+        self._remember(key, copy.deepcopy(result))
+        if self.persist:
+            try:
+                with closing(_open()) as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO solution_cache(key, payload) VALUES(?, ?)",
+                        (key, _to_json(result)),
+                    )
+                    # en yeni disk_maxsize kayıt kalır (created_at saniye çözünürlüklü; eşitlikte rowid)
+                    conn.execute(
+                        """
+                        DELETE FROM solution_cache WHERE key NOT IN (
+                            SELECT key FROM solution_cache ORDER BY created_at DESC, rowid DESC LIMIT ?
+                        )
+                        """,
+                        (max(0, int(self.disk_maxsize)),),
+                    )
+                    conn.commit()
+            except sqlite3.Error:
+                _READY.discard(str(db.DB_PATH))  # önbellek yazılamazsa çözüm yine kullanılabilir
+
+    def _remember(self, key: str, result) -> None:
+        self._mem[key] = result
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+
+    def clear(self) -> None:
+        self._mem.clear()
+        if self.persist:
+            try:
+                with closing(_open()) as conn:
+                    conn.execute("DELETE FROM solution_cache")
+                    conn.commit()
+            except sqlite3.Error:
+                _READY.discard(str(db.DB_PATH))  # disk kaydı silinemezse bellek yine temiz
+
+
+_DEFAULT: Optional[SolutionCache] = None
+
+
+def default_cache() -> SolutionCache:
+    """Süreç genelinde paylaşılan önbellek (SQLite kalıcılığı açık)."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = SolutionCache(maxsize=32, persist=True)
+    return _DEFAULT
@@ -0,0 +1,678 @@
+# src/solver.py
+"""
+Scheduler'ın üst seviye çözüm katmanı.
+
+ProblemSpec: bir ayın tüm girdilerini taşıyan, pickle edilebilir problem
+tanımı (süreç havuzuna gönderilebilsin diye sadece düz tipler içerir).
+
+solve_multistart: greedy'nin farklı tie-break seed'leriyle (+ repair) birden
+çok varyantını ProcessPoolExecutor üzerinde çalıştırır, her sonucu aynı amaç
+fonksiyonuyla puanlar ve en iyisini döndürür. Başlangıç 0 her zaman
+deterministik (seed'siz) greedy'dir; yani sonuç tek çalıştırmadan kötü olamaz.
+
+solve_anytime: süre sınırı + iptal + ilerleme bildirimli tek çözüm; süre
+dolduğunda o ana kadarki en iyi planı döndürür (UI'nin donmaması için).
+
+ProblemSpec.canonical_hash + solve_cached: girdiler değişmediyse aynı ayı
+yeniden çözmek yerine solution_cache'ten sonucu döndürür.
+
+replan_window: yayınlanmış bir ayda yeni rapor/izin girilince sadece etkilenen
+günlerin çevresini yeniden çözer; pencere dışındaki atamalar sabit kalır.
+
+solve_horizon: birden çok ayı (ör. çeyrek) tek durumda çözer; saat ve hafta
+sonu dengesi ayrı ayrı her ay için değil, tüm ufuk için kurulur.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from src.calendar_utils import add_months, horizon_day_table, month_day_table
+from src.local_search import ObjectiveWeights, evaluate_schedule
+from src.scheduler import (
+    DEFAULT_DEMAND,
+    LEDGER_FIELDS,
+    Shift,
+    ShiftType,
+    ShiftTypeDef,
+    SolveHooks,
+    _analyze_unfilled_state,
+    _state_from_assignments,
+    _unfilled_slots,
+    generate_schedule,
+    generate_schedule_hard_min_hours,
+    repair_to_meet_min_hours,
+    rule_lookback_days,
+    set_shift_types,
+    shift_registry,
+    validate_assignments,
+)
+
+
+# Solver davranışı değişince artır: eski önbellek kayıtları kendiliğinden geçersizleşir.
+SPEC_VERSION = 4
+
+
+@dataclass(frozen=True)
+class ProblemSpec:
+    year: int
+    month: int
+    staff_ids: Tuple[int, ...]
+    blocked_any: Dict[int, FrozenSet[str]]
+    blocked_type: Dict[int, Dict[str, str]]
+    soft_avoid: Dict[int, FrozenSet[str]]
+    min_hours: Dict[int, int]
+    transition_rules: Tuple[Dict[str, str], ...]
+    holidays: FrozenSet[str] = frozenset()
+    boundary: Tuple[Tuple[str, ShiftType, int], ...] = ()   # önceki ayın son gün(ler)i (rule_lookback_days)
+    demand: Tuple[Dict[str, object], ...] = ()               # boş: varsayılan ihtiyaç deseni
+    shift_types: Tuple[ShiftTypeDef, ...] = ()               # boş: kurulu vardiya tipleri
+    skills: Dict[int, int] = field(default_factory=dict)     # kişi -> yetkinlik bit maskesi
+    max_hours: Dict[int, int] = field(default_factory=dict)  # kişi -> üst saat sınırı (yoksa sınırsız)
+    overtime_budget: int = 0                                 # sınırların üstü için ortak fazla mesai saati
+    ledger: Optional[Dict[int, Dict[str, int]]] = None       # önceki ayların adil dağılım toplamları
+
+    def __hash__(self) -> int:
+        return hash(self.canonical_hash())
+
+    def canonical_hash(self) -> str:
+        """
+        Girdilerin kanonik SHA-256 özeti. Sadece çözümü etkileyen veriler
+        girer: ay günleri (+ geçiş kuralları için önceki gün) dışındaki
+        blok/istek kayıtları, kuralların geriye baktığı günler (son gün; pencere
+        kuralı varsa K-1 gün) dışındaki boundary atamaları,
+        kural sırası ve dict sıraları özeti değiştirmez.
+        staff_ids sırası tie-break'i etkilediği için olduğu gibi korunur.
+        """
+        cal = month_day_table(self.year, self.month)
+        days = set(cal.isos)
+        block_days = days | {cal.prev_isos[0]}
+        # pencere kuralları ay başından geriye daha çok gün görür
+        first = date.fromisoformat(cal.isos[0])
+        lookback = rule_lookback_days(list(self.transition_rules))
+        boundary_days = {(first - timedelta(days=i)).isoformat() for i in range(1, lookback + 1)}
+
+        def _days(m: Dict[int, FrozenSet[str]], keep: Set[str]):
+            return sorted([sid, sorted(ds & keep)] for sid, ds in m.items() if ds & keep)
+
+        payload = {
+            "v": SPEC_VERSION,
+            "year": self.year,
+            "month": self.month,
+            "staff": list(self.staff_ids),
+            "blocked": _days(self.blocked_any, block_days),
+            "blocked_type": sorted(
+                [sid, sorted([d, t] for d, t in m.items() if d in block_days)]
+                for sid, m in self.blocked_type.items()
+                if any(d in block_days for d in m)
+            ),
+            "soft": _days(self.soft_avoid, days),
+            "min_hours": sorted([sid, h] for sid, h in self.min_hours.items()),
+            "rules": sorted({
+                (r["prev_type"], r["next_type"], r["apply_day"], r["rule_kind"], r["max_count"], r["window_days"],
+                 r["rest_hours"], r["skill_mask"], r["min_count"], r["note"] if r["rule_kind"] == "COVERAGE" else "")
+                for r in self.transition_rules
+            }),
+            "holidays": sorted(self.holidays & days),
+            "boundary": sorted([d, t, sid] for d, t, sid in self.boundary if d in boundary_days),
+            # satır sırası gün içi doldurma sırasını belirlediği için sıralanmaz
+            "demand": [
+                [r["day_kind"], r["shift_type"], r["count"]] for r in self.demand
+            ] or [list(r) for r in DEFAULT_DEMAND],
+            "skills": sorted([sid, m] for sid, m in self.skills.items() if m),
+            "max_hours": sorted([sid, h] for sid, h in self.max_hours.items()),
+            "overtime_budget": self.overtime_budget if self.max_hours else 0,
+            "ledger": None if self.ledger is None else sorted(
+                [sid] + [row.get(name, 0) for name in LEDGER_FIELDS] for sid, row in self.ledger.items()
+            ),
+            # renk çözümü etkilemez; başlangıç/bitiş dinlenme kuralını etkiler
+            "shift_types": [[t.code, t.hours, t.start, t.end] for t in self.shift_types],
+        }
+        raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def from_inputs(
+        cls,
+        year: int,
+        month: int,
+        staff_ids: List[int],
+        blocked_any: Dict[int, Set[str]],
+        min_required_hours: int | Dict[int, int],
+        transition_rules: List[Dict] | None = None,
+        blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
+        soft_avoid: Optional[Dict[int, Set[str]]] = None,
+        holidays: Optional[Set[str]] = None,
+        boundary: Optional[List[Tuple[str, ShiftType, int]]] = None,
+        demand: List[Dict] | None = None,
+        shift_types: Optional[Tuple[ShiftTypeDef, ...]] = None,
+        skills: Optional[Dict[int, int]] = None,
+        max_hours: Optional[Dict[int, int]] = None,
+        overtime_budget: int = 0,
+        ledger: Optional[Dict[int, Dict[str, int]]] = None,
+    ) -> "ProblemSpec":
+        """generate_schedule_hard_min_hours ile aynı girdilerden problem tanımı kurar."""
+        staff = tuple(int(s) for s in staff_ids)
+        if isinstance(min_required_hours, dict):
+            min_hours = {sid: int(min_required_hours.get(sid, 0)) for sid in staff}
+        else:
+            min_hours = {sid: int(min_required_hours) for sid in staff}
+        rules = tuple(
+            {
+                "prev_type": str(r["prev_type"]),
+                "next_type": str(r["next_type"]),
+                "apply_day": str(r.get("apply_day", "ANY")),
+                "rule_kind": str(r.get("rule_kind") or "TRANSITION"),
+                "max_count": int(r.get("max_count") or 0),
+                "window_days": int(r.get("window_days") or 0),
+                "rest_hours": int(r.get("rest_hours") or 0),
+                "skill_mask": int(r.get("skill_mask") or 0),
+                "min_count": int(r.get("min_count") or 0),
+                "note": str(r.get("note") or ""),
+            }
+            for r in (transition_rules or [])
+        )
+        return cls(
+            year=int(year),
+            month=int(month),
+            staff_ids=staff,
+            blocked_any={int(k): frozenset(v) for k, v in (blocked_any or {}).items() if v},
+            blocked_type={int(k): dict(v) for k, v in (blocked_type or {}).items() if v},
+            soft_avoid={int(k): frozenset(v) for k, v in (soft_avoid or {}).items() if v},
+            min_hours=min_hours,
+            transition_rules=rules,
+            holidays=frozenset(holidays or ()),
+            boundary=tuple((str(d), str(t), int(sid)) for d, t, sid in (boundary or ())),
+            demand=tuple(
+                {"day_kind": str(r["day_kind"]), "shift_type": str(r["shift_type"]), "count": int(r["count"])}
+                for r in (demand or [])
+            ),
+            shift_types=tuple(shift_types) if shift_types is not None else shift_registry().types,
+            skills={int(sid): int(m) for sid, m in (skills or {}).items() if int(sid) in staff and m},
+            max_hours={int(sid): int(h) for sid, h in (max_hours or {}).items() if int(sid) in staff},
+            overtime_budget=max(0, int(overtime_budget)),
+            ledger=None if ledger is None else {
+                int(sid): {name: int(row.get(name, 0)) for name in LEDGER_FIELDS}
+                for sid, row in ledger.items() if int(sid) in staff
+            },
+        )
+
+    def day_table(self):
+        """Tatillerle kurulmuş ay tablosu (HOLIDAY ihtiyaç deseni için)."""
+        return month_day_table(self.year, self.month, self.holidays)
+
+
+@dataclass
+class SolveResult:
+    assignments: List[Tuple[str, ShiftType, int]]
+    unfilled: List[Shift]
+    unfilled_debug: List[Dict]
+    hours: Dict[int, int]
+    swaps: int
+    score: Dict[str, float]
+    seed: Optional[int] = None
+    complete: bool = True      # süre/iptal yüzünden yarıda kaldıysa False
+
+    @property
+    def objective(self) -> float:
+        return float(self.score["objective"])
+
+
+def solve_once(
+    spec: ProblemSpec,
+    seed: Optional[int] = None,
+    slot_order: str = "calendar",
+    improve_seconds: float = 0.0,
+    weights: ObjectiveWeights = ObjectiveWeights(),
+    score_mode: str = "count",
+) -> SolveResult:
+    """Tek bir greedy + repair (+ opsiyonel iyileştirme) çalıştırması ve puanı."""
+    assignments, unfilled, unfilled_debug, hours, swaps = generate_schedule_hard_min_hours(
+        spec.year, spec.month, list(spec.staff_ids), spec.blocked_any, spec.min_hours,
+        transition_rules=list(spec.transition_rules),
+        blocked_type=spec.blocked_type,
+        soft_avoid=spec.soft_avoid,
+        slot_order=slot_order,
+        boundary=list(spec.boundary),
+        day_table=spec.day_table(),
+        demand=list(spec.demand),
+        skills=spec.skills,
+        max_hours=spec.max_hours,
+        overtime_budget=spec.overtime_budget,
+        ledger=spec.ledger,
+        score_mode=score_mode,
+        improve_seconds=improve_seconds,
+        seed=seed,
+    )
+    score = evaluate_schedule(
+        assignments, len(unfilled), list(spec.staff_ids), spec.min_hours,
+        soft_avoid=spec.soft_avoid, weights=weights,
+    )
+    return SolveResult(assignments, unfilled, unfilled_debug, hours, swaps, score, seed)
+
+
+def solve_warm(
+    spec: ProblemSpec,
+    seed_plan: List[Tuple[str, ShiftType, int, bool]],
+    slot_order: str = "calendar",
+    improve_seconds: float = 0.0,
+    weights: ObjectiveWeights = ObjectiveWeights(),
+    score_mode: str = "count",
+) -> SolveResult:
+    """
+    Kayıtlı/düzenlenmiş bir plandan başlayarak çözer: [(gün, vardiya, kişi, kilitli)].
+    Neredeyse bitmiş bir planda sadece eksik slotlar ve min saat dengesi için iş yapılır.
+    """
+    assignments, unfilled, unfilled_debug, hours, swaps = generate_schedule_hard_min_hours(
+        spec.year, spec.month, list(spec.staff_ids), spec.blocked_any, spec.min_hours,
+        transition_rules=list(spec.transition_rules),
+        blocked_type=spec.blocked_type,
+        soft_avoid=spec.soft_avoid,
+        slot_order=slot_order,
+        boundary=list(spec.boundary),
+        day_table=spec.day_table(),
+        demand=list(spec.demand),
+        skills=spec.skills,
+        max_hours=spec.max_hours,
+        overtime_budget=spec.overtime_budget,
+        ledger=spec.ledger,
+        score_mode=score_mode,
+        improve_seconds=improve_seconds,
+        warm_start=seed_plan,
+    )
+    score = evaluate_schedule(
+        assignments, len(unfilled), list(spec.staff_ids), spec.min_hours,
+        soft_avoid=spec.soft_avoid, weights=weights,
+    )
+    return SolveResult(assignments, unfilled, unfilled_debug, hours, swaps, score)
+
+
+def _run_start(args: Tuple[ProblemSpec, Optional[int], str, float, ObjectiveWeights, str]) -> SolveResult:
+    spec, seed, slot_order, improve_seconds, weights, score_mode = args
+    if spec.shift_types:
+        set_shift_types(spec.shift_types)  # alt süreç DB'den kurulum yapmamış olabilir
+    return solve_once(
+        spec, seed=seed, slot_order=slot_order, improve_seconds=improve_seconds, weights=weights, score_mode=score_mode
+    )
+
+
+def _start_seeds(n_starts: int, base_seed: int) -> List[Optional[int]]:
+    return [None] + [base_seed + i for i in range(1, max(1, n_starts))]
+
+
+def solve_multistart(
+    spec: ProblemSpec,
+    n_starts: int = 8,
+    workers: Optional[int] = None,
+    slot_order: str = "calendar",
+    improve_seconds: float = 0.0,
+    base_seed: int = 0,
+    weights: ObjectiveWeights = ObjectiveWeights(),
+    score_mode: str = "count",
+) -> SolveResult:
+    """
+    n_starts varyantı workers süreçte çözer ve en düşük amaç değerli sonucu döndürür.
+    workers=1 ise havuz açılmaz (aynı süreçte sırayla çalışır).
+    Eşit puanda daha küçük başlangıç indeksi kazanır (sonuç tekrarlanabilir).
+    """
+    jobs = [
+        (spec, seed, slot_order, improve_seconds, weights, score_mode)
+        for seed in _start_seeds(n_starts, base_seed)
+    ]
+    if workers == 1 or len(jobs) == 1:
+        results = [_run_start(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_start, jobs))
+
+    best = results[0]
+    for r in results[1:]:
+        if r.objective < best.objective:
+            best = r
+    return best
+
+
+# -------------------- ANYTIME --------------------
+class CancelToken:
+    """Başka bir thread'den (ör. UI) çözümü durdurmak için."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+@dataclass(frozen=True)
+class SolveProgress:
+    phase: str                 # greedy | repair | improve | done
+    slots_filled: int
+    slots_total: int
+    deficit_hours: Optional[int]
+    best_objective: Optional[float]
+    elapsed_s: float
+
+
+class _AnytimeHooks(SolveHooks):
+    def __init__(
+        self,
+        deadline: Optional[float],
+        cancel: Optional[CancelToken],
+        on_progress: Optional[Callable[[SolveProgress], None]],
+    ):
+        self.deadline = deadline
+        self.cancel = cancel
+        self.on_progress = on_progress
+        self.t_start = time.monotonic()
+        self.stopped = False
+        self.info = {"slots_filled": 0, "slots_total": 0, "deficit_hours": None, "best_objective": None}
+
+    def should_stop(self) -> bool:
+        if not self.stopped:
+            timed_out = self.deadline is not None and time.monotonic() >= self.deadline
+            self.stopped = timed_out or (self.cancel is not None and self.cancel.cancelled)
+        return self.stopped
+
+    def progress(self, phase: str, **info) -> None:
+        for k in self.info:
+            if k in info:
+                self.info[k] = info[k]
+        if self.on_progress is not None:
+            self.on_progress(SolveProgress(
+                phase=phase,
+                elapsed_s=round(time.monotonic() - self.t_start, 3),
+                **self.info,
+            ))
+
+    def time_left(self, budget_s: float) -> float:
+        # greedy + repair bittikten sonra çağrılır: iyileştirme kalan süreye sığar
+        if self.deadline is None:
+            return budget_s
+        return min(budget_s, max(0.0, self.deadline - time.monotonic()))
+
+
+def solve_anytime(
+    spec: ProblemSpec,
+    time_limit_s: Optional[float] = None,
+    cancel: Optional[CancelToken] = None,
+    on_progress: Optional[Callable[[SolveProgress], None]] = None,
+    slot_order: str = "calendar",
+    improve_seconds: float = 0.0,
+    weights: ObjectiveWeights = ObjectiveWeights(),
+    score_mode: str = "count",
+) -> SolveResult:
+    """
+    greedy -> repair -> iyileştirme; her faz süre sınırı / iptal kontrol eder.
+    - Greedy yarıda kalırsa kalan slotlar dolmayan sayılır, plan yine döner.
+    - improve_seconds, repair bittiğinde süre sınırının kalanıyla kırpılır.
+    on_progress her fazda SolveProgress ile çağrılır (UI ilerleme çubuğu için).
+    """
+    deadline = time.monotonic() + time_limit_s if time_limit_s is not None else None
+    hooks = _AnytimeHooks(deadline, cancel, on_progress)
+
+    assignments, unfilled, unfilled_debug, hours, swaps = generate_schedule_hard_min_hours(
+        spec.year, spec.month, list(spec.staff_ids), spec.blocked_any, spec.min_hours,
+        transition_rules=list(spec.transition_rules),
+        blocked_type=spec.blocked_type,
+        soft_avoid=spec.soft_avoid,
+        slot_order=slot_order,
+        boundary=list(spec.boundary),
+        day_table=spec.day_table(),
+        demand=list(spec.demand),
+        skills=spec.skills,
+        max_hours=spec.max_hours,
+        overtime_budget=spec.overtime_budget,
+        ledger=spec.ledger,
+        score_mode=score_mode,
+        improve_seconds=improve_seconds,
+        hooks=hooks,
+    )
+    score = evaluate_schedule(
+        assignments, len(unfilled), list(spec.staff_ids), spec.min_hours,
+        soft_avoid=spec.soft_avoid, weights=weights,
+    )
+    hooks.progress(
+        "done",
+        slots_filled=len(assignments),
+        slots_total=len(assignments) + len(unfilled),
+        deficit_hours=int(score["deficit_hours"]),
+        best_objective=float(score["objective"]),
+    )
+    return SolveResult(assignments, unfilled, unfilled_debug, hours, swaps, score, complete=not hooks.stopped)
+
+
+# -------------------- ÖNBELLEK --------------------
+def solution_key(spec: ProblemSpec, **options) -> str:
+    """Problem özeti + çözüm seçenekleri (slot_order, improve_seconds, ...) -> önbellek anahtarı."""
+    raw = json.dumps(options, sort_keys=True, default=str)
+    return hashlib.sha256((spec.canonical_hash() + "|" + raw).encode("utf-8")).hexdigest()
+
+
+def solve_cached(
+    spec: ProblemSpec,
+    cache=None,
+    time_limit_s: Optional[float] = None,
+    cancel: Optional[CancelToken] = None,
+    on_progress: Optional[Callable[[SolveProgress], None]] = None,
+    slot_order: str = "calendar",
+    improve_seconds: float = 0.0,
+    score_mode: str = "count",
+) -> Tuple[SolveResult, bool]:
+    """
+    Önce önbelleğe bakar, yoksa solve_anytime ile çözer.
+    Sadece tamamlanmış (süre/iptal ile kesilmemiş) sonuçlar saklanır.
+    Dönüş: (sonuç, önbellekten mi geldi)
+    """
+    from src.solution_cache import default_cache
+
+    cache = cache if cache is not None else default_cache()
+    key = solution_key(spec, slot_order=slot_order, improve_seconds=float(improve_seconds), score_mode=score_mode)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit, True
+
+    result = solve_anytime(
+        spec,
+        time_limit_s=time_limit_s,
+        cancel=cancel,
+        on_progress=on_progress,
+        slot_order=slot_order,
+        improve_seconds=improve_seconds,
+        score_mode=score_mode,
+    )
+    if result.complete:
+        cache.put(key, result)
+    return result, False
+
+
+# -------------------- PENCERELİ YENİDEN PLAN --------------------
+def conflict_days(spec: ProblemSpec, saved: List[Tuple[str, ShiftType, int]]) -> List[str]:
+    """Kayıtlı planda güncel kısıtlarla (ör. sonradan girilen rapor) çakışan günler."""
+    _summary, violations, _deficits = validate_assignments(
+        spec.year, spec.month, saved, list(spec.staff_ids), spec.blocked_any, 0,
+        transition_rules=list(spec.transition_rules),
+        blocked_type=spec.blocked_type,
+        boundary=list(spec.boundary),
+        day_table=spec.day_table(),
+        skills=spec.skills,
+        demand=list(spec.demand),
+    )
+    days = set(month_day_table(spec.year, spec.month).isos)
+    return sorted({v["date"] for v in violations if v["date"] in days})
+
+
+def replan_window(
+    spec: ProblemSpec,
+    saved: List[Tuple[str, ShiftType, int]],
+    affected_days: List[str],
+    radius: int = 1,
+    slot_order: str = "calendar",
+    weights: ObjectiveWeights = ObjectiveWeights(),
+    score_mode: str = "count",
+) -> Tuple[SolveResult, List[str]]:
+    """
+    Etkilenen her günün ±radius çevresi (ay içinde) yeniden çözülür:
+    pencere dışındaki kayıtlı atamalar pinned olarak sabitlenir, pencere
+    slotları greedy ile doldurulur, min saat dengelemesi sadece pencere
+    atamalarını taşır. radius=1 dünkü/yarınki geçiş kurallarını da kapsar.
+    score_mode="hours": pencere slotları pinned saatlerle birlikte min saat
+    hedefinin en çok altında kalana verilir.
+    Dönüş: (tüm ayın planı, yeniden çözülen günler)
+    """
+    cal = spec.day_table()
+    window: Set[int] = set()
+    for d in affected_days:
+        di = cal.index.get(d)
+        if di is None:
+            continue
+        window.update(range(max(0, di - radius), min(len(cal), di + radius + 1)))
+    window_days = [cal.isos[di] for di in sorted(window)]
+    in_window = set(window_days)
+
+    staff = list(spec.staff_ids)
+    rules = list(spec.transition_rules)
+    pinned = [(d, stype, int(sid)) for d, stype, sid in saved if d in cal.index and d not in in_window]
+    assignments, _unfilled, _debug = generate_schedule(
+        spec.year, spec.month, staff, spec.blocked_any,
+        transition_rules=rules,
+        blocked_type=spec.blocked_type,
+        soft_avoid=spec.soft_avoid,
+        slot_order=slot_order,
+        boundary=list(spec.boundary),
+        pinned=pinned,
+        only_days=in_window,
+        day_table=cal,
+        demand=list(spec.demand),
+        skills=spec.skills,
+        max_hours=spec.max_hours,
+        overtime_budget=spec.overtime_budget,
+        ledger=spec.ledger,
+        score_mode=score_mode,
+        min_required_hours=spec.min_hours,
+    )
+    assignments, hours, swaps = repair_to_meet_min_hours(
+        spec.year, spec.month, assignments, staff, spec.blocked_any, spec.min_hours,
+        transition_rules=rules,
+        blocked_type=spec.blocked_type,
+        locked=set(pinned),
+        boundary=list(spec.boundary),
+        day_table=cal,
+        skills=spec.skills,
+        max_hours=spec.max_hours,
+        overtime_budget=spec.overtime_budget,
+    )
+    unfilled = _unfilled_slots(cal, assignments, list(spec.demand))
+    state = _state_from_assignments(
+        cal, staff, assignments, spec.blocked_any, rules, spec.blocked_type, list(spec.boundary), spec.skills,
+        spec.max_hours, spec.overtime_budget,
+    )
+    unfilled_debug = _analyze_unfilled_state(state, unfilled, staff)
+    score = evaluate_schedule(
+        assignments, len(unfilled), staff, spec.min_hours,
+        soft_avoid=spec.soft_avoid, weights=weights,
+    )
+    return SolveResult(assignments, unfilled, unfilled_debug, hours, swaps, score), window_days
+
+
+# -------------------- ÇOK AYLI UFUK --------------------
+@dataclass
+class HorizonResult:
+    months: List[Tuple[int, int]]
+    result: SolveResult                                    # tüm ufkun planı
+    hours_by_month: Dict[Tuple[int, int], Dict[int, int]]
+    weekends: Dict[int, int]                               # kişi -> ufuktaki hafta sonu vardiyası
+
+    def month_assignments(self, year: int, month: int) -> List[Tuple[str, ShiftType, int]]:
+        prefix = f"{int(year):04d}-{int(month):02d}-"
+        return [a for a in self.result.assignments if a[0].startswith(prefix)]
+
+
+def horizon_months(year: int, month: int, n_months: int) -> List[Tuple[int, int]]:
+    return [add_months(int(year), int(month), k) for k in range(max(1, int(n_months)))]
+
+
+def solve_horizon(
+    year: int,
+    month: int,
+    n_months: int,
+    staff_ids: List[int],
+    blocked_any: Dict[int, Set[str]],
+    min_hours_by_month: Dict[Tuple[int, int], Dict[int, int]],
+    transition_rules: List[Dict] | None = None,
+    blocked_type: Optional[Dict[int, Dict[str, str]]] = None,
+    soft_avoid: Optional[Dict[int, Set[str]]] = None,
+    holidays: Optional[Set[str]] = None,
+    boundary: Optional[List[Tuple[str, ShiftType, int]]] = None,
+    slot_order: str = "calendar",
+    improve_seconds: float = 0.0,
+    seed: Optional[int] = None,
+    weights: ObjectiveWeights = ObjectiveWeights(weekend=1.0),
+    demand: List[Dict] | None = None,
+    skills: Optional[Dict[int, int]] = None,
+    max_hours: Optional[Dict[int, int]] = None,
+    overtime_budget: int = 0,
+    score_mode: str = "count",
+    ledger: Optional[Dict[int, Dict[str, int]]] = None,
+) -> HorizonResult:
+    """
+    (year, month)'dan başlayan n_months ayı tek gün tablosu ve tek durumla çözer:
+    - ay geçişleri ufuk içinde sıradan gün geçişidir (boundary sadece ufuk başı için)
+    - min saat hedefi kişi başına ayların toplamıdır; repair / iyileştirme
+      saatleri ay ay değil tüm ufukta dengeler
+    - greedy hafta sonu slotlarını ufuk boyunca hafta sonu sayısına göre dağıtır;
+      iyileştirme de weights.weekend ile bu dengeyi korur
+    min_hours_by_month: {(yıl, ay): {kişi: min saat}}; verilmeyen ay 0 sayılır.
+    max_hours / overtime_budget: aylık değerler; ufuk için ay sayısıyla çarpılır.
+    ledger: ufuk başından önceki ayların adil dağılım toplamları (ledger_totals).
+    """
+    cal = horizon_day_table(year, month, n_months, holidays)
+    months = horizon_months(year, month, n_months)
+    staff = [int(s) for s in staff_ids]
+    target = {
+        sid: sum(int(min_hours_by_month.get(ym, {}).get(sid, 0)) for ym in months)
+        for sid in staff
+    }
+    assignments, unfilled, unfilled_debug, hours, swaps = generate_schedule_hard_min_hours(
+        year, month, staff, blocked_any, target,
+        transition_rules=transition_rules,
+        blocked_type=blocked_type,
+        soft_avoid=soft_avoid,
+        slot_order=slot_order,
+        improve_seconds=improve_seconds,
+        seed=seed,
+        boundary=boundary,
+        day_table=cal,
+        balance_weekends=True,
+        weights=weights,
+        demand=demand,
+        skills=skills,
+        max_hours={sid: int(h) * len(months) for sid, h in (max_hours or {}).items()},
+        overtime_budget=int(overtime_budget) * len(months),
+        score_mode=score_mode,
+        ledger=ledger,
+    )
+    score = evaluate_schedule(
+        assignments, len(unfilled), staff, target,
+        soft_avoid=soft_avoid, weights=weights,
+    )
+
+    hours_by_month = {ym: {sid: 0 for sid in staff} for ym in months}
+    weekends = {sid: 0 for sid in staff}
+    hours_of = shift_registry().hours_of
+    for d, stype, sid in assignments:
+        per_staff = hours_by_month[(int(d[:4]), int(d[5:7]))]
+        per_staff[sid] = per_staff.get(sid, 0) + hours_of(stype)
+        if cal.is_weekend[cal.index[d]]:
+            weekends[sid] = weekends.get(sid, 0) + 1
+    result = SolveResult(assignments, unfilled, unfilled_debug, hours, swaps, score, seed)
+    return HorizonResult(months, result, hours_by_month, weekends)
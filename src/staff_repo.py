@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from src.db import get_conn
 
 def add_staff(full_name: str) -> None:
@@ -39,3 +39,48 @@ def delete_staff(staff_id: int) -> None:
     with get_conn() as conn:
         conn.execute("DELETE FROM staff WHERE id = ?", (staff_id,))
         conn.commit()
+
+def set_staff_skills(staff_id: int, skills_mask: int) -> None:
+    with get_conn() as conn:
+        conn.execute("UPDATE staff SET skills = ? WHERE id = ?", (int(skills_mask), staff_id))
+        conn.commit()
+
+def staff_skill_masks(only_active: bool = True) -> Dict[int, int]:
+    """Kişi -> yetkinlik bit maskesi (maskesi 0 olanlar dahil edilmez)."""
+    q = "SELECT id, skills FROM staff WHERE skills != 0"
+    if only_active:
+        q += " AND is_active = 1"
+    with get_conn() as conn:
+        rows = conn.execute(q).fetchall()
+    return {int(r["id"]): int(r["skills"]) for r in rows}
+
+def set_staff_max_hours(staff_id: int, max_hours: Optional[int]) -> None:
+    """Aylık üst saat sınırı; None (ya da negatif) sınırı kaldırır."""
+    value = int(max_hours) if max_hours is not None and int(max_hours) >= 0 else None
+    with get_conn() as conn:
+        conn.execute("UPDATE staff SET max_hours = ? WHERE id = ?", (value, staff_id))
+        conn.commit()
+
+def staff_max_hours(only_active: bool = True) -> Dict[int, int]:
+    """Kişi -> aylık üst saat sınırı (sınırı olmayanlar dahil edilmez)."""
+    q = "SELECT id, max_hours FROM staff WHERE max_hours IS NOT NULL"
+    if only_active:
+        q += " AND is_active = 1"
+    with get_conn() as conn:
+        rows = conn.execute(q).fetchall()
+    return {int(r["id"]): int(r["max_hours"]) for r in rows}
+
+def get_overtime_budget() -> int:
+    """Üst sınırların üstüne çıkılabilecek aylık ortak fazla mesai saati (settings)."""
+    with get_conn() as conn:
+        row = conn.execute("SELECT value FROM settings WHERE key = 'overtime_budget'").fetchone()
+    return int(row["value"]) if row else 0
+
+def set_overtime_budget(hours: int) -> None:
+    with get_conn() as conn:
+        conn.execute(
+            "INSERT INTO settings(key, value) VALUES('overtime_budget', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (str(max(0, int(hours))),),
+        )
+        conn.commit()
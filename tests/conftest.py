@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    """Her test için boş bir SQLite veritabanı (src.db.DB_PATH geçici dosyaya)."""
+    from src import db
+
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "nobet_planner.sqlite3")
+    db.init_db()
+    return db.DB_PATH
@@ -0,0 +1,33 @@
+from src.calendar_utils import iter_month_days
+from src.scheduler import HOOK_EVERY_GREEDY_CELLS, SolveHooks, generate_schedule
+
+DEMAND = [{"day_kind": kind, "shift_type": t, "count": 2} for kind in ("WEEKDAY", "WEEKEND", "HOLIDAY") for t in ("DAY", "NIGHT")]
+CELLS = 2 * len(list(iter_month_days(2026, 3)))
+
+
+class _StopAfter(SolveHooks):
+    """n. yoklamada durdurur; greedy yoklamalarını sayar."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.polls = 0
+
+    def should_stop(self) -> bool:
+        self.polls += 1
+        return self.polls >= self.n
+
+
+def test_greedy_polls_hooks_every_few_cells():
+    hooks = _StopAfter(10 ** 9)
+    assignments, unfilled, _d = generate_schedule(2026, 3, list(range(1, 21)), {}, demand=DEMAND, hooks=hooks)
+    assert unfilled == []
+    assert hooks.polls == -(-CELLS // HOOK_EVERY_GREEDY_CELLS)
+
+
+def test_greedy_stop_keeps_plan_so_far():
+    hooks = _StopAfter(3)
+    assignments, unfilled, _d = generate_schedule(2026, 3, list(range(1, 21)), {}, demand=DEMAND, hooks=hooks)
+    # iki yoklama aralığı kadar hücre dolar; kalan slotlar dolmayan sayılır
+    filled = 2 * HOOK_EVERY_GREEDY_CELLS * 2
+    assert len(assignments) == filled
+    assert len(unfilled) == CELLS * 2 - filled
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from src.calendar_utils import iter_month_days, month_day_table
+from src.scheduler import Shift, _state_from_assignments, can_assign, explain_cannot_assign
+
+SHIFT_TYPES = ("DAY", "NIGHT", "D24")
+RULES = [
+    {"prev_type": "NIGHT", "next_type": "DAY", "apply_day": "ANY"},
+    {"prev_type": "D24", "next_type": "ANY", "apply_day": "ANY"},
+    {"prev_type": "NIGHT", "next_type": "D24", "apply_day": "WEEKEND"},
+]
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_public_api_agrees_with_month_state(seed):
+    """can_assign / explain_cannot_assign ile _MonthState.check aynı cevabı verir (d+1 geçişi dahil)."""
+    rnd = random.Random(seed)
+    year, month = 2026, rnd.randint(1, 12)
+    days = [d.iso for d in iter_month_days(year, month)]
+    staff = list(range(1, 11))
+    assignments = []
+    for d in days:
+        for sid in rnd.sample(staff, 4):
+            assignments.append((d, rnd.choice(SHIFT_TYPES), sid))
+    blocked_any, blocked_type = {}, {}
+    for sid in staff:
+        for d in rnd.sample(days, 2):
+            blocked_any.setdefault(sid, set()).add(d)
+            blocked_type.setdefault(sid, {})[d] = rnd.choice(["rapor", "yillik_izin"])
+
+    cal = month_day_table(year, month)
+    state = _state_from_assignments(cal, staff, assignments, blocked_any, RULES, blocked_type)
+    by_day = {}
+    for d, t, sid in assignments:
+        by_day.setdefault(d, []).append((sid, t))
+
+    for _ in range(300):
+        sid, di, stype = rnd.choice(staff), rnd.randrange(len(days)), rnd.choice(SHIFT_TYPES)
+        sh = Shift(days[di], stype)
+        code = state.tt.code(stype)
+        assert can_assign(sid, sh, by_day, blocked_any, RULES, blocked_type) == state.can_assign(sid, di, code)
+        assert explain_cannot_assign(sid, sh, by_day, blocked_any, RULES, blocked_type) == state.explain(sid, di, code)
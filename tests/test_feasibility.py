@@ -0,0 +1,42 @@
+from src.feasibility import augment_to_type, find_impossible_days, max_type_matching
+
+DEMAND = [{"day_kind": kind, "shift_type": t, "count": 2} for kind in ("WEEKDAY", "WEEKEND", "HOLIDAY") for t in ("DAY", "NIGHT")]
+RAPOR_DAY = [{"prev_type": "RAPOR", "next_type": "DAY", "apply_day": "ANY"}]
+
+
+def test_matching_reroutes_earlier_choice():
+    # 1 önce A'yı alır; 2 sadece A yapabilir -> artırıcı yol 1'i B'ye kaydırır
+    eligible = {1: ["A", "B"], 2: ["A"]}
+    assert max_type_matching(eligible, {"A": 1, "B": 1}) == {1: "B", 2: "A"}
+    assert len(max_type_matching({1: ["A"], 2: ["A"], 3: ["A"]}, {"A": 2})) == 2
+
+
+def test_matching_keeps_initial_assignment():
+    match = max_type_matching({1: ["A", "B"], 2: ["B"], 3: ["A"]}, {"A": 1, "B": 1}, initial={1: "A"})
+    assert 1 in match
+    assert sorted(match.values()) == ["A", "B"]
+
+
+def test_augment_to_type_moves_holder():
+    match = {1: "A"}
+    assert augment_to_type({1: ["A", "B"], 2: ["A"]}, match, "B")
+    assert match == {1: "B", 2: "A"}
+    assert not augment_to_type({1: ["A"]}, {1: "A"}, "B")
+
+
+def test_find_impossible_days_reports_missing_min():
+    staff = [1, 2, 3, 4]
+    blocked = {1: {"2026-03-10"}, 2: {"2026-03-10"}, 3: {"2026-03-11"}}
+    types = {1: {"2026-03-10": "rapor"}, 2: {"2026-03-10": "rapor"}, 3: {"2026-03-11": "yillik_izin"}}
+    days = find_impossible_days(2026, 3, staff, blocked, RAPOR_DAY, types, demand=DEMAND)
+    assert [d["date"] for d in days] == ["2026-03-10", "2026-03-11"]
+
+    tenth, eleventh = days
+    assert (tenth["need"], tenth["available_staff"], tenth["max_fillable"], tenth["missing_min"]) == (4, 2, 2, 2)
+    # 11 Mart: rapordan dönen 1 ve 2 gündüze giremez; 4 kişilik ihtiyaçta gündüz 1 eksik kalır
+    assert (eleventh["need"], eleventh["available_staff"], eleventh["missing_min"]) == (4, 3, 1)
+    assert eleventh["by_type"] == {"DAY": (2, 1), "NIGHT": (2, 2)}
+
+
+def test_find_impossible_days_empty_when_feasible():
+    assert find_impossible_days(2026, 3, [1, 2, 3, 4], {}, RAPOR_DAY, demand=DEMAND) == []
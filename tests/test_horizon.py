@@ -0,0 +1,54 @@
+import random
+
+from src.calendar_utils import iter_month_days
+from src.rules_presets import PRESETS
+from src.scheduler import validate_assignments
+from src.solver import solve_horizon
+
+RULES = [dict(r) for r in PRESETS["Katı"]] + [
+    {"prev_type": "NIGHT", "next_type": "DAY", "apply_day": "ANY"},
+    {"rule_kind": "CONSECUTIVE", "next_type": "ANY", "max_count": 3},
+]
+DEMAND = [{"day_kind": kind, "shift_type": t, "count": 3} for kind in ("WEEKDAY", "WEEKEND", "HOLIDAY") for t in ("DAY", "NIGHT")]
+MONTHS = [(2026, 1), (2026, 2), (2026, 3)]
+
+
+def _inputs(seed: int):
+    rnd = random.Random(seed)
+    staff = list(range(1, 31))
+    days = [d.iso for ym in MONTHS for d in iter_month_days(*ym)]
+    blocked = {}
+    for sid in staff:
+        for d in days:
+            if rnd.random() < 0.05:
+                blocked.setdefault(sid, set()).add(d)
+    min_hours = {ym: {sid: rnd.choice([40, 60, 80]) for sid in staff} for ym in MONTHS}
+    return staff, blocked, min_hours
+
+
+def test_horizon_months_chain_across_boundaries():
+    staff, blocked, min_hours = _inputs(3)
+    hz = solve_horizon(2026, 1, 3, staff, blocked, min_hours, RULES, seed=3, demand=DEMAND)
+    assert hz.months == MONTHS
+    assert hz.result.unfilled == []
+
+    per_month = [hz.month_assignments(*ym) for ym in MONTHS]
+    assert sorted(a for m in per_month for a in m) == sorted(hz.result.assignments)
+    # her ay tek başına, önceki ayı boundary vererek doğrulanır: ay geçişi sıradan gün geçişidir
+    prev = None
+    for ym, month_rows in zip(MONTHS, per_month):
+        assert {d for d, _t, _s in month_rows} == {d.iso for d in iter_month_days(*ym)}
+        assert validate_assignments(*ym, month_rows, staff, blocked, 0, RULES, boundary=prev, demand=DEMAND)[1] == []
+        prev = month_rows
+
+
+def test_horizon_targets_are_summed_over_months():
+    staff, blocked, min_hours = _inputs(5)
+    hz = solve_horizon(2026, 1, 3, staff, blocked, min_hours, RULES, seed=5, demand=DEMAND)
+    for ym in MONTHS:
+        assert set(hz.hours_by_month[ym]) == set(staff)
+    for sid in staff:
+        total = sum(hz.hours_by_month[ym][sid] for ym in MONTHS)
+        assert total >= sum(min_hours[ym][sid] for ym in MONTHS)
+    weekend_days = {d.iso for ym in MONTHS for d in iter_month_days(*ym) if d.weekday >= 5}
+    assert sum(hz.weekends.values()) == sum(1 for d, _t, _s in hz.result.assignments if d in weekend_days)
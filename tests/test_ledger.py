@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+from src.assignments_repo import replace_month
+from src.calendar_utils import iter_month_days
+from src.ledger_repo import ensure_ledger_table, ledger_totals
+from src.scheduler import _ledger_carry, generate_schedule
+
+
+def _rows(month: str):
+    conn = ensure_ledger_table()
+    try:
+        cur = conn.execute(
+            "SELECT staff_id, hours, weekends, nights, holidays FROM fairness_ledger WHERE month = ? ORDER BY staff_id",
+            (month,),
+        )
+        return [tuple(r) for r in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def _plan(rows):
+    return [{"date": d, "shift_type": t, "staff_id": sid} for d, t, sid in rows]
+
+
+def test_replace_month_refreshes_ledger(tmp_db):
+    conn = ensure_ledger_table()
+    conn.execute("INSERT INTO holidays(date) VALUES('2026-03-02')")
+    conn.commit()
+    conn.close()
+    # 1 Mart Pazar, 2 Mart resmi tatil (Pazartesi)
+    replace_month(2026, 3, _plan([("2026-03-01", "D24", 1), ("2026-03-02", "NIGHT", 1), ("2026-03-03", "DAY", 2)]))
+    assert _rows("2026-03") == [(1, 40, 1, 2, 1), (2, 8, 0, 0, 0)]  # D24 de gece yarısını geçer
+    # yeniden kayıt ayın satırlarını baştan yazar; diğer aylar etkilenmez
+    replace_month(2026, 4, _plan([("2026-04-01", "DAY", 2)]))
+    replace_month(2026, 3, _plan([("2026-03-03", "DAY", 2)]))
+    assert _rows("2026-03") == [(2, 8, 0, 0, 0)]
+    assert _rows("2026-04") == [(2, 8, 0, 0, 0)]
+
+
+def test_replace_month_rolls_back_ledger_with_assignments(tmp_db):
+    replace_month(2026, 3, _plan([("2026-03-03", "DAY", 2)]))
+    # aynı (gün, vardiya, kişi) iki kez: UNIQUE ihlali -> atamalar da defter de eski halinde kalır
+    with pytest.raises(sqlite3.IntegrityError):
+        replace_month(2026, 3, _plan([("2026-03-04", "DAY", 1), ("2026-03-05", "NIGHT", 1), ("2026-03-05", "NIGHT", 1)]))
+    assert _rows("2026-03") == [(2, 8, 0, 0, 0)]
+    conn = ensure_ledger_table()
+    try:
+        rows = conn.execute("SELECT date, shift_type, staff_id FROM assignments").fetchall()
+        assert [tuple(r) for r in rows] == [("2026-03-03", "DAY", 2)]
+    finally:
+        conn.close()
+
+
+def test_ledger_totals_sum_only_earlier_months(tmp_db):
+    replace_month(2026, 1, _plan([("2026-01-05", "DAY", 1), ("2026-01-06", "NIGHT", 2)]))
+    replace_month(2026, 2, _plan([("2026-02-07", "D24", 1)]))
+    replace_month(2026, 3, _plan([("2026-03-03", "DAY", 1)]))
+    totals = ledger_totals(2026, 3)
+    assert totals == {
+        1: {"hours": 32, "weekends": 1, "nights": 1, "holidays": 0},
+        2: {"hours": 16, "weekends": 0, "nights": 1, "holidays": 0},
+    }
+    assert ledger_totals(2026, 1) == {}
+
+
+def test_carry_is_mean_centred():
+    ledger = {1: {"hours": 300, "weekends": 9}, 2: {"hours": 100, "weekends": 3}, 9: {"hours": 999, "weekends": 99}}
+    carry = _ledger_carry(ledger, [1, 2, 3])
+    # 9 bu ayın personelinde yok; 3'ün satırı yok -> ortalamadan başlar (fark yok)
+    assert carry["hours"] == {1: 100, 2: -100}
+    assert carry["weekends"] == {1: 3, 2: -3}
+    assert carry["nights"] == {1: 0, 2: 0}
+    assert _ledger_carry(None, [1, 2]) is None
+
+
+def test_ledger_shifts_weekends_to_staff_behind():
+    staff = list(range(1, 21))
+    # tek sayılı kişiler geçmişte ortalamadan 4 hafta sonu fazla çalıştı
+    ledger = {sid: {"weekends": 8 if sid % 2 else 0} for sid in staff}
+    assignments, _u, _d = generate_schedule(2026, 3, staff, {}, ledger=ledger)
+    weekend_days = {d.iso for d in iter_month_days(2026, 3) if d.weekday >= 5}
+    ahead = sum(1 for d, _t, sid in assignments if d in weekend_days and sid % 2)
+    behind = sum(1 for d, _t, sid in assignments if d in weekend_days and not sid % 2)
+    assert ahead < behind
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from src.calendar_utils import iter_month_days, month_day_table
+from src.local_search import ObjectiveWeights, _Annealer, _targets, evaluate_schedule, improve_schedule
+from src.rules_presets import PRESETS
+from src.scheduler import _state_from_assignments, generate_schedule, validate_assignments
+
+RULES = [dict(r) for r in PRESETS["Katı"]]
+
+
+def _month(seed: int):
+    rnd = random.Random(seed)
+    year, month = 2026, rnd.randint(1, 12)
+    staff = list(range(1, rnd.randint(25, 40) + 1))
+    days = [d.iso for d in iter_month_days(year, month)]
+    blocked, soft = {}, {}
+    for sid in staff:
+        for d in days:
+            r = rnd.random()
+            if r < 0.05:
+                blocked.setdefault(sid, set()).add(d)
+            elif r < 0.08:
+                soft.setdefault(sid, set()).add(d)
+    min_hours = {sid: rnd.choice([120, 160, 200]) for sid in staff}
+    return year, month, staff, blocked, soft, min_hours
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_incremental_deltas_match_full_objective(seed):
+    """Her kabul edilen hamleden sonra biriken delta, amaç fonksiyonunun baştan hesabına eşittir."""
+    year, month, staff, blocked, soft, min_hours = _month(seed)
+    assignments, unfilled, _d = generate_schedule(year, month, staff, blocked, RULES, soft_avoid=soft)
+    cal = month_day_table(year, month)
+    state = _state_from_assignments(cal, staff, assignments, blocked, RULES)
+    slots = [(cal.index[d], t, sid) for d, t, sid in assignments]
+    missed = [(cal.index[sh.day], sh.shift_type) for sh in unfilled]
+    soft_days = {sid: {cal.index[d] for d in ds} for sid, ds in soft.items()}
+    rnd = random.Random(seed)
+    sa = _Annealer(state, slots, missed, staff, _targets(staff, min_hours), soft_days, ObjectiveWeights(weekend=1.0), rnd)
+    cur = sa.objective()
+    applied = 0
+    for _ in range(3000):
+        prop = rnd.choice([sa.propose_fill, sa.propose_move, sa.propose_swap])()
+        if prop is None:
+            continue
+        delta, apply = prop
+        apply()
+        applied += 1
+        cur += delta
+    assert applied > 100
+    assert cur == pytest.approx(sa.objective())
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_improve_lowers_objective_and_keeps_hard_rules(seed):
+    year, month, staff, blocked, soft, min_hours = _month(seed)
+    assignments, unfilled, _d = generate_schedule(year, month, staff, blocked, RULES, soft_avoid=soft)
+    locked = set(assignments[::7])
+    out, out_unfilled, stats = improve_schedule(
+        year, month, assignments, unfilled, staff, blocked, min_hours, RULES,
+        soft_avoid=soft, time_budget_s=60.0, max_iters=5000, seed=seed, locked=locked,
+    )
+    assert stats["iterations"] == 5000
+    assert stats["best_objective"] <= stats["start_objective"]
+    # istatistikteki en iyi değer, çıktının tam değerlendirmesiyle aynıdır
+    full = evaluate_schedule(out, len(out_unfilled), staff, min_hours, soft_avoid=soft)
+    assert full["objective"] == pytest.approx(stats["best_objective"])
+    assert locked <= set(out)
+    assert validate_assignments(year, month, out, staff, blocked, 0, RULES)[1] == []
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from src.calendar_utils import iter_month_days
+from src.rules_presets import PRESETS
+from src.scheduler import generate_schedule
+
+pytest.importorskip("numpy")
+
+WINDOW = [{"prev_type": "ANY", "next_type": "NIGHT", "apply_day": "ANY", "rule_kind": "WINDOW", "max_count": 2, "window_days": 7}]
+REST = [{"prev_type": "ANY", "next_type": "ANY", "apply_day": "ANY", "rule_kind": "REST", "rest_hours": 11}]
+# 16 saat: DAY -> ertesi gün DAY aralığı tam sınırda (eşitlik serbest)
+REST_EDGE = [dict(REST[0], rest_hours=16)]
+CASES = {
+    "window": {"rules": WINDOW},
+    "rest": {"rules": REST},
+    "rest-edge": {"rules": REST_EDGE},
+    "window+rest": {"rules": WINDOW + REST},
+    # saat sınırı yarı personelde; havuzlu hücrelerde sıralı seçim yolu da çalışır
+    "cap": {"max_hours": 96},
+    "cap+pool": {"max_hours": 96, "overtime_budget": 40},
+    "cap+pool hours": {"max_hours": 96, "overtime_budget": 40, "score_mode": "hours", "min_required_hours": 120},
+}
+DEMAND = [
+    {"day_kind": "WEEKDAY", "shift_type": "DAY", "count": 6},
+    {"day_kind": "WEEKDAY", "shift_type": "NIGHT", "count": 4},
+    {"day_kind": "WEEKEND", "shift_type": "D24", "count": 5},
+    {"day_kind": "HOLIDAY", "shift_type": "D24", "count": 5},
+]
+
+
+def _month(seed: int):
+    """25-60 kişi, izinler, SOFT istekler ve önceki ayın son günleri (boundary)."""
+    rnd = random.Random(seed)
+    year, month = 2026, rnd.randint(2, 12)
+    staff = list(range(1, rnd.randint(25, 60) + 1))
+    rnd.shuffle(staff)
+    days = [d.iso for d in iter_month_days(year, month)]
+    blocked, soft = {}, {}
+    for sid in staff:
+        for d in days:
+            r = rnd.random()
+            if r < 0.04:
+                blocked.setdefault(sid, set()).add(d)
+            elif r < 0.06:
+                soft.setdefault(sid, set()).add(d)
+    last = [(f"{year:04d}-{month - 1:02d}-{day:02d}", t) for day, t in ((26, "NIGHT"), (27, "NIGHT"), (28, "D24"))]
+    boundary = [(d, t, sid) for sid in rnd.sample(staff, 8) for d, t in last]
+    rules = [dict(r) for r in PRESETS[rnd.choice(["Varsayılan", "Katı", "Esnek"])]]
+    return year, month, staff, blocked, soft, boundary, rules
+
+
+@pytest.mark.parametrize("order", ["calendar", "scarcity"])
+@pytest.mark.parametrize("case", list(CASES))
+@pytest.mark.parametrize("seed", range(6))
+def test_numpy_engine_matches_python(case, order, seed):
+    """Vektörel kontroller (pencere / dinlenme / saat sınırı) python motoruyla aynı planı verir."""
+    year, month, staff, blocked, soft, boundary, rules = _month(seed)
+    extra = dict(CASES[case])
+    rules = rules + extra.pop("rules", [])
+    if "max_hours" in extra:
+        extra["max_hours"] = {sid: extra["max_hours"] for sid in staff[::2]}
+    demand = DEMAND if seed % 2 else None
+    plans = [
+        generate_schedule(
+            year, month, staff, blocked, rules, soft_avoid=soft, engine=engine, slot_order=order,
+            boundary=boundary, demand=demand, **extra,
+        )[:2]
+        for engine in ("python", "numpy")
+    ]
+    assert plans[0] == plans[1]
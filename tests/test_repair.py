@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from src.calendar_utils import iter_month_days
+from src.rules_presets import PRESETS
+from src.scheduler import generate_schedule, repair_to_meet_min_hours, shift_registry, validate_assignments
+
+DAYS = [d.iso for d in iter_month_days(2026, 3)]
+NIGHT_DAY = [{"prev_type": "NIGHT", "next_type": "DAY", "apply_day": "ANY"}]
+
+
+def test_repair_skips_staff_no_donor_can_help():
+    """Tüm ay izinli kişi sıradaki eksik kişiyi bekletmez (eski repair orada dururdu)."""
+    assignments = [(d, "DAY", 3) for d in DAYS]
+    out, hours, swaps = repair_to_meet_min_hours(2026, 3, assignments, [1, 2, 3], {1: set(DAYS)}, {1: 16, 2: 16, 3: 0})
+    assert hours[1] == 0
+    assert hours[2] >= 16
+    assert swaps > 0
+    assert validate_assignments(2026, 3, out, [1, 2, 3], {1: set(DAYS)}, 0)[1] == []
+
+
+def test_repair_respects_next_day_transition():
+    """Alıcının ertesi günkü vardiyasıyla yasak geçiş oluşturan vardiya taşınmaz."""
+    assignments = [(DAYS[0], "NIGHT", 3), (DAYS[1], "DAY", 2)] + [(d, "DAY", 3) for d in DAYS[10:20]]
+    out, hours, _swaps = repair_to_meet_min_hours(2026, 3, assignments, [2, 3], {}, {2: 24, 3: 0}, NIGHT_DAY)
+    assert hours[2] >= 24
+    assert (DAYS[0], "NIGHT", 2) not in out
+    assert validate_assignments(2026, 3, out, [2, 3], {}, 0, NIGHT_DAY)[1] == []
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_repair_never_adds_hard_violations(seed):
+    rnd = random.Random(seed)
+    staff = list(range(1, rnd.randint(20, 40) + 1))
+    blocked = {}
+    for sid in staff:
+        for d in DAYS:
+            if rnd.random() < 0.06:
+                blocked.setdefault(sid, set()).add(d)
+    rules = [dict(r) for r in PRESETS[rnd.choice(["Varsayılan", "Katı", "Esnek"])]]
+    min_hours = {sid: rnd.choice([120, 160, 200, 240]) for sid in staff}
+    assignments, _u, _d = generate_schedule(2026, 3, staff, blocked, rules)
+    before = validate_assignments(2026, 3, assignments, staff, blocked, 0, rules)[1]
+    out, hours, _swaps = repair_to_meet_min_hours(2026, 3, assignments, staff, blocked, min_hours, rules)
+    assert len(validate_assignments(2026, 3, out, staff, blocked, 0, rules)[1]) <= len(before)
+    # repair sadece taşır: slot sayısı ve toplam saat değişmez
+    assert sorted((d, t) for d, t, _sid in out) == sorted((d, t) for d, t, _sid in assignments)
+    start = {sid: 0 for sid in staff}
+    for _d, t, sid in assignments:
+        start[sid] += shift_registry().hours_of(t)
+    assert _deficit(hours, min_hours) <= _deficit(start, min_hours)
+
+
+def _deficit(hours, min_hours):
+    return sum(max(0, need - hours.get(sid, 0)) for sid, need in min_hours.items())
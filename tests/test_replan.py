@@ -0,0 +1,68 @@
+import random
+
+from src.assignments_repo import ensure_assignments_table, replace_days, replace_month
+from src.calendar_utils import iter_month_days
+from src.rules_presets import PRESETS
+from src.scheduler import validate_assignments
+from src.solver import ProblemSpec, conflict_days, replan_window, solve_once
+
+RULES = [dict(r) for r in PRESETS["Varsayılan"]]
+DEMAND = [{"day_kind": kind, "shift_type": t, "count": 3} for kind in ("WEEKDAY", "WEEKEND", "HOLIDAY") for t in ("DAY", "NIGHT")]
+
+
+def _spec(blocked_any, blocked_type):
+    staff = list(range(1, 31))
+    return ProblemSpec.from_inputs(2026, 3, staff, blocked_any, 60, RULES, blocked_type, demand=DEMAND)
+
+
+def _saved_plan():
+    rnd = random.Random(4)
+    days = [d.iso for d in iter_month_days(2026, 3)]
+    blocked = {sid: {d} for sid, d in zip(range(1, 31), rnd.choices(days, k=30))}
+    types = {sid: {d: "yillik_izin" for d in ds} for sid, ds in blocked.items()}
+    return blocked, types, solve_once(_spec(blocked, types)).assignments
+
+
+def _add_rapor(blocked, types, sid, day):
+    blocked = {k: set(v) for k, v in blocked.items()}
+    types = {k: dict(v) for k, v in types.items()}
+    blocked.setdefault(sid, set()).add(day)
+    types.setdefault(sid, {})[day] = "rapor"
+    return _spec(blocked, types)
+
+
+def _db_month():
+    conn = ensure_assignments_table()
+    try:
+        rows = conn.execute("SELECT date, shift_type, staff_id FROM assignments ORDER BY date, shift_type, staff_id").fetchall()
+        return [tuple(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def test_conflict_days_finds_new_leave():
+    blocked, types, saved = _saved_plan()
+    assert conflict_days(_spec(blocked, types), saved) == []
+    _d, _t, sid = next(a for a in saved if a[0] == "2026-03-15")
+    assert conflict_days(_add_rapor(blocked, types, sid, "2026-03-15"), saved) == ["2026-03-15"]
+
+
+def test_replan_window_pins_days_outside_window(tmp_db):
+    blocked, types, saved = _saved_plan()
+    replace_month(2026, 3, [{"date": d, "shift_type": t, "staff_id": sid} for d, t, sid in saved])
+    _d, _t, sid = next(a for a in saved if a[0] == "2026-03-15")
+    spec = _add_rapor(blocked, types, sid, "2026-03-15")
+
+    result, window_days = replan_window(spec, saved, conflict_days(spec, saved), radius=1)
+    assert window_days == ["2026-03-14", "2026-03-15", "2026-03-16"]
+    inside = set(window_days)
+    assert sorted(a for a in result.assignments if a[0] not in inside) == sorted(a for a in saved if a[0] not in inside)
+    assert not any(d == "2026-03-15" and s == sid for d, _t, s in result.assignments)
+    assert result.unfilled == []
+    assert validate_assignments(
+        2026, 3, result.assignments, list(spec.staff_ids), spec.blocked_any, 0, RULES, spec.blocked_type, demand=DEMAND,
+    )[1] == []
+
+    # sadece pencere günleri yeniden yazılır; DB'deki ay yeni planla aynı olur
+    replace_days(window_days, [{"date": d, "shift_type": t, "staff_id": s} for d, t, s in result.assignments if d in inside])
+    assert _db_month() == sorted(result.assignments)
@@ -0,0 +1,65 @@
+import pytest
+
+from src.calendar_utils import iter_month_days
+from src.scheduler import DEFAULT_SHIFT_TYPES, generate_schedule, set_shift_types, shift_registry, validate_assignments
+from src.shift_types_repo import list_shift_types, upsert_shift_type
+
+# 12 saatlik iki vardiya: gündüz ve gece yarısını geçen gece
+TWELVES = [
+    {"code": "G12", "hours": 12, "start_time": "08:00", "end_time": "20:00", "color": "#123456"},
+    {"code": "N12", "hours": 12, "start_time": "20:00", "end_time": "08:00"},
+]
+DEMAND = [{"day_kind": kind, "shift_type": t, "count": 2} for kind in ("WEEKDAY", "WEEKEND", "HOLIDAY") for t in ("G12", "N12")]
+
+
+@pytest.fixture
+def twelves():
+    reg = set_shift_types(TWELVES)
+    yield reg
+    set_shift_types(None)
+
+
+def test_registry_compiles_custom_types(twelves):
+    assert shift_registry() is twelves
+    assert twelves.names == ("G12", "N12")
+    assert twelves.codes == {"G12": 0, "N12": 1}
+    assert twelves.hours_of("N12") == 12
+    assert twelves.hours_of("DAY") == 0 and twelves.code("DAY") == -1
+    assert twelves.start_min == [480, 1200]
+    assert twelves.end_min == [1200, 1920]  # gece yarısını geçen vardiya başlangıca göre
+    assert twelves.colors == ["#123456", "#000000"]
+
+
+def test_set_shift_types_none_restores_defaults(twelves):
+    reg = set_shift_types(None)
+    assert reg.names == tuple(t.code for t in DEFAULT_SHIFT_TYPES)
+    assert reg.hours_of("NIGHT") == 16
+
+
+def test_schedule_with_custom_types(twelves):
+    staff = list(range(1, 16))
+    rules = [{"prev_type": "N12", "next_type": "G12", "apply_day": "ANY"}]
+    assignments, unfilled, _d = generate_schedule(2026, 3, staff, {}, rules, demand=DEMAND)
+    assert unfilled == []
+    assert {t for _d, t, _sid in assignments} == {"G12", "N12"}
+    assert len(assignments) == 4 * len(list(iter_month_days(2026, 3)))
+    assert validate_assignments(2026, 3, assignments, staff, {}, 0, rules, demand=DEMAND)[1] == []
+    # kayıtlı kural N12 -> ertesi gün G12 yasağı yeni tiplerle de uygulanır
+    days = [d.iso for d in iter_month_days(2026, 3)]
+    cells = set(assignments)
+    assert not any((days[i], "N12", sid) in cells and (days[i + 1], "G12", sid) in cells for sid in staff for i in range(len(days) - 1))
+
+
+def test_shift_types_repo_round_trip(tmp_db):
+    # ilk kurulumda varsayılan tipler kayıt sırasıyla gelir
+    assert [r["code"] for r in list_shift_types()] == [t.code for t in DEFAULT_SHIFT_TYPES]
+    upsert_shift_type("n12", 12, "20:00", "08:00")
+    upsert_shift_type("NIGHT", 12, "20:00", "08:00", "#C9A100")
+    rows = list_shift_types()
+    assert [r["code"] for r in rows] == ["DAY", "NIGHT", "D24", "N12"]
+    try:
+        reg = set_shift_types(rows)
+        assert reg.hours_of("NIGHT") == 12
+        assert reg.code("N12") == 3
+    finally:
+        set_shift_types(None)
@@ -0,0 +1,151 @@
+import random
+
+import pytest
+
+from src.calendar_utils import iter_month_days, month_day_table
+from src.local_search import improve_schedule
+from src.rules_presets import PRESETS
+from src.scheduler import _MonthState, generate_schedule, generate_schedule_hard_min_hours, validate_assignments
+
+SEN, ICU = 1, 2
+NIGHT_SEN = [{"prev_type": "ANY", "next_type": "NIGHT", "apply_day": "ANY", "rule_kind": "COVERAGE",
+              "skill_mask": SEN, "min_count": 2, "note": "KIDEMLI"}]
+DEMAND = [{"day_kind": kind, "shift_type": t, "count": 3} for kind in ("WEEKDAY", "WEEKEND", "HOLIDAY") for t in ("DAY", "NIGHT")]
+
+
+def _month(seed: int):
+    """20-45 kişi, seyrek yetkinlik, bir kapsam kuralı: bazı hücreler kapsamı tutturamaz."""
+    rnd = random.Random(seed)
+    year, month = 2026, rnd.randint(1, 12)
+    staff = list(range(1, rnd.choice([20, 30, 45]) + 1))
+    days = [d.iso for d in iter_month_days(year, month)]
+    blocked = {}
+    for sid in staff:
+        for d in days:
+            if rnd.random() < 0.05:
+                blocked.setdefault(sid, set()).add(d)
+    skills = {}
+    for sid in staff:
+        m = (SEN if rnd.random() < 0.35 else 0) | (ICU if rnd.random() < 0.25 else 0)
+        if m:
+            skills[sid] = m
+    rules = [dict(r) for r in PRESETS[rnd.choice(["Varsayılan", "Katı", "Esnek"])]] + [{
+        "prev_type": "ANY", "next_type": rnd.choice(["NIGHT", "DAY", "ANY"]), "apply_day": "ANY",
+        "rule_kind": "COVERAGE", "skill_mask": rnd.choice([SEN, ICU, SEN | ICU]), "min_count": rnd.choice([1, 2, 4]),
+        "note": "KAPSAM",
+    }]
+    return year, month, staff, blocked, rules, skills
+
+
+def _coverage_violations(year, month, assignments, staff, blocked, rules, skills):
+    _s, violations, _d = validate_assignments(year, month, assignments, staff, blocked, 0, rules, skills=skills)
+    return [v for v in violations if v["type"] == "SKILL_COVERAGE"]
+
+
+def _idle_in_short_cells(violations, assignments, mask, skills):
+    """Kapsamı eksik hücrelerde açığa katkısı olmayan (yetkinliği tutmayan) kişi sayısı."""
+    short = {(v["date"], v["shift_type"]) for v in violations}
+    return sum(1 for d, t, sid in assignments if (d, t) in short and skills.get(sid, 0) & mask != mask)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_improve_never_adds_coverage_violations(seed):
+    """greedy -> repair -> improve: fill yetkinlik açığı olan hücreye açığı azaltmayan kişiyi koymaz."""
+    year, month, staff, blocked, rules, skills = _month(seed)
+    mask = rules[-1]["skill_mask"]
+    assignments, unfilled, _d, _h, _sw = generate_schedule_hard_min_hours(year, month, staff, blocked, 140, rules, skills=skills)
+    before = _coverage_violations(year, month, assignments, staff, blocked, rules, skills)
+    improved, _u, _stats = improve_schedule(
+        year, month, assignments, unfilled, staff, blocked, 140, rules,
+        time_budget_s=60.0, max_iters=20000, seed=seed, skills=skills,
+    )
+    after = _coverage_violations(year, month, improved, staff, blocked, rules, skills)
+    assert len(after) <= len(before)
+    assert _idle_in_short_cells(after, improved, mask, skills) <= _idle_in_short_cells(before, assignments, mask, skills)
+
+
+def test_validator_reports_empty_demand_cell():
+    """Hiç atama almamış ihtiyaç hücresi de yetkinlik eksiği olarak raporlanır."""
+    demand = [{"day_kind": kind, "shift_type": "NIGHT", "count": 2} for kind in ("WEEKDAY", "WEEKEND", "HOLIDAY")]
+    rules = [{"prev_type": "ANY", "next_type": "NIGHT", "apply_day": "ANY", "rule_kind": "COVERAGE",
+              "skill_mask": SEN, "min_count": 1, "note": "KIDEMLI"}]
+    days = [d.iso for d in iter_month_days(2026, 2)]
+    # 1 Şubat dışındaki her gece bir kıdemli kişi var; 1 Şubat boş kaldı
+    assignments = [(d, "NIGHT", 1 + i % 2) for i, d in enumerate(days[1:])]
+    _s, violations, _d = validate_assignments(2026, 2, assignments, [1, 2], {}, 0, rules, skills={1: SEN, 2: SEN}, demand=demand)
+    cover = [v for v in violations if v["type"] == "SKILL_COVERAGE"]
+    assert [(v["date"], v["shift_type"]) for v in cover] == [(days[0], "NIGHT")]
+    assert "0 kişi" in cover[0]["detail"]
+
+
+def test_cover_counters():
+    """cover_short / seat_ok / cover_keeps hücre sayaçlarını doğru okur."""
+    cal = month_day_table(2026, 2)
+    state = _MonthState(cal, [1, 2, 3, 4], {}, transition_rules=NIGHT_SEN, skills={1: SEN, 2: SEN | ICU, 3: ICU})
+    night = state.tt.code("NIGHT")
+    assert state.cover_short(0, night) == [(SEN, 2)]
+    assert state.cover_short(0, state.tt.code("DAY")) == []
+    # 3 koltuk, 2 kıdemli açığı: yetkinliksiz biri oturabilir, iki kişi oturamaz
+    assert state.seat_ok(state.cover_short(0, night), 3, 4)
+    assert not state.seat_ok(state.cover_short(0, night), 2, 4)
+    state.assign(1, 0, "NIGHT")
+    state.assign(4, 0, "NIGHT")
+    assert state.cover_short(0, night) == [(SEN, 1)]
+    assert not state.seat_ok(state.cover_short(0, night), 1, 3)
+    assert state.seat_ok(state.cover_short(0, night), 1, 2)
+    state.assign(2, 0, "NIGHT")
+    assert state.cover_short(0, night) == []
+    # kıdemli çıkıp yetkinliksiz girerse minimum bozulur; kıdemli yerine kıdemli olur
+    assert not state.cover_keeps(1, 3, 0, night)
+    assert state.cover_keeps(4, 3, 0, night)
+    state.unassign(2, 0, "NIGHT")
+    assert state.cover_short(0, night) == [(SEN, 1)]
+
+
+def _staffed_month():
+    """30 kişiden 12'si kıdemli, az izin: her gecenin 2 kıdemlisi karşılanabilir."""
+    rnd = random.Random(1)
+    staff = list(range(1, 31))
+    skills = {sid: SEN for sid in rnd.sample(staff, 12)}
+    days = [d.iso for d in iter_month_days(2026, 3)]
+    blocked = {sid: {d} for sid, d in zip(staff, rnd.choices(days, k=len(staff)))}
+    rules = [dict(r) for r in PRESETS["Varsayılan"]] + NIGHT_SEN
+    return staff, skills, blocked, rules
+
+
+def test_greedy_meets_min_count_with_enough_skilled_staff():
+    staff, skills, blocked, rules = _staffed_month()
+    assignments, unfilled, _d = generate_schedule(2026, 3, staff, blocked, rules, demand=DEMAND, skills=skills)
+    assert unfilled == []
+    per_night = {}
+    for d, t, sid in assignments:
+        if t == "NIGHT" and sid in skills:
+            per_night[d] = per_night.get(d, 0) + 1
+    assert len(per_night) == 31 and min(per_night.values()) >= 2
+    _s, violations, _dd = validate_assignments(2026, 3, assignments, staff, blocked, 0, rules, skills=skills, demand=DEMAND)
+    assert [v for v in violations if v["type"] == "SKILL_COVERAGE"] == []
+
+
+def test_validator_flags_shortfall():
+    staff, skills, blocked, rules = _staffed_month()
+    assignments, _u, _d = generate_schedule(2026, 3, staff, blocked, rules, demand=DEMAND, skills=skills)
+    # 10 Mart gecesinin kıdemlileri yetkinliksiz olarak işaretlenirse açık raporlanır
+    night = [sid for d, t, sid in assignments if d == "2026-03-10" and t == "NIGHT" and sid in skills]
+    thinned = {sid: m for sid, m in skills.items() if sid != night[0]}
+    _s, violations, _dd = validate_assignments(2026, 3, assignments, staff, blocked, 0, rules, skills=thinned, demand=DEMAND)
+    cover = [v for v in violations if v["type"] == "SKILL_COVERAGE" and v["date"] == "2026-03-10"]
+    assert len(cover) == 1
+    assert cover[0]["shift_type"] == "NIGHT"
+    assert f"KIDEMLI {len(night) - 1} kişi (en az 2)" in cover[0]["detail"]
+
+
+def test_local_search_keeps_coverage():
+    staff, skills, blocked, rules = _staffed_month()
+    assignments, unfilled, _d = generate_schedule(2026, 3, staff, blocked, rules, demand=DEMAND, skills=skills)
+    improved, _u, stats = improve_schedule(
+        2026, 3, assignments, unfilled, staff, blocked, 60, rules,
+        time_budget_s=60.0, max_iters=20000, seed=3, skills=skills,
+    )
+    assert stats["accepted"] > 0
+    _s, violations, _dd = validate_assignments(2026, 3, improved, staff, blocked, 0, rules, skills=skills, demand=DEMAND)
+    assert violations == []
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from src.calendar_utils import iter_month_days, month_day_table
+from src.rules_presets import PRESETS
+from src.scheduler import _demand_cells, _MonthState, _ScarcityOrder, generate_schedule
+
+RULES = {
+    "NIGHT>ANY": [{"prev_type": "NIGHT", "next_type": "ANY", "apply_day": "ANY"}],
+    "Varsayılan": [dict(r) for r in PRESETS["Varsayılan"]],
+    "Katı": [dict(r) for r in PRESETS["Katı"]],
+}
+
+
+def _month(seed: int):
+    """26-32 kişi, birkaç izin yoğun gün: slotların bir kısmı dolamaz."""
+    rnd = random.Random(seed)
+    year, month = 2026, rnd.randint(1, 12)
+    staff = list(range(1, rnd.randint(26, 32) + 1))
+    rnd.shuffle(staff)
+    days = [d.iso for d in iter_month_days(year, month)]
+    heavy = set(rnd.sample(days, 4))
+    blocked = {}
+    for sid in staff:
+        for d in days:
+            if rnd.random() < (0.35 if d in heavy else 0.05):
+                blocked.setdefault(sid, set()).add(d)
+    return year, month, staff, blocked
+
+
+@pytest.mark.parametrize("rules", list(RULES))
+def test_scarcity_leaves_fewer_unfilled_than_calendar(rules):
+    totals = {"calendar": 0, "scarcity": 0}
+    for seed in range(12):
+        year, month, staff, blocked = _month(seed)
+        for order in totals:
+            _a, unfilled, _d = generate_schedule(year, month, staff, blocked, transition_rules=RULES[rules], slot_order=order)
+            totals[order] += len(unfilled)
+    assert totals["scarcity"] < totals["calendar"]
+
+
+def test_scarcity_yields_every_cell_once():
+    year, month, staff, blocked = _month(3)
+    cal = month_day_table(year, month)
+    state = _MonthState(cal, staff, blocked, transition_rules=RULES["Katı"])
+    cells = _demand_cells(cal, None)
+    assert sorted(_ScarcityOrder(state, cells)) == sorted(cells)
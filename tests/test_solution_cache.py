@@ -0,0 +1,81 @@
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from src import db, solution_cache
+from src.solution_cache import SolutionCache, ensure_solution_cache_table
+from src.solver import SolveResult
+
+
+def _result(sid: int) -> SolveResult:
+    return SolveResult([("2026-03-01", "DAY", sid)], [], [], {sid: 8}, 0, {"objective": 0.0}, None)
+
+
+def _disk_keys():
+    with closing(ensure_solution_cache_table()) as conn:
+        return {r[0] for r in conn.execute("SELECT key FROM solution_cache").fetchall()}
+
+
+def test_disk_cache_keeps_newest_rows(tmp_db):
+    cache = SolutionCache(maxsize=2, persist=True, disk_maxsize=3)
+    for i in range(6):
+        cache.put(f"k{i}", _result(i))
+    assert _disk_keys() == {"k3", "k4", "k5"}
+
+    # yeni süreç: bellek boş, diskteki en yeni kayıtlar okunur
+    fresh = SolutionCache(maxsize=2, persist=True, disk_maxsize=3)
+    assert fresh.get("k0") is None
+    assert fresh.get("k5").assignments == [("2026-03-01", "DAY", 5)]
+
+
+def test_disk_limit_defaults_to_maxsize(tmp_db):
+    cache = SolutionCache(maxsize=2, persist=True)
+    for i in range(4):
+        cache.put(f"k{i}", _result(i))
+    assert _disk_keys() == {"k2", "k3"}
+
+
+def test_table_is_created_once_and_connections_closed(tmp_db, monkeypatch):
+    opened, ensures = [], []
+    get_conn, ensure = db.get_conn, solution_cache.ensure_solution_cache_table
+
+    def _get_conn():
+        opened.append(get_conn())
+        return opened[-1]
+
+    def _ensure():
+        ensures.append(1)
+        return ensure()
+
+    monkeypatch.setattr(db, "get_conn", _get_conn)
+    monkeypatch.setattr(solution_cache, "ensure_solution_cache_table", _ensure)
+    cache = SolutionCache(maxsize=1, persist=True, disk_maxsize=2)
+    cache.put("a", _result(1))
+    cache.put("b", _result(2))
+    assert cache.get("a").hours == {1: 8}  # bellekten düştü, diskten okunur
+    cache.clear()
+    assert len(ensures) == 1
+    assert len(opened) == 4
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")  # kapalı
+
+
+def test_cache_uses_db_path(tmp_db):
+    SolutionCache(persist=True).put("k", _result(1))
+    with closing(sqlite3.connect(tmp_db)) as conn:
+        assert conn.execute("SELECT key FROM solution_cache").fetchall() == [("k",)]
+
+
+def test_disk_errors_are_swallowed(tmp_db, monkeypatch):
+    cache = SolutionCache(persist=True)
+    cache.put("k", _result(1))
+
+    def _broken():
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(db, "get_conn", _broken)
+    cache.put("j", _result(2))
+    cache.clear()
+    assert cache.get("k") is None
@@ -0,0 +1,59 @@
+import pytest
+
+from src.scheduler import DAY_KINDS, _compile_transition_rules, rule_lookback_days, shift_registry
+
+WEEKDAY, WEEKEND = DAY_KINDS.index("WEEKDAY"), DAY_KINDS.index("WEEKEND")
+
+
+def test_transition_rows_compile_to_table():
+    tt = _compile_transition_rules([
+        {"prev_type": "NIGHT", "next_type": "DAY", "apply_day": "ANY"},
+        {"prev_type": "DAY", "next_type": "D24", "apply_day": "WEEKEND"},
+        {"prev_type": "RAPOR", "next_type": "ANY", "apply_day": "ANY"},
+    ])
+    c = tt.code
+    # kayıtlı tipler registry ile aynı kodu alır; RAPOR / YILLIK_IZIN hemen arkalarından
+    assert [c(t) for t in shift_registry().names] == list(range(len(shift_registry().names)))
+    assert c("RAPOR") == len(shift_registry().names)
+    assert tt.forbidden(c("NIGHT"), c("DAY"), WEEKDAY) and tt.forbidden(c("NIGHT"), c("DAY"), WEEKEND)
+    assert not tt.forbidden(c("DAY"), c("D24"), WEEKDAY)
+    assert tt.forbidden(c("DAY"), c("D24"), WEEKEND)
+    # ANY her kodu kapsar, adı hiç geçmeyen "diğer" dahil
+    assert c("EVE") == tt.other
+    assert all(tt.forbidden(c("RAPOR"), nc, k) for nc in range(tt.n) for k in (WEEKDAY, WEEKEND))
+    assert not tt.forbidden(c("YILLIK_IZIN"), c("DAY"), WEEKDAY)
+    assert not tt.forbidden(c("EVE"), c("DAY"), WEEKDAY)
+    assert not tt.forbidden(-1, c("DAY"), WEEKDAY)  # önceki gün boş
+
+
+def test_compile_is_cached():
+    rules = [{"prev_type": "NIGHT", "next_type": "DAY", "apply_day": "ANY"}]
+    assert _compile_transition_rules(rules) is _compile_transition_rules([dict(r) for r in rules])
+    assert _compile_transition_rules(None) is _compile_transition_rules([])
+
+
+def test_rule_kinds_compile_to_windows_rest_and_coverage():
+    tt = _compile_transition_rules([
+        {"rule_kind": "CONSECUTIVE", "next_type": "ANY", "max_count": 5},
+        {"rule_kind": "WINDOW", "next_type": "NIGHT", "max_count": 3, "window_days": 7},
+        {"rule_kind": "WINDOW", "next_type": "NIGHT", "max_count": 0, "window_days": 7},  # anlamsız: atlanır
+        {"rule_kind": "REST", "rest_hours": 11},
+        {"rule_kind": "REST", "rest_hours": 8},
+        {"rule_kind": "COVERAGE", "next_type": "NIGHT", "skill_mask": 0b10, "min_count": 1},
+    ])
+    assert [(w.kind, w.stype, w.max_count, w.days) for w in tt.windows] == [("CONSECUTIVE", "ANY", 5, 6), ("WINDOW", "NIGHT", 3, 7)]
+    assert tt.min_rest == 11 * 60  # birden çok REST kuralında en sıkısı
+    assert tt.rest_span == 2
+    assert tt.lookback == 6
+    assert tt.cover_by_code[tt.code("NIGHT")] == [(0, 0b10, 1)]
+    assert tt.cover_by_code[tt.code("DAY")] == []
+
+
+def test_lookback_defaults_to_one_day():
+    assert rule_lookback_days(None) == 1
+    assert rule_lookback_days([{"rule_kind": "REST", "rest_hours": 30}]) == 3
+
+
+def test_unknown_rule_kind_raises():
+    with pytest.raises(ValueError, match="Bilinmeyen kural tipi"):
+        _compile_transition_rules([{"rule_kind": "MYSTERY", "next_type": "DAY"}])
@@ -0,0 +1,69 @@
+import random
+
+from src.assignments_repo import list_month, replace_month
+from src.calendar_utils import iter_month_days
+from src.rules_presets import PRESETS
+from src.scheduler import validate_assignments
+from src.solver import ProblemSpec, solve_once, solve_warm
+from src.staff_repo import add_staff_bulk
+
+RULES = [dict(r) for r in PRESETS["Varsayılan"]]
+DEMAND = [{"day_kind": kind, "shift_type": t, "count": 3} for kind in ("WEEKDAY", "WEEKEND", "HOLIDAY") for t in ("DAY", "NIGHT")]
+DAYS = [d.iso for d in iter_month_days(2026, 3)]
+
+
+def _spec(blocked_any, blocked_type):
+    return ProblemSpec.from_inputs(2026, 3, list(range(1, 31)), blocked_any, 60, RULES, blocked_type, demand=DEMAND)
+
+
+def _saved_month():
+    """30 kişilik ay DB'ye kaydedilir ve list_month ile geri okunur (warm start girdisi)."""
+    add_staff_bulk([f"Personel {i:02d}" for i in range(1, 31)])
+    rnd = random.Random(9)
+    blocked = {sid: {d} for sid, d in zip(range(1, 31), rnd.choices(DAYS, k=30))}
+    types = {sid: {d: "yillik_izin" for d in ds} for sid, ds in blocked.items()}
+    plan = solve_once(_spec(blocked, types)).assignments
+    replace_month(2026, 3, [{"date": d, "shift_type": t, "staff_id": sid} for d, t, sid in plan])
+    saved = [(r["date"], r["shift_type"], int(r["staff_id"])) for r in list_month(2026, 3)]
+    assert sorted(saved) == sorted(plan)
+    return blocked, types, saved
+
+
+def _with_rapor(blocked, types, sid, day):
+    blocked = {k: set(v) for k, v in blocked.items()}
+    types = {k: dict(v) for k, v in types.items()}
+    blocked.setdefault(sid, set()).add(day)
+    types.setdefault(sid, {})[day] = "rapor"
+    return _spec(blocked, types)
+
+
+def test_solve_warm_keeps_locked_cells(tmp_db):
+    blocked, types, saved = _saved_month()
+    # ilk 10 gün kilitli; 20 Mart'taki birine sonradan rapor girildi
+    locked = {a for a in saved if a[0] <= "2026-03-10"}
+    _d, _t, sid = next(a for a in saved if a[0] == "2026-03-20")
+    spec = _with_rapor(blocked, types, sid, "2026-03-20")
+    seed_plan = [(d, t, s, (d, t, s) in locked) for d, t, s in saved]
+
+    result = solve_warm(spec, seed_plan, improve_seconds=0.3)
+    assert locked <= set(result.assignments)
+    assert not any(d == "2026-03-20" and s == sid for d, _t, s in result.assignments)
+    assert result.unfilled == []
+    assert validate_assignments(
+        2026, 3, result.assignments, list(spec.staff_ids), spec.blocked_any, 0, RULES, spec.blocked_type, demand=DEMAND,
+    )[1] == []
+
+
+def test_solve_warm_only_fixes_what_changed(tmp_db):
+    """Kilitsiz ama hâlâ geçerli atamalar başlangıç olarak kalır; raporlu hücre yeniden dolar."""
+    blocked, types, saved = _saved_month()
+    cell = next(a for a in saved if a[0] == "2026-03-20")
+    spec = _with_rapor(blocked, types, cell[2], "2026-03-20")
+
+    result = solve_warm(spec, [(d, t, s, False) for d, t, s in saved])
+    # değişen hücreler sadece raporlu gün ve repair'in raporlu kişinin min saati için taşıdıkları
+    moved = (set(saved) - {cell}) - set(result.assignments)
+    assert all((d, t, cell[2]) in result.assignments for d, t, _s in moved)
+    assert len(moved) <= 2
+    assert len(result.assignments) == len(saved)
+    assert result.unfilled == []